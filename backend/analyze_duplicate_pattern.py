@@ -7,24 +7,23 @@ import json
 from datetime import datetime, timedelta
 from app import app
 from models.classification import EvaluationHistory
+from cleanup_duplicates import duplicate_hashes_query
 
 def analyze_duplicate_pattern():
     """分析重复记录的具体模式"""
     print("🔍 深度分析重复记录模式...")
     
     with app.app_context():
-        # 获取所有记录
-        all_records = EvaluationHistory.query.order_by(EvaluationHistory.created_at.desc()).all()
+        total_records = EvaluationHistory.query.count()
         
-        print(f"📊 总记录数: {len(all_records)}")
+        print(f"📊 总记录数: {total_records}")
         
-        # 按问题内容分组
+        # 按内容哈希分组（与保存时的重复检测使用同一哈希）
         content_groups = {}
-        for record in all_records:
-            key = f"{record.user_input}|||{record.model_answer}"
-            if key not in content_groups:
-                content_groups[key] = []
-            content_groups[key].append(record)
+        for record in EvaluationHistory.query.filter(
+            EvaluationHistory.content_hash.in_(duplicate_hashes_query())
+        ).order_by(EvaluationHistory.created_at.desc()):
+            content_groups.setdefault(record.content_hash, []).append(record)
         
         # 找出重复组
         duplicate_groups = {k: v for k, v in content_groups.items() if len(v) > 1}
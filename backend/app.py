@@ -13,20 +13,26 @@ load_dotenv()
 from config import config
 
 # 导入数据库模型
-from models.classification import db
+from models.classification import db, EvaluationHistory
 
 # 导入服务类
 from services.evaluation_service import EvaluationService
 from services.classification_service_sqlite import ClassificationService
 from services.evaluation_standard_service import EvaluationStandardService
 from services.evaluation_history_service import EvaluationHistoryService
+from services.evaluation_stats_rollup import evaluation_stats_rollup
+from services.evaluation_pipeline import EvaluationPipeline, DEFAULT_EVALUATION_CRITERIA
 from services.ai_assistant import ai_assistant
+from services.job_queue_service import job_queue_service, NonRetryableJobError
+from services.classification_history_writer import classification_history_writer
 from utils.logger import get_logger
+from utils.sqlite_engine import configure_sqlite_engine
 
 # 导入路由蓝图
 from routes.upload_routes import upload_bp
 from routes.evaluation_dimension_routes import evaluation_dimension_bp
 from routes.evaluation_standard_config_routes import evaluation_standard_config_bp
+from routes.job_routes import job_bp
 
 # 创建Flask应用
 app = Flask(__name__)
@@ -41,6 +47,7 @@ CORS(app)
 app.register_blueprint(upload_bp)
 app.register_blueprint(evaluation_dimension_bp)
 app.register_blueprint(evaluation_standard_config_bp)
+app.register_blueprint(job_bp)
 
 # 获取日志记录器
 logger = get_logger(__name__)
@@ -48,11 +55,19 @@ logger = get_logger(__name__)
 # 初始化数据库
 db.init_app(app)
 
+# 每个新的数据库连接执行环境配置中的PRAGMA（WAL、同步级别、缓存等）
+with app.app_context():
+    configure_sqlite_engine(db.engine)
+
 # 创建服务实例
 evaluation_service = EvaluationService()
+evaluation_service.weight_registry.init_app(app)
 classification_service = ClassificationService(app)
+classification_history_writer.init_app(app)
 evaluation_standard_service = EvaluationStandardService(app)
 evaluation_history_service = EvaluationHistoryService(app)
+evaluation_pipeline = EvaluationPipeline(app, classification_service, evaluation_service, evaluation_history_service)
+job_queue_service.init_app(app)
 
 # 创建数据库表
 with app.app_context():
@@ -95,6 +110,37 @@ def api_health_check():
         'api_status': 'active'
     })
 
+@app.route('/api/system/metrics', methods=['GET'])
+def get_system_metrics():
+    """获取运行时性能指标"""
+    try:
+        from utils.http_session_pool import http_session_pool
+        from services.async_llm_client import async_llm_client
+        from utils.llm_response_cache import llm_response_cache
+        from utils.sqlite_pool import sqlite_pool
+        from utils.database_operations import category_template_cache
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'http_pool': http_session_pool.get_stats(),
+                'async_llm': async_llm_client.get_stats(),
+                'job_queue': job_queue_service.get_stats(),
+                'llm_response_cache': llm_response_cache.get_stats(),
+                'classification_cache': classification_service.result_cache.get_stats(),
+                'local_classifier': classification_service.local_classifier.get_stats(),
+                'dimension_weights': evaluation_service.weight_registry.get_stats(),
+                'sqlite_pool': sqlite_pool.get_stats(),
+                'category_templates': category_template_cache.get_stats(),
+                'stats_rollup': evaluation_stats_rollup.get_stats(),
+                'classification_history_writer': classification_history_writer.get_stats()
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"获取运行时指标失败: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/variable-info', methods=['GET'])
 def get_variable_info():
     """获取可用变量信息"""
@@ -123,124 +169,32 @@ def evaluate():
         model_answer = data['model_answer']
         reference_answer = data.get('reference_answer', '')  # 参考答案，可选
         question_time = data.get('question_time', datetime.now().isoformat())
-        evaluation_criteria = data.get('evaluation_criteria', '请评估答案的准确性、相关性和有用性')
+        evaluation_criteria = data.get('evaluation_criteria', DEFAULT_EVALUATION_CRITERIA)
         scoring_prompt = data.get('scoring_prompt')  # 自定义的评分prompt
         uploaded_images = data.get('uploaded_images', [])  # 上传的图片信息
         
         logger.info(f"开始评估 - 用户问题长度: {len(user_input)}, 模型回答长度: {len(model_answer)}, 参考答案长度: {len(reference_answer)}, 问题时间: {question_time}, 评估标准长度: {len(evaluation_criteria)}, 图片数量: {len(uploaded_images)}")
         
-        # 首先进行分类
-        classification_result = classification_service.classify_user_input(user_input)
-        logger.info(f"分类结果: {classification_result.get('level1', 'N/A')} -> {classification_result.get('level2', 'N/A')} -> {classification_result.get('level3', 'N/A')}")
-        
-        # 获取分类对应的新维度体系评估标准
-        new_evaluation_criteria = None
-        if classification_result and classification_result.get('level2'):
-            try:
-                import sys
-                import os
-                sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
-                from database_operations import db_ops
-                template_result = db_ops.format_for_evaluation_template(classification_result.get('level2'))
-                if template_result['success'] and template_result['data']:
-                    template_data = template_result['data']
-                    # 构建基于新维度体系的评估标准
-                    criteria_parts = []
-                    for dimension in template_data.get('dimensions', []):
-                        dim_name = dimension.get('name')
-                        reference_standard = dimension.get('reference_standard')
-                        scoring_principle = dimension.get('scoring_principle')
-                        max_score = dimension.get('max_score', 2)
-                        
-                        criteria_parts.append(f"{dim_name}（最高{max_score}分）：\n定义：{reference_standard}\n评分原则：{scoring_principle}")
-                    
-                    if criteria_parts:
-                        new_evaluation_criteria = "\n\n".join(criteria_parts)
-                        logger.info(f"使用新维度体系评估标准，包含 {len(template_data.get('dimensions', []))} 个维度")
-            except Exception as e:
-                logger.warning(f"获取新维度体系评估标准失败，将使用默认标准: {str(e)}")
-        
-        # 如果有新的评估标准，使用新标准；否则使用原评估标准
-        if new_evaluation_criteria:
-            evaluation_criteria = new_evaluation_criteria
-        
-        # 选择prompt模板：优先使用自定义的scoring_prompt，否则使用分类对应的prompt_template
-        if scoring_prompt:
-            prompt_template = scoring_prompt
-            logger.info("使用自定义的scoring_prompt作为评估模板")
-        else:
-            prompt_template = classification_service.get_prompt_template_by_classification(classification_result)
-            logger.info("使用分类对应的prompt_template作为评估模板")
-        
-        # 调用评估服务
-        result = evaluation_service.evaluate_response(
-            user_query=user_input,
-            model_response=model_answer,
-            reference_answer=reference_answer,
-            scoring_prompt=prompt_template,
-            question_time=question_time,
-            evaluation_criteria=evaluation_criteria
-        )
-        
-        # 计算加权平均总分
-        if result.get('dimensions') and classification_result and classification_result.get('level2'):
-            try:
-                weighted_score = evaluation_service.calculate_weighted_score(
-                    result['dimensions'], 
-                    classification_result['level2']
-                )
-                result['score'] = weighted_score / 10.0  # 转换为10分制显示，但内部存储为百分比
-                result['weighted_score'] = weighted_score  # 保存百分比形式的分数
-                logger.info(f"计算加权平均分数: {weighted_score:.2f}% -> 显示分数: {result['score']:.2f}/10")
-            except Exception as e:
-                logger.error(f"计算加权平均分数失败: {str(e)}")
-                # 使用原有分数作为备用
-        
-        # 添加分类信息到评估结果
-        if classification_result:
-            result['classification'] = classification_result
-        
-        # 添加模型使用信息
-        result['model_used'] = 'deepseek-chat'  # 记录使用的模型
-        
-        # AI自动判断是否为badcase（基于分数阈值）
-        ai_badcase_threshold = 50.0  # 低于50%认为是badcase
-        result['ai_is_badcase'] = (result.get('weighted_score', 100.0) < ai_badcase_threshold)
-        
-        # 保存评估结果到历史记录
-        try:
-            # 准备保存的数据
-            save_data = {
-                'user_input': user_input,
-                'model_answer': model_answer,
-                'reference_answer': reference_answer,
-                'question_time': question_time,
-                'evaluation_criteria_used': evaluation_criteria,
-                'score': result.get('weighted_score', result.get('score', 0)) / 10.0,  # 保存为10分制
-                'dimensions': result.get('dimensions', {}),
-                'reasoning': result.get('reasoning'),
-                'evaluation_time_seconds': result.get('evaluation_time_seconds'),
-                'model_used': result.get('model_used'),
-                'raw_response': result.get('raw_response'),
-                'uploaded_images': uploaded_images,  # 添加图片信息
-                'ai_is_badcase': result.get('ai_is_badcase', False),  # AI判断的badcase
-                'is_badcase': result.get('ai_is_badcase', False)  # 初始设置为AI判断结果
-            }
-            
-            # 保存到历史记录
-            save_result = evaluation_history_service.save_evaluation_result(
-                save_data, classification_result
-            )
-            
-            if save_result['success']:
-                logger.info(f"评估结果已保存到历史记录，ID: {save_result['history_id']}")
-                result['history_id'] = save_result['history_id']
-            else:
-                logger.warning(f"保存评估历史失败: {save_result['message']}")
-                
-        except Exception as save_error:
-            logger.error(f"保存评估历史时发生错误: {str(save_error)}")
-            # 不影响评估结果的返回
+        evaluation_request = {
+            'user_input': user_input,
+            'model_answer': model_answer,
+            'reference_answer': reference_answer,
+            'question_time': question_time,
+            'evaluation_criteria': evaluation_criteria,
+            'scoring_prompt': scoring_prompt,
+            'uploaded_images': uploaded_images,
+            'category': data.get('category'),  # 客户端已知的二级分类（可选）
+            'defer_history_save': data.get('defer_history_save'),  # 是否延后保存历史记录（可选）
+            'bypass_cache': data.get('bypass_cache', False)  # 是否跳过LLM响应缓存（可选）
+        }
+        
+        # 异步模式：提交后台任务后立即返回任务ID，通过 /api/jobs/<job_id>/result 获取评估结果
+        if request.args.get('async', 'false').lower() == 'true':
+            submit_result = job_queue_service.submit('evaluate', evaluation_request)
+            return jsonify(submit_result), 202 if submit_result['success'] else 500
+        
+        # 分阶段执行：分类、评估标准查询、LLM评估按依赖关系并发，历史记录在响应返回后写入
+        result = evaluation_pipeline.run(evaluation_request)
         
         logger.info(f"评估完成，总分: {result.get('score', 0)}")
         return jsonify(result)
@@ -250,6 +204,58 @@ def evaluate():
         logger.error(f"错误追踪: {traceback.format_exc()}")
         return jsonify({'error': f'评估过程中发生错误: {str(e)}'}), 500
 
+@app.route('/api/evaluate/batch', methods=['POST'])
+def evaluate_batch():
+    """批量评估问答质量"""
+    try:
+        data = request.get_json() or {}
+        items = data.get('items')
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': '缺少必需字段: items（非空列表）'}), 400
+        if len(items) > evaluation_pipeline.batch_max_items:
+            return jsonify({'error': f'单次批量评估最多 {evaluation_pipeline.batch_max_items} 条数据'}), 400
+        
+        logger.info(f"收到批量评估请求，共 {len(items)} 条")
+        
+        # 批次级别的默认值，单条数据中的同名字段优先
+        default_criteria = data.get('evaluation_criteria', DEFAULT_EVALUATION_CRITERIA)
+        default_scoring_prompt = data.get('scoring_prompt')
+        
+        valid_items = []
+        invalid_results = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('user_input') or not item.get('model_answer'):
+                invalid_results.append({'index': index, 'success': False, 'error': '缺少必需字段: user_input, model_answer'})
+                continue
+            valid_items.append((index, {
+                'user_input': item['user_input'],
+                'model_answer': item['model_answer'],
+                'reference_answer': item.get('reference_answer', ''),
+                'question_time': item.get('question_time', datetime.now().isoformat()),
+                'evaluation_criteria': item.get('evaluation_criteria', default_criteria),
+                'scoring_prompt': item.get('scoring_prompt', default_scoring_prompt),
+                'uploaded_images': item.get('uploaded_images', []),
+                'category': item.get('category'),
+                'bypass_cache': item.get('bypass_cache', data.get('bypass_cache', False))
+            }))
+        
+        batch_result = evaluation_pipeline.run_batch([item for _, item in valid_items])
+        
+        # 将结果序号映射回原始请求中的位置
+        for (original_index, _), item_result in zip(valid_items, batch_result['results']):
+            item_result['index'] = original_index
+        batch_result['results'] = sorted(batch_result['results'] + invalid_results, key=lambda r: r['index'])
+        batch_result['total'] = len(items)
+        batch_result['failed'] += len(invalid_results)
+        
+        return jsonify(batch_result)
+        
+    except Exception as e:
+        logger.error(f"批量评估过程中发生错误: {str(e)}")
+        logger.error(f"错误追踪: {traceback.format_exc()}")
+        return jsonify({'error': f'批量评估过程中发生错误: {str(e)}'}), 500
+
 @app.route('/api/classify', methods=['POST'])
 def classify():
     """分类用户输入"""
@@ -489,10 +495,7 @@ def get_evaluation_template(category):
         
         # 优先使用新的标准配置服务
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
-            from database_operations import db_ops
+            from utils.database_operations import db_ops
             result = db_ops.format_for_evaluation_template(category)
             if result['success']:
                 logger.info(f"使用新标准配置获取评估模板成功: {category}")
@@ -522,6 +525,26 @@ def get_evaluation_template(category):
 
 # ==================== 新增：评估历史管理API ==================== 
 
+# 列表视图中长文本字段的默认截断长度
+HISTORY_PREVIEW_LENGTH = int(os.getenv('HISTORY_PREVIEW_LENGTH', '200'))
+
+def parse_history_projection_args():
+    """
+    解析历史列表的字段投影参数
+
+    fields 未指定时返回紧凑的列表视图；fields=all 返回完整记录（不截断）；
+    否则只返回指定字段。preview_length 指定长文本截断长度（0 表示不截断）
+
+    Returns:
+        tuple: (字段列表或None, 截断长度)
+    """
+    raw_fields = request.args.get('fields')
+    preview_length = request.args.get('preview_length', HISTORY_PREVIEW_LENGTH, type=int)
+    if raw_fields == 'all':
+        return None, None
+    fields = EvaluationHistory.resolve_fields(raw_fields or EvaluationHistory.LIST_FIELDS)
+    return fields, preview_length or None
+
 @app.route('/api/evaluation-history', methods=['GET'])
 def get_evaluation_history():
     """获取评估历史记录（分页）"""
@@ -534,8 +557,14 @@ def get_evaluation_history():
         classification_level2 = request.args.get('classification_level2')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        sort_by = request.args.get('sort_by', 'created_at')
+        # q: 全文检索词，检索时默认按相关度排序
+        search_query = request.args.get('q', '').strip() or None
+        sort_by = request.args.get('sort_by', 'relevance' if search_query else 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        # 传入cursor参数（可为空字符串表示第一页）时使用游标分页；include_total=false 时不统计总数
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
+        fields, preview_length = parse_history_projection_args()
         
         # 调用服务获取历史记录
         result = evaluation_history_service.get_evaluation_history(
@@ -545,7 +574,12 @@ def get_evaluation_history():
             start_date=start_date,
             end_date=end_date,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor,
+            include_total=include_total,
+            fields=fields,
+            preview_length=preview_length,
+            search_query=search_query
         )
         
         return jsonify(result)
@@ -681,12 +715,21 @@ def get_badcase_records():
         per_page = request.args.get('per_page', 20, type=int)
         badcase_type = request.args.get('badcase_type')  # 'ai', 'human', 'all'
         classification_level2 = request.args.get('classification_level2')
+        search_query = request.args.get('q', '').strip() or None  # 全文检索词
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
+        fields, preview_length = parse_history_projection_args()
         
         result = evaluation_history_service.get_badcase_records(
             page=page,
             per_page=per_page,
             badcase_type=badcase_type,
-            classification_level2=classification_level2
+            classification_level2=classification_level2,
+            cursor=cursor,
+            include_total=include_total,
+            fields=fields,
+            preview_length=preview_length,
+            search_query=search_query
         )
         
         return jsonify(result)
@@ -714,6 +757,52 @@ def get_badcase_reasons_by_category(category):
         logger.error(f"获取badcase原因失败: {str(e)}")
         return jsonify({'error': f'获取badcase原因失败: {str(e)}'}), 500
 
+def run_badcase_summary(category):
+    """
+    获取分类的人工评估badcase原因并调用AI总结（同步接口和后台任务共用）
+    
+    Returns:
+        tuple: (总结结果, HTTP状态码)
+    """
+    # 首先获取该分类的人工评估badcase原因（用于AI总结）
+    logger.info(f"📋 第一步: 获取分类 {category} 的人工评估badcase原因")
+    reasons_result = evaluation_history_service.get_badcase_reasons_by_category(category, reason_type='human')
+    
+    if not reasons_result['success']:
+        logger.warning(f"⚠️  获取badcase原因失败: {reasons_result.get('message', '未知错误')}")
+        return reasons_result, 400
+    
+    # 检查是否有足够的人工评估原因进行总结
+    reasons_data = reasons_result['data']
+    logger.info(f"📊 获取到的原因数据:")
+    logger.info(f"   - 总badcase记录数: {reasons_data.get('total_badcases', 0)}")
+    logger.info(f"   - 人工评估原因数: {len(reasons_data.get('reasons', []))}")
+    
+    if len(reasons_data['reasons']) == 0:
+        logger.warning(f"⚠️  分类 {category} 下没有人工评估的badcase原因可供总结")
+        return {
+            'success': False,
+            'message': f'分类 {category} 下没有人工评估的badcase原因可供总结'
+        }, 400
+    
+    # 显示原因详情
+    logger.info(f"📝 人工评估原因详情:")
+    for i, reason in enumerate(reasons_data['reasons'][:5], 1):  # 只显示前5条
+        logger.info(f"   {i}. [记录#{reason.get('record_id', '未知')}] {reason.get('reason', '无原因')[:100]}...")
+    
+    if len(reasons_data['reasons']) > 5:
+        logger.info(f"   ... 还有 {len(reasons_data['reasons']) - 5} 条原因")
+    
+    # 导入AI总结服务
+    logger.info(f"🤖 第二步: 启动AI总结服务")
+    from services.ai_summary_service import ai_summary_service
+    
+    # 调用AI总结服务
+    logger.info(f"🚀 第三步: 开始调用AI总结分析...")
+    summary_result = ai_summary_service.summarize_badcase_reasons(category, reasons_data)
+    
+    return summary_result, 200
+
 @app.route('/api/badcase-summary/<category>', methods=['POST'])
 def generate_badcase_summary(category):
     """生成指定分类的badcase AI总结"""
@@ -726,42 +815,14 @@ def generate_badcase_summary(category):
         logger.info(f"   - 请求时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info(f"   - 客户端IP: {request.remote_addr}")
         
-        # 首先获取该分类的人工评估badcase原因（用于AI总结）
-        logger.info(f"📋 第一步: 获取分类 {category} 的人工评估badcase原因")
-        reasons_result = evaluation_history_service.get_badcase_reasons_by_category(category, reason_type='human')
-        
-        if not reasons_result['success']:
-            logger.warning(f"⚠️  获取badcase原因失败: {reasons_result.get('message', '未知错误')}")
-            return jsonify(reasons_result), 400
-        
-        # 检查是否有足够的人工评估原因进行总结
-        reasons_data = reasons_result['data']
-        logger.info(f"📊 获取到的原因数据:")
-        logger.info(f"   - 总badcase记录数: {reasons_data.get('total_badcases', 0)}")
-        logger.info(f"   - 人工评估原因数: {len(reasons_data.get('reasons', []))}")
-        
-        if len(reasons_data['reasons']) == 0:
-            logger.warning(f"⚠️  分类 {category} 下没有人工评估的badcase原因可供总结")
-            return jsonify({
-                'success': False,
-                'message': f'分类 {category} 下没有人工评估的badcase原因可供总结'
-            }), 400
-        
-        # 显示原因详情
-        logger.info(f"📝 人工评估原因详情:")
-        for i, reason in enumerate(reasons_data['reasons'][:5], 1):  # 只显示前5条
-            logger.info(f"   {i}. [记录#{reason.get('record_id', '未知')}] {reason.get('reason', '无原因')[:100]}...")
-        
-        if len(reasons_data['reasons']) > 5:
-            logger.info(f"   ... 还有 {len(reasons_data['reasons']) - 5} 条原因")
+        # 异步模式：提交后台任务后立即返回任务ID
+        if request.args.get('async', 'false').lower() == 'true':
+            submit_result = job_queue_service.submit('badcase_summary', {'category': category})
+            return jsonify(submit_result), 202 if submit_result['success'] else 500
         
-        # 导入AI总结服务
-        logger.info(f"🤖 第二步: 启动AI总结服务")
-        from services.ai_summary_service import ai_summary_service
-        
-        # 调用AI总结服务
-        logger.info(f"🚀 第三步: 开始调用AI总结分析...")
-        summary_result = ai_summary_service.summarize_badcase_reasons(category, reasons_data)
+        summary_result, status_code = run_badcase_summary(category)
+        if status_code != 200:
+            return jsonify(summary_result), status_code
         
         # 计算处理时间
         request_end_time = time.time()
@@ -815,6 +876,46 @@ def update_dimension_weights(category):
         logger.error(f"更新维度权重失败: {e}")
         return jsonify({'error': str(e)}), 500
 
+# ==================== 后台任务 ==================== 
+
+def handle_evaluate_job(payload):
+    """后台任务：评估问答质量（任务完成时历史记录已保存，结果中包含history_id）"""
+    payload = dict(payload, defer_history_save=False)
+    return evaluation_pipeline.run(payload)
+
+def handle_badcase_summary_job(payload):
+    """后台任务：生成badcase AI总结，AI调用失败时抛出异常以便重试"""
+    summary_result, status_code = run_badcase_summary(payload['category'])
+    if status_code != 200:
+        raise NonRetryableJobError(summary_result.get('message', '生成badcase总结失败'))
+    if not summary_result.get('success'):
+        raise Exception(summary_result.get('message', 'AI总结失败'))
+    return summary_result
+
+job_queue_service.register_handler('evaluate', handle_evaluate_job)
+job_queue_service.register_handler('badcase_summary', handle_badcase_summary_job)
+
+# 数据库迁移和后台任务worker只在提供服务的进程中启动（见文件末尾的入口），
+# 导入本模块的维护脚本不会迁移数据库，也不会领取后台任务；
+# 使用其它WSGI服务器时，在主进程启动时调用 migrate_database()，在每个worker进程中调用 start_job_workers()
+# （如 gunicorn 的 on_starting / post_fork 钩子）
+
+def migrate_database():
+    """对已有数据库执行结构迁移并同步索引（create_all不会修改已存在的表）"""
+    if os.getenv('DB_AUTO_MIGRATE', 'true').lower() != 'true':
+        return
+    with app.app_context():
+        try:
+            from database.migrations import upgrade as upgrade_database
+            upgrade_database(db.engine)
+        except Exception as e:
+            logger.error(f"数据库迁移失败: {e}")
+
+def start_job_workers():
+    """启动后台任务worker"""
+    if os.getenv('JOB_WORKERS_ENABLED', 'true').lower() == 'true':
+        job_queue_service.start()
+
 # ==================== 错误处理 ==================== 
 
 # ==================== AI助手API ==================== 
@@ -879,10 +980,7 @@ def get_categories():
 def get_all_category_standards():
     """获取所有分类的标准配置"""
     try:
-        import sys
-        import os
-        sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
-        from database_operations import db_ops
+        from utils.database_operations import db_ops
         result = db_ops.get_all_category_standards()
         return jsonify(result)
     except Exception as e:
@@ -896,10 +994,7 @@ def get_all_category_standards():
 def get_category_standards(category):
     """获取指定分类的标准配置"""
     try:
-        import sys
-        import os
-        sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
-        from database_operations import db_ops
+        from utils.database_operations import db_ops
         result = db_ops.get_category_standards(category)
         return jsonify(result)
     except Exception as e:
@@ -927,10 +1022,7 @@ def save_category_standards(category):
                 'message': 'dimension_ids必须是数组格式'
             }), 400
         
-        import sys
-        import os
-        sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
-        from database_operations import db_ops
+        from utils.database_operations import db_ops
         result = db_ops.save_category_standards(category, dimension_ids)
         
         status_code = 200 if result['success'] else 500
@@ -959,6 +1051,11 @@ if __name__ == '__main__':
     print_config_info()
     logger.info(f"启动问答评估服务 - {config.ENVIRONMENT}环境...")
     
+    migrate_database()
+    # debug模式下reloader的监控进程不启动worker，只在实际提供服务的进程中启动
+    if not config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_job_workers()
+    
     app.run(
         host=config.HOST, 
         port=config.PORT, 
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+SQLite读写并发基准测试
+在临时数据库上模拟评估历史的并发访问：多个读线程反复执行历史列表/badcase列表/记录详情查询，
+同时写线程持续执行人工评估更新和批量保存，对比不同PRAGMA配置下的读吞吐和读延迟
+
+用法:
+    python benchmark_sqlite_contention.py
+    python benchmark_sqlite_contention.py --readers 8 --writers 2 --duration 10
+    python benchmark_sqlite_contention.py --profiles rollback,production
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 添加当前目录到Python路径，确保可以导入模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from config import LocalConfig, ProductionConfig
+from models.classification import EvaluationHistory
+from utils.sqlite_engine import configure_sqlite_engine
+
+# 参与对比的PRAGMA配置：rollback 为SQLite默认的回滚日志模式（未启用本配置层时的行为）
+PROFILES = {
+    'rollback': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 30000},
+    'local': LocalConfig.SQLITE_PRAGMAS,
+    'production': ProductionConfig.SQLITE_PRAGMAS,
+}
+
+# 与历史列表、badcase列表、记录详情接口结构一致的读查询（一次"读"依次执行这三个查询）
+LIST_QUERY = text(
+    'SELECT id, user_input, total_score, classification_level2, is_badcase, created_at '
+    'FROM evaluation_history ORDER BY created_at DESC, id DESC LIMIT 20'
+)
+BADCASE_QUERY = text(
+    'SELECT id, user_input, total_score, classification_level2, badcase_reason, created_at '
+    'FROM evaluation_history WHERE is_badcase = 1 ORDER BY created_at DESC, id DESC LIMIT 20'
+)
+DETAIL_QUERY = text('SELECT * FROM evaluation_history WHERE id = :id')
+
+CATEGORIES = ['选股', '个股分析', '大盘行业分析', '宏观经济分析', '信息查询']
+
+
+def _row(index, created_at):
+    return {
+        'user_input': f'基准测试问题 {index} ' + '问' * 100,
+        'model_answer': '答' * 2000,
+        'total_score': random.uniform(0, 10),
+        'dimensions_json': '{"数据准确性": 3, "逻辑性": 2}',
+        'reasoning': '理由' * 200,
+        'classification_level2': random.choice(CATEGORIES),
+        'is_badcase': random.random() < 0.2,
+        'ai_is_badcase': False,
+        'human_is_badcase': False,
+        'is_human_modified': False,
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+
+def _prepare_database(path, profile, rows):
+    engine = create_engine(f'sqlite:///{path}')
+    configure_sqlite_engine(engine, profile)
+    EvaluationHistory.__table__.create(engine)
+    start = datetime.utcnow() - timedelta(days=30)
+    with engine.begin() as conn:
+        conn.execute(EvaluationHistory.__table__.insert(), [
+            _row(index, start + timedelta(seconds=index * 10)) for index in range(rows)
+        ])
+    return engine
+
+
+def _percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def run_profile(name, profile, args, work_dir):
+    """运行一个PRAGMA配置的读写并发测试"""
+    random.seed(42)
+    path = os.path.join(work_dir, f'{name}.db')
+    engine = _prepare_database(path, profile, args.rows)
+    engine.dispose()
+    # 每个线程独占一个连接
+    engine = create_engine(f'sqlite:///{path}', pool_size=args.readers + args.writers, max_overflow=0)
+    configure_sqlite_engine(engine, profile)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_latencies = []
+    write_latencies = []
+    errors = {'read': 0, 'write': 0}
+
+    def reader():
+        latencies = []
+        with engine.connect() as conn:
+            while not stop.is_set():
+                began = time.perf_counter()
+                try:
+                    conn.execute(LIST_QUERY).fetchall()
+                    conn.execute(BADCASE_QUERY).fetchall()
+                    conn.execute(DETAIL_QUERY, {'id': random.randint(1, args.rows)}).fetchall()
+                    # 结束读事务，下次查询读取最新数据
+                    conn.rollback()
+                    latencies.append(time.perf_counter() - began)
+                except OperationalError:
+                    conn.rollback()
+                    with lock:
+                        errors['read'] += 1
+        with lock:
+            read_latencies.extend(latencies)
+
+    def writer():
+        latencies = []
+        index = args.rows
+        with engine.connect() as conn:
+            while not stop.is_set():
+                began = time.perf_counter()
+                try:
+                    # 人工评估更新 + 一批新评估结果，在一个事务中提交
+                    conn.execute(text(
+                        'UPDATE evaluation_history SET human_total_score = :score, human_reasoning = :reasoning, '
+                        'is_human_modified = 1, updated_at = :now WHERE id = :id'
+                    ), {'score': random.uniform(0, 10), 'reasoning': '人工' * 100,
+                        'now': datetime.utcnow(), 'id': random.randint(1, args.rows)})
+                    conn.execute(EvaluationHistory.__table__.insert(), [
+                        _row(index + offset, datetime.utcnow()) for offset in range(args.write_batch)
+                    ])
+                    index += args.write_batch
+                    if args.write_hold_ms:
+                        time.sleep(args.write_hold_ms / 1000.0)
+                    conn.commit()
+                    latencies.append(time.perf_counter() - began)
+                except OperationalError:
+                    conn.rollback()
+                    with lock:
+                        errors['write'] += 1
+                if args.write_interval_ms:
+                    time.sleep(args.write_interval_ms / 1000.0)
+        with lock:
+            write_latencies.extend(latencies)
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql('PRAGMA journal_mode').scalar()
+    engine.dispose()
+
+    return {
+        'profile': name,
+        'journal_mode': journal_mode,
+        'reads_per_second': len(read_latencies) / args.duration,
+        'read_p50_ms': _percentile(read_latencies, 50) * 1000,
+        'read_p95_ms': _percentile(read_latencies, 95) * 1000,
+        'read_p99_ms': _percentile(read_latencies, 99) * 1000,
+        'read_max_ms': max(read_latencies, default=0.0) * 1000,
+        'writes_per_second': len(write_latencies) / args.duration,
+        'write_p95_ms': _percentile(write_latencies, 95) * 1000,
+        'read_errors': errors['read'],
+        'write_errors': errors['write'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite读写并发基准测试')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help=f'要对比的配置，可选: {", ".join(PROFILES)}')
+    parser.add_argument('--rows', type=int, default=20000, help='初始评估记录数')
+    parser.add_argument('--readers', type=int, default=4, help='读线程数')
+    parser.add_argument('--writers', type=int, default=1, help='写线程数')
+    parser.add_argument('--duration', type=float, default=5.0, help='每个配置的测试时长（秒）')
+    parser.add_argument('--write-batch', type=int, default=20, help='每个写事务新增的记录数')
+    parser.add_argument('--write-hold-ms', type=float, default=5.0, help='写事务提交前的处理耗时（毫秒）')
+    parser.add_argument('--write-interval-ms', type=float, default=0.0, help='写事务之间的间隔（毫秒）')
+    parser.add_argument('--work-dir', help='临时数据库目录（默认使用系统临时目录，测试后删除）')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.profiles.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PROFILES]
+    if unknown:
+        parser.error(f'未知的配置: {", ".join(unknown)}')
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='sqlite_contention_')
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"🧪 SQLite读写并发基准测试: {args.readers} 读线程, {args.writers} 写线程, "
+          f"每个配置 {args.duration} 秒, 初始 {args.rows} 条记录")
+
+    results = []
+    try:
+        for name in names:
+            print(f"\n▶️  {name}: {PROFILES[name]}")
+            result = run_profile(name, PROFILES[name], args, work_dir)
+            results.append(result)
+            print(f"   读: {result['reads_per_second']:.0f} 次/秒, p50 {result['read_p50_ms']:.1f}ms, "
+                  f"p95 {result['read_p95_ms']:.1f}ms, p99 {result['read_p99_ms']:.1f}ms, "
+                  f"最大 {result['read_max_ms']:.1f}ms, 失败 {result['read_errors']}")
+            print(f"   写: {result['writes_per_second']:.0f} 次/秒, p95 {result['write_p95_ms']:.1f}ms, "
+                  f"失败 {result['write_errors']}")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n📊 汇总")
+    print(f"{'配置':<12}{'日志模式':<10}{'读/秒':>10}{'读p95(ms)':>12}{'读p99(ms)':>12}{'写/秒':>10}")
+    for result in results:
+        print(f"{result['profile']:<12}{result['journal_mode']:<10}{result['reads_per_second']:>10.0f}"
+              f"{result['read_p95_ms']:>12.1f}{result['read_p99_ms']:>12.1f}{result['writes_per_second']:>10.0f}")
+    baseline = next((result for result in results if result['profile'] == 'rollback'), None)
+    if baseline and baseline['reads_per_second']:
+        for result in results:
+            if result is not baseline:
+                print(f"   {result['profile']} 读吞吐为 rollback 的 "
+                      f"{result['reads_per_second'] / baseline['reads_per_second']:.1f} 倍")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
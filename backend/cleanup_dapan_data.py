@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
+import os
 import sqlite3
 from datetime import datetime
 
+from database.migrations import rebuild_stats_for_path, sqlite_table_exists
+
+DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'qa_evaluation.db')
+
+# 按 history_id 关联评估历史的子表（由迁移创建，旧数据库中可能还不存在）
+HISTORY_CHILD_TABLES = ['evaluation_dimension_scores', 'evaluation_raw_responses']
+
+def delete_history(cursor, condition):
+    """删除满足条件的评估历史及其子表记录，返回删除的评估历史条数"""
+    for table in HISTORY_CHILD_TABLES:
+        if sqlite_table_exists(cursor, table):
+            cursor.execute(f"DELETE FROM {table} WHERE history_id IN (SELECT id FROM evaluation_history WHERE {condition})")
+    cursor.execute(f"DELETE FROM evaluation_history WHERE {condition}")
+    return cursor.rowcount
+
 def cleanup_dapan_data():
     """删除数据库中大盘行业分析和宏观经济分析的记录"""
-    conn = sqlite3.connect('database/qa_evaluation.db')
+    conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
     
     # 获取删除前的统计
@@ -24,14 +40,13 @@ def cleanup_dapan_data():
     # 执行删除操作
     try:
         # 删除大盘行业分析的所有记录
-        cursor.execute("DELETE FROM evaluation_history WHERE classification_level1 = '大盘行业分析'")
-        deleted_dapan = cursor.rowcount
+        deleted_dapan = delete_history(cursor, "classification_level1 = '大盘行业分析'")
         
         # 删除可能的宏观经济分析记录
-        cursor.execute("DELETE FROM evaluation_history WHERE classification_level2 = '宏观经济分析'")
-        deleted_hongkuan = cursor.rowcount
+        deleted_hongkuan = delete_history(cursor, "classification_level2 = '宏观经济分析'")
         
         conn.commit()
+        rebuild_stats_for_path(DATABASE_PATH)
         print(f"\n删除操作完成:")
         print(f"  删除大盘行业分析记录: {deleted_dapan} 条")
         print(f"  删除宏观经济分析记录: {deleted_hongkuan} 条")
@@ -4,24 +4,34 @@
 """
 
 from app import app
-from models.classification import EvaluationHistory, db
+from models.classification import EvaluationHistory, EvaluationDimensionScore, db
+from services.evaluation_history_service import evaluation_history_service
 from datetime import datetime
+from sqlalchemy import func
+
+
+def duplicate_hashes_query(since=None):
+    """出现多次的内容哈希（子查询），since 指定时只统计该时间之后创建的记录"""
+    query = db.session.query(EvaluationHistory.content_hash).filter(
+        EvaluationHistory.content_hash.isnot(None)
+    )
+    if since is not None:
+        query = query.filter(EvaluationHistory.created_at >= since)
+    return query.group_by(EvaluationHistory.content_hash).having(func.count(EvaluationHistory.id) > 1)
 
 def clean_duplicate_records():
     with app.app_context():
         print("🧹 开始清理重复记录...")
         
-        # 获取所有记录
-        all_records = EvaluationHistory.query.all()
-        print(f"📊 总记录数: {len(all_records)}")
+        total_records = EvaluationHistory.query.count()
+        print(f"📊 总记录数: {total_records}")
         
-        # 按内容分组
+        # 按内容哈希分组（与保存时的重复检测使用同一哈希，走 content_hash 索引）
         content_groups = {}
-        for record in all_records:
-            key = f"{record.user_input}|||{record.model_answer}"
-            if key not in content_groups:
-                content_groups[key] = []
-            content_groups[key].append(record)
+        for record in EvaluationHistory.query.filter(
+            EvaluationHistory.content_hash.in_(duplicate_hashes_query())
+        ).order_by(EvaluationHistory.id):
+            content_groups.setdefault(record.content_hash, []).append(record)
         
         # 找出重复组
         duplicate_groups = {k: v for k, v in content_groups.items() if len(v) > 1}
@@ -48,6 +58,7 @@ def clean_duplicate_records():
                 if delete_record.is_human_modified and not keep_record.is_human_modified:
                     keep_record.human_total_score = delete_record.human_total_score
                     keep_record.human_dimensions_json = delete_record.human_dimensions_json
+                    evaluation_history_service.sync_dimension_scores(keep_record, EvaluationDimensionScore.SOURCE_HUMAN)
                     keep_record.human_reasoning = delete_record.human_reasoning
                     keep_record.human_evaluation_by = delete_record.human_evaluation_by
                     keep_record.human_evaluation_time = delete_record.human_evaluation_time
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
+import os
 import sqlite3
 import json
 from datetime import datetime
 
+from database.migrations import rebuild_stats_for_path, sqlite_table_exists
+
+DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'qa_evaluation.db')
+
 def clear_ai_evaluations():
     """清零所有历史记录的AI评估结果"""
     
-    database_path = 'database/qa_evaluation.db'
+    database_path = DATABASE_PATH
     
     try:
         conn = sqlite3.connect(database_path)
@@ -95,6 +100,11 @@ def clear_ai_evaluations():
         
         print(f"✓ 已更新 {updated_count} 条记录的维度评分")
         
+        # 同步规范化的维度得分表
+        if sqlite_table_exists(cursor, 'evaluation_dimension_scores'):
+            cursor.execute("UPDATE evaluation_dimension_scores SET score = 0.0 WHERE source = 'ai'")
+            print("✓ 已清零规范化维度得分表中的AI评分")
+        
         # 5. 重新计算综合badcase状态（基于人工评估）
         cursor.execute("""
             UPDATE evaluation_history 
@@ -109,14 +119,20 @@ def clear_ai_evaluations():
         cursor.execute("""
             UPDATE evaluation_history 
             SET model_used = 'deepseek-chat',
-                evaluation_time_seconds = 0.0,
-                raw_response = ''
+                evaluation_time_seconds = 0.0
         """)
+        # 原始响应存放在 evaluation_raw_responses（旧数据库中仍在 evaluation_history.raw_response 列）
+        if sqlite_table_exists(cursor, 'evaluation_raw_responses'):
+            cursor.execute("DELETE FROM evaluation_raw_responses")
+        cursor.execute("PRAGMA table_info(evaluation_history)")
+        if 'raw_response' in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("UPDATE evaluation_history SET raw_response = NULL")
         print("✓ 已重置AI相关元数据")
         
         # 提交更改
         conn.commit()
         print("\n✅ 所有更改已提交到数据库")
+        rebuild_stats_for_path(database_path)
         
         # 验证结果
         cursor.execute("SELECT COUNT(*) FROM evaluation_history WHERE total_score > 0")
@@ -152,7 +168,7 @@ def clear_ai_evaluations():
 
 def show_statistics():
     """显示当前数据库统计"""
-    database_path = 'database/qa_evaluation.db'
+    database_path = DATABASE_PATH
     
     try:
         conn = sqlite3.connect(database_path)
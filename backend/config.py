@@ -13,6 +13,18 @@ class Config:
     # 数据库配置
     DATABASE_PATH = 'database/qa_evaluation.db'
     
+    # SQLite连接参数（每个新连接执行的PRAGMA，可用环境变量 SQLITE_PRAGMAS 覆盖部分参数）
+    # WAL模式下读请求不会被正在提交的写事务阻塞；synchronous=NORMAL 在WAL模式下只在检查点时fsync
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 30000,             # 等待写锁的最长时间（毫秒）
+        'cache_size': -20000,              # 页缓存大小，负数表示KB（约20MB）
+        'mmap_size': 67108864,             # 内存映射读取的大小（64MB）
+        'temp_store': 'MEMORY',
+        'journal_size_limit': 67108864     # 检查点后WAL文件保留的最大大小（64MB）
+    }
+    
     def __post_init__(self):
         """数据类初始化后设置数据库URI"""
         # 使用绝对路径确保数据库文件可以正确创建和访问
@@ -109,6 +121,13 @@ class ProductionConfig(Config):
     # 生产环境特定配置
     LOG_LEVEL = 'WARNING'
     
+    # 生产环境数据量更大：加大页缓存和内存映射
+    SQLITE_PRAGMAS = dict(
+        Config.SQLITE_PRAGMAS,
+        cache_size=-65536,                 # 约64MB
+        mmap_size=268435456                # 256MB
+    )
+    
     def __post_init__(self):
         """生产环境初始化"""
         super().__post_init__()
@@ -135,6 +154,7 @@ def print_config_info():
     print(f"🌐 API地址: {config.API_BASE_URL}")
     print(f"🖥️  前端地址: {config.FRONTEND_HOST}:{config.FRONTEND_PORT}")
     print(f"🔧 调试模式: {config.DEBUG}")
+    print(f"🗄️  SQLite参数: {config.SQLITE_PRAGMAS}")
     
 if __name__ == '__main__':
     print_config_info() 
\ No newline at end of file
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+数据库结构迁移工具
+按版本执行结构变更（记录在 schema_migrations 表中），并根据模型中声明的索引
+在线创建/重建/删除 evaluation_history 的索引；附带热点查询的执行计划检查，
+任何热点查询退化为全表扫描时检查失败
+
+用法:
+    python database/migrations.py upgrade   # 执行未应用的迁移并同步索引
+    python database/migrations.py check     # 检查热点查询的执行计划
+    python database/migrations.py status    # 查看迁移和索引状态
+    python database/migrations.py rebuild-stats  # 从评估历史全量重建统计汇总表
+    python database/migrations.py rebuild-search # 从评估历史重建全文索引
+    python database/migrations.py vacuum         # 整理数据库文件，回收迁移后释放的空间
+"""
+import os
+import re
+import sys
+import argparse
+from datetime import datetime
+
+# 添加父目录到Python路径，确保可以导入模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import create_engine, text
+
+from models.classification import (
+    EvaluationHistory, EvaluationDedupClaim, EvaluationDailyStat, EvaluationDimensionDailyStat,
+    EvaluationDimensionScore, EvaluationCriteriaText, EvaluationRawResponse
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 由本工具维护索引的表
+MANAGED_TABLES = [EvaluationHistory.__table__]
+# 本工具创建的索引名前缀，模型中已不再声明的同前缀索引会被删除
+MANAGED_INDEX_PREFIX = 'idx_eh_'
+
+
+# ==================== 版本化迁移 ====================
+
+def _add_content_hash_column(conn, batch_size=1000):
+    """为evaluation_history添加content_hash列并分批回填"""
+    columns = [row[1] for row in conn.exec_driver_sql('PRAGMA table_info(evaluation_history)')]
+    if 'content_hash' not in columns:
+        conn.exec_driver_sql('ALTER TABLE evaluation_history ADD COLUMN content_hash VARCHAR(64)')
+        logger.info("已添加 evaluation_history.content_hash 列")
+
+    total = 0
+    while True:
+        rows = conn.exec_driver_sql(
+            'SELECT id, user_input, model_answer, reference_answer FROM evaluation_history '
+            'WHERE content_hash IS NULL LIMIT ?', (batch_size,)
+        ).fetchall()
+        if not rows:
+            break
+        conn.exec_driver_sql(
+            'UPDATE evaluation_history SET content_hash = ? WHERE id = ?',
+            [(EvaluationHistory.compute_content_hash(row[1], row[2], row[3]), row[0]) for row in rows]
+        )
+        # 每批单独提交，避免长时间持有写锁
+        conn.commit()
+        total += len(rows)
+    if total:
+        logger.info(f"已回填 {total} 条记录的 content_hash")
+
+
+def _create_dedup_claims_table(conn):
+    """创建重复检测占位表 evaluation_dedup_claims"""
+    EvaluationDedupClaim.__table__.create(conn, checkfirst=True)
+
+
+def _create_stats_rollup_tables(conn):
+    """创建评估统计汇总表并从 evaluation_history 回填"""
+    from services.evaluation_stats_rollup import evaluation_stats_rollup
+    EvaluationDailyStat.__table__.create(conn, checkfirst=True)
+    EvaluationDimensionDailyStat.__table__.create(conn, checkfirst=True)
+    evaluation_stats_rollup.rebuild(conn)
+
+
+def _create_dimension_scores_table(conn, batch_size=1000):
+    """创建规范化维度得分表 evaluation_dimension_scores 并从维度评分JSON分批回填"""
+    EvaluationDimensionScore.__table__.create(conn, checkfirst=True)
+
+    # 回填时的满分取自评估标准配置（表不存在时留空）
+    max_scores = {}
+    if _table_exists(conn, 'evaluation_standards'):
+        for category, dimension, max_score in conn.exec_driver_sql(
+            'SELECT level2_category, dimension, max_score FROM evaluation_standards'
+        ):
+            max_scores[(category, dimension)] = max_score or 2
+
+    last_id = 0
+    total = 0
+    while True:
+        rows = conn.exec_driver_sql(
+            'SELECT id, classification_level2, dimensions_json, human_dimensions_json FROM evaluation_history '
+            'WHERE id > ? ORDER BY id LIMIT ?', (last_id, batch_size)
+        ).fetchall()
+        if not rows:
+            break
+        params = []
+        for history_id, category, dimensions_json, human_dimensions_json in rows:
+            for source, raw_value in (
+                (EvaluationDimensionScore.SOURCE_AI, dimensions_json),
+                (EvaluationDimensionScore.SOURCE_HUMAN, human_dimensions_json)
+            ):
+                for dimension, score in EvaluationDimensionScore.parse_scores(raw_value).items():
+                    params.append((history_id, source, dimension, score, max_scores.get((category, dimension))))
+        if params:
+            # 迁移期间服务写入的新记录已自带维度得分，不覆盖
+            conn.exec_driver_sql(
+                'INSERT OR IGNORE INTO evaluation_dimension_scores (history_id, source, dimension, score, max_score) '
+                'VALUES (?, ?, ?, ?, ?)', params
+            )
+        # 每批单独提交，避免长时间持有写锁
+        conn.commit()
+        last_id = rows[-1][0]
+        total += len(params)
+    if total:
+        logger.info(f"已回填 {total} 条维度得分")
+
+
+def _create_search_index(conn):
+    """创建评估历史全文索引 evaluation_history_fts 及同步触发器"""
+    from services.evaluation_search import evaluation_search
+    evaluation_search.create_index(conn)
+
+
+def _move_cold_columns(conn, batch_size=500):
+    """
+    将评估标准文本去重移入 evaluation_criteria_texts、原始LLM响应压缩移入 evaluation_raw_responses，
+    并清空 evaluation_history 中的旧列（旧列保留在表结构中，不再被读写）
+    """
+    EvaluationCriteriaText.__table__.create(conn, checkfirst=True)
+    EvaluationRawResponse.__table__.create(conn, checkfirst=True)
+    columns = [row[1] for row in conn.exec_driver_sql('PRAGMA table_info(evaluation_history)')]
+    if 'criteria_hash' not in columns:
+        conn.exec_driver_sql('ALTER TABLE evaluation_history ADD COLUMN criteria_hash VARCHAR(64)')
+        logger.info("已添加 evaluation_history.criteria_hash 列")
+    if 'evaluation_criteria' not in columns or 'raw_response' not in columns:
+        # 按当前模型新建的数据库没有旧列
+        conn.commit()
+        return
+
+    last_id = 0
+    moved = 0
+    criteria_hashes = set()
+    raw_bytes = 0
+    compressed_bytes = 0
+    while True:
+        rows = conn.exec_driver_sql(
+            'SELECT id, evaluation_criteria, raw_response FROM evaluation_history '
+            'WHERE id > ? AND (evaluation_criteria IS NOT NULL OR raw_response IS NOT NULL) '
+            'ORDER BY id LIMIT ?', (last_id, batch_size)
+        ).fetchall()
+        if not rows:
+            break
+        criteria_params = {}
+        raw_params = []
+        update_params = []
+        for history_id, criteria, raw_response in rows:
+            criteria_hash = None
+            if criteria is not None:
+                criteria_hash = EvaluationCriteriaText.compute_hash(criteria)
+                criteria_params[criteria_hash] = criteria
+            if raw_response is not None:
+                codec, payload = EvaluationRawResponse.encode(raw_response)
+                raw_params.append((history_id, codec, payload, len(raw_response)))
+                raw_bytes += len(raw_response.encode('utf-8'))
+                compressed_bytes += len(payload)
+            update_params.append((criteria_hash, history_id))
+        if criteria_params:
+            conn.exec_driver_sql(
+                'INSERT OR IGNORE INTO evaluation_criteria_texts (criteria_hash, content, created_at) VALUES (?, ?, ?)',
+                [(criteria_hash, content, datetime.utcnow()) for criteria_hash, content in criteria_params.items()]
+            )
+            criteria_hashes.update(criteria_params)
+        if raw_params:
+            # 迁移期间服务写入的新记录已自带原始响应，不覆盖
+            conn.exec_driver_sql(
+                'INSERT OR IGNORE INTO evaluation_raw_responses (history_id, codec, payload, original_length) '
+                'VALUES (?, ?, ?, ?)', raw_params
+            )
+        conn.exec_driver_sql(
+            'UPDATE evaluation_history SET criteria_hash = COALESCE(?, criteria_hash), '
+            'evaluation_criteria = NULL, raw_response = NULL WHERE id = ?', update_params
+        )
+        # 每批单独提交，避免长时间持有写锁
+        conn.commit()
+        last_id = rows[-1][0]
+        moved += len(rows)
+    if moved:
+        logger.info(
+            f"已迁移 {moved} 条记录的评估标准和原始响应，评估标准去重后 {len(criteria_hashes)} 条，"
+            f"原始响应 {raw_bytes} 字节压缩为 {compressed_bytes} 字节；可执行 vacuum 回收数据库文件空间"
+        )
+
+
+# (版本号, 说明, 迁移函数)，版本号只增不改
+MIGRATIONS = [
+    (1, '为evaluation_history添加content_hash列', _add_content_hash_column),
+    (2, '创建重复检测占位表evaluation_dedup_claims', _create_dedup_claims_table),
+    (3, '创建评估统计汇总表并回填', _create_stats_rollup_tables),
+    (4, '创建规范化维度得分表evaluation_dimension_scores并回填', _create_dimension_scores_table),
+    (5, '创建评估历史全文索引evaluation_history_fts', _create_search_index),
+    (6, '评估标准去重存储、原始LLM响应压缩存储', _move_cold_columns),
+]
+
+
+def _ensure_migrations_table(conn):
+    conn.exec_driver_sql('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def get_applied_versions(conn):
+    """获取已应用的迁移版本"""
+    _ensure_migrations_table(conn)
+    return {row[0] for row in conn.exec_driver_sql('SELECT version FROM schema_migrations')}
+
+
+def _table_exists(conn, table_name):
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).first() is not None
+
+
+# ==================== 索引维护 ====================
+
+def _index_columns(conn, index_name):
+    return [row[2] for row in conn.exec_driver_sql(f'PRAGMA index_info("{index_name}")')]
+
+
+def ensure_indexes(conn):
+    """
+    根据模型声明同步索引：创建缺失的索引、重建列定义变化的索引、删除不再声明的索引
+
+    Returns:
+        dict: {'created': [...], 'rebuilt': [...], 'dropped': [...]}
+    """
+    changes = {'created': [], 'rebuilt': [], 'dropped': []}
+    for table in MANAGED_TABLES:
+        if not _table_exists(conn, table.name):
+            continue
+
+        existing = {
+            row[1] for row in conn.exec_driver_sql(f'PRAGMA index_list("{table.name}")')
+            if not row[1].startswith('sqlite_autoindex_')
+        }
+        declared = {index.name: index for index in table.indexes}
+
+        for name, index in declared.items():
+            columns = [column.name for column in index.columns]
+            if name in existing:
+                if _index_columns(conn, name) == columns:
+                    continue
+                conn.exec_driver_sql(f'DROP INDEX "{name}"')
+                changes['rebuilt'].append(name)
+            else:
+                changes['created'].append(name)
+            index.create(conn)
+            logger.info(f"已创建索引 {name}({', '.join(columns)})")
+
+        for name in existing - set(declared):
+            if name.startswith(MANAGED_INDEX_PREFIX):
+                conn.exec_driver_sql(f'DROP INDEX "{name}"')
+                changes['dropped'].append(name)
+                logger.info(f"已删除不再使用的索引 {name}")
+
+    if any(changes.values()):
+        # 更新统计信息，帮助查询规划器选择索引（限制采样行数，避免大表上耗时过长）
+        conn.exec_driver_sql('PRAGMA analysis_limit=1000')
+        conn.exec_driver_sql('ANALYZE')
+    conn.commit()
+    return changes
+
+
+def upgrade(engine=None):
+    """
+    执行未应用的迁移并同步索引（可重复执行，可在服务运行时对已有数据库执行）
+
+    Returns:
+        dict: {'applied': [...], 'indexes': {...}}
+    """
+    engine = engine or create_engine(_database_uri())
+    applied = []
+    with engine.connect() as conn:
+        done = get_applied_versions(conn)
+        for version, name, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info(f"执行迁移 {version}: {name}")
+            migrate(conn)
+            conn.exec_driver_sql(
+                'INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)',
+                (version, name, datetime.utcnow().isoformat())
+            )
+            conn.commit()
+            applied.append(version)
+
+        indexes = ensure_indexes(conn)
+
+    if applied or any(indexes.values()):
+        logger.info(f"数据库迁移完成，新应用版本: {applied}，索引变更: {indexes}")
+    return {'applied': applied, 'indexes': indexes}
+
+
+# ==================== 统计汇总表 ====================
+
+def rebuild_stats(engine=None):
+    """
+    从 evaluation_history 全量重建统计汇总表（绕过ORM修改评估历史后执行，统计接口只读取汇总表）
+
+    Returns:
+        int: 汇总的记录数
+    """
+    from services.evaluation_stats_rollup import evaluation_stats_rollup
+    engine = engine or create_engine(_database_uri())
+    with engine.connect() as conn:
+        total = evaluation_stats_rollup.rebuild(conn)
+        conn.commit()
+    return total
+
+
+def rebuild_stats_for_path(database_path):
+    """
+    供直接用sqlite3修改评估历史的维护脚本调用：提交后重建指定数据库文件的统计汇总表，
+    失败时只提示手动重建命令，不影响脚本已提交的修改
+
+    Returns:
+        bool: 是否重建成功
+    """
+    try:
+        total = rebuild_stats(create_engine(f'sqlite:///{database_path}'))
+        print(f"✓ 已重建统计汇总表，记录数: {total}")
+        return True
+    except Exception as e:
+        print(f"⚠️  重建统计汇总表失败: {str(e)}")
+        print("   请手动执行: python database/migrations.py rebuild-stats")
+        return False
+
+
+def sqlite_table_exists(cursor, table_name):
+    """sqlite3游标版的表存在检查（维护脚本在迁移未执行完的旧数据库上也要能运行）"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+    return cursor.fetchone() is not None
+
+
+# ==================== 执行计划检查 ====================
+
+# 热点查询（与服务中实际生成的SQL结构一致）：(名称, SQL, 参数)
+HOT_QUERIES = [
+    ('历史列表-按创建时间',
+     'SELECT id FROM evaluation_history ORDER BY created_at DESC, id DESC LIMIT 21', ()),
+    ('历史列表-游标翻页',
+     'SELECT id FROM evaluation_history WHERE (created_at, id) < (?, ?) '
+     'ORDER BY created_at DESC, id DESC LIMIT 21', ('2025-01-01 00:00:00', 1000)),
+    ('历史列表-按分类',
+     'SELECT id FROM evaluation_history WHERE classification_level2 = ? '
+     'ORDER BY created_at DESC, id DESC LIMIT 21', ('选股',)),
+    ('历史列表-按时间范围',
+     'SELECT id FROM evaluation_history WHERE created_at >= ? AND created_at <= ? '
+     'ORDER BY created_at DESC LIMIT 21', ('2025-01-01', '2025-02-01')),
+    ('badcase列表',
+     'SELECT id FROM evaluation_history WHERE is_badcase = 1 '
+     'ORDER BY created_at DESC, id DESC LIMIT 21', ()),
+    ('badcase列表-按分类',
+     'SELECT id FROM evaluation_history WHERE is_badcase = 1 AND classification_level2 = ? '
+     'ORDER BY created_at DESC, id DESC LIMIT 21', ('选股',)),
+    ('badcase列表-AI',
+     'SELECT id FROM evaluation_history WHERE is_badcase = 1 AND ai_is_badcase = 1 '
+     'ORDER BY created_at DESC, id DESC LIMIT 21', ()),
+    ('badcase列表-人工',
+     'SELECT id FROM evaluation_history WHERE is_badcase = 1 AND human_is_badcase = 1 '
+     'ORDER BY created_at DESC, id DESC LIMIT 21', ()),
+    ('重复检测',
+     'SELECT id FROM evaluation_history WHERE content_hash = ? AND created_at >= ? LIMIT 1',
+     ('0' * 64, '2025-01-01 00:00:00')),
+    ('全文检索-badcase',
+     'WITH search_matches AS MATERIALIZED (SELECT rowid AS history_id, rank FROM evaluation_history_fts '
+     'WHERE evaluation_history_fts MATCH ?) SELECT evaluation_history.id FROM evaluation_history '
+     'JOIN search_matches ON search_matches.history_id = evaluation_history.id '
+     'WHERE evaluation_history.is_badcase = 1 LIMIT 21', ('"选股策略"',)),
+]
+
+# 全表扫描（SCAN 后没有 USING INDEX）和为排序建立临时B树都视为退化
+_FULL_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+# 物化的CTE/子查询（MATCH 等结果集）本身就要整体扫描，不视为退化
+_MATERIALIZE_PATTERN = re.compile(r'^MATERIALIZE (\w+)$')
+_TEMP_SORT_PATTERN = re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY')
+
+
+def check_query_plans(engine=None, queries=None):
+    """
+    检查热点查询的执行计划
+
+    Returns:
+        list: 每个查询的检查结果 {'name', 'plan', 'ok', 'problems'}
+    """
+    engine = engine or create_engine(_database_uri())
+    results = []
+    with engine.connect() as conn:
+        for name, sql, params in queries or HOT_QUERIES:
+            try:
+                plan = [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', params)]
+            except Exception as e:
+                # 例如迁移尚未执行、列不存在
+                conn.rollback()
+                results.append({'name': name, 'plan': [], 'ok': False, 'problems': [f'执行计划获取失败: {str(e)}']})
+                continue
+            problems = []
+            materialized = {match.group(1) for match in map(_MATERIALIZE_PATTERN.match, plan) if match}
+            for detail in plan:
+                full_scan = _FULL_SCAN_PATTERN.match(detail)
+                if full_scan and full_scan.group(1) not in materialized:
+                    problems.append(f'全表扫描: {detail}')
+                elif _TEMP_SORT_PATTERN.search(detail):
+                    problems.append(f'排序未使用索引: {detail}')
+            results.append({'name': name, 'plan': plan, 'ok': not problems, 'problems': problems})
+    return results
+
+
+# ==================== 命令行 ====================
+
+def _database_uri():
+    from config import config
+    return config.SQLALCHEMY_DATABASE_URI
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库结构迁移工具')
+    parser.add_argument('command', choices=['upgrade', 'check', 'status', 'rebuild-stats', 'rebuild-search', 'vacuum'], help='要执行的操作')
+    parser.add_argument('--database-uri', help='数据库URI（默认使用config中的配置）')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_uri or _database_uri())
+
+    if args.command == 'upgrade':
+        result = upgrade(engine)
+        print(f"✅ 迁移完成，新应用版本: {result['applied'] or '无'}")
+        for action, names in result['indexes'].items():
+            if names:
+                print(f"   索引{action}: {', '.join(names)}")
+        return 0
+
+    if args.command == 'rebuild-stats':
+        total = rebuild_stats(engine)
+        print(f"✅ 统计汇总表重建完成，记录数: {total}")
+        return 0
+
+    if args.command == 'rebuild-search':
+        from services.evaluation_search import evaluation_search
+        with engine.connect() as conn:
+            evaluation_search.rebuild(conn)
+            conn.commit()
+        print("✅ 全文索引重建完成")
+        return 0
+
+    if args.command == 'vacuum':
+        # VACUUM 不能在事务中执行，且执行期间独占数据库
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            page_size = conn.exec_driver_sql('PRAGMA page_size').scalar()
+            before = conn.exec_driver_sql('PRAGMA page_count').scalar() * page_size
+            conn.exec_driver_sql('VACUUM')
+            after = conn.exec_driver_sql('PRAGMA page_count').scalar() * page_size
+        print(f"✅ 数据库整理完成: {before / 1048576:.1f}MB -> {after / 1048576:.1f}MB")
+        return 0
+
+    if args.command == 'status':
+        with engine.connect() as conn:
+            done = get_applied_versions(conn)
+            for version, name, _ in MIGRATIONS:
+                print(f"{'✅' if version in done else '⏳'} {version}: {name}")
+            for table in MANAGED_TABLES:
+                existing = {row[1] for row in conn.exec_driver_sql(f'PRAGMA index_list("{table.name}")')}
+                for index in table.indexes:
+                    print(f"{'✅' if index.name in existing else '❌'} {index.name}")
+        return 0
+
+    failed = 0
+    for result in check_query_plans(engine):
+        print(f"{'✅' if result['ok'] else '❌'} {result['name']}")
+        for detail in result['plan']:
+            print(f"      {detail}")
+        for problem in result['problems']:
+            print(f"   ⚠️  {problem}")
+        failed += 0 if result['ok'] else 1
+    if failed:
+        print(f"❌ {failed} 个热点查询未使用索引")
+        return 1
+    print("🎉 所有热点查询均使用索引")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,7 +22,7 @@ from datetime import datetime
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models.classification import db, EvaluationHistory
+from models.classification import db, EvaluationHistory, EvaluationDimensionScore, EvaluationRawResponse
 from app import app
 
 def backup_database():
@@ -66,7 +66,9 @@ def clear_evaluation_history():
                 print("❌ 操作已取消")
                 return False
             
-            # 删除所有记录
+            # 删除所有记录（包括规范化的维度得分和原始响应）
+            EvaluationDimensionScore.query.delete()
+            EvaluationRawResponse.query.delete()
             EvaluationHistory.query.delete()
             db.session.commit()
             
@@ -14,7 +14,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from flask import Flask
-from models.classification import db, EvaluationHistory
+from models.classification import db, EvaluationHistory, EvaluationDimensionScore, EvaluationRawResponse
 
 def create_app():
     """创建Flask应用"""
@@ -49,7 +49,9 @@ def clear_evaluation_history():
                 print("❌ 操作已取消")
                 return False
             
-            # 删除所有记录
+            # 删除所有记录（包括规范化的维度得分和原始响应）
+            EvaluationDimensionScore.query.delete()
+            EvaluationRawResponse.query.delete()
             EvaluationHistory.query.delete()
             db.session.commit()
             
@@ -29,11 +29,11 @@ def show_duplicate_dashboard():
         print(f"\n⏰ 最近24小时:")
         print(f"   新增记录: {len(recent_records)}")
         
-        # 检查最近的重复
+        # 检查最近的重复（按内容哈希分组，与保存时的重复检测一致）
         recent_groups = defaultdict(list)
         for record in recent_records:
-            key = f"{record.user_input}|||{record.model_answer}"
-            recent_groups[key].append(record)
+            if record.content_hash:
+                recent_groups[record.content_hash].append(record)
         
         recent_duplicates = {k: v for k, v in recent_groups.items() if len(v) > 1}
         
@@ -2,12 +2,14 @@ import sqlite3
 import json
 from datetime import datetime
 
-# 连接数据库
-conn = sqlite3.connect('data/qa_evaluator.db')
-conn.row_factory = sqlite3.Row
+from utils.sqlite_pool import sqlite_pool
+
+# 连接数据库（与后端服务使用同一个数据库文件）
+conn = sqlite_pool.acquire()
 
 # 导出分类标准
 cursor = conn.cursor()
+cursor.row_factory = sqlite3.Row
 cursor.execute("""
     SELECT level1, level1_definition, level2, level3, 
            level3_definition, examples, is_default
@@ -78,7 +80,7 @@ with open('config_data/export_summary.json', 'w', encoding='utf-8') as f:
         'description': 'AI评估系统配置数据导出摘要'
     }, f, ensure_ascii=False, indent=2)
 
-conn.close()
+sqlite_pool.release(conn)
 print(f"✅ 配置数据导出完成！")
 print(f"📋 分类标准: {len(classification_data)} 条")
 print(f"📊 评估标准: {len(evaluation_data)} 条")
@@ -10,7 +10,7 @@ import json
 from datetime import datetime, timedelta
 from flask import Flask
 from app import app, evaluation_history_service
-from models.classification import db, EvaluationHistory
+from models.classification import db, EvaluationHistory, EvaluationDimensionScore
 
 def analyze_and_clean_duplicates():
     """分析并清理重复记录"""
@@ -62,6 +62,7 @@ def analyze_and_clean_duplicates():
                     print(f"     ⚠️  要删除的记录有人工评估，合并到保留记录中")
                     keep_record.human_total_score = delete_record.human_total_score
                     keep_record.human_dimensions_json = delete_record.human_dimensions_json
+                    evaluation_history_service.sync_dimension_scores(keep_record, EvaluationDimensionScore.SOURCE_HUMAN)
                     keep_record.human_reasoning = delete_record.human_reasoning
                     keep_record.human_evaluation_by = delete_record.human_evaluation_by
                     keep_record.human_evaluation_time = delete_record.human_evaluation_time
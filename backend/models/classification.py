@@ -1,9 +1,12 @@
 """
 分类标准和评估标准数据模型
 """
+import hashlib
 import json
+import zlib
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
 db = SQLAlchemy()
 
@@ -184,7 +187,8 @@ class EvaluationHistory(db.Model):
     model_answer = db.Column(db.Text, nullable=False, comment='模型回答')
     reference_answer = db.Column(db.Text, comment='参考答案')
     question_time = db.Column(db.DateTime, comment='问题提出时间')
-    evaluation_criteria = db.Column(db.Text, comment='评估标准')
+    # 评估标准文本按内容哈希去重存放在 evaluation_criteria_texts，通过 evaluation_criteria 属性读写
+    criteria_hash = db.Column(db.String(64), comment='评估标准内容哈希(evaluation_criteria_texts)')
     total_score = db.Column(db.Float, nullable=False, comment='总分')
     dimensions_json = db.Column(db.Text, comment='各维度分数(JSON格式)')
     reasoning = db.Column(db.Text, comment='评分理由')
@@ -193,7 +197,7 @@ class EvaluationHistory(db.Model):
     classification_level3 = db.Column(db.String(100), comment='三级分类')
     evaluation_time_seconds = db.Column(db.Float, comment='评估耗时(秒)')
     model_used = db.Column(db.String(100), comment='使用的模型')
-    raw_response = db.Column(db.Text, comment='原始LLM响应')
+    # 原始LLM响应压缩存放在 evaluation_raw_responses，通过 raw_response 属性读写（访问时才加载）
     uploaded_images_json = db.Column(db.Text, comment='上传的图片信息(JSON格式)')
     
     # 人工评估相关字段
@@ -210,11 +214,131 @@ class EvaluationHistory(db.Model):
     human_is_badcase = db.Column(db.Boolean, default=False, comment='人工判断是否为badcase')
     badcase_reason = db.Column(db.Text, comment='badcase原因说明')
     
+    # 重复检测用的内容哈希，见 compute_content_hash
+    content_hash = db.Column(db.String(64), comment='内容哈希(用户问题+模型回答+参考答案)')
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
     
-    def to_dict(self):
-        """转换为字典格式"""
+    # 列表筛选/排序和重复检测使用的索引（已有数据库通过 database/migrations.py 在线创建）
+    __table_args__ = (
+        db.Index('idx_eh_created_at', 'created_at'),
+        db.Index('idx_eh_level2_created_at', 'classification_level2', 'created_at'),
+        db.Index('idx_eh_badcase_created_at', 'is_badcase', 'created_at'),
+        db.Index('idx_eh_badcase_level2_created_at', 'is_badcase', 'classification_level2', 'created_at'),
+        db.Index('idx_eh_ai_badcase_created_at', 'ai_is_badcase', 'created_at'),
+        db.Index('idx_eh_human_badcase_created_at', 'human_is_badcase', 'created_at'),
+        db.Index('idx_eh_content_hash_created_at', 'content_hash', 'created_at'),
+    )
+    
+    @staticmethod
+    def compute_content_hash(user_input, model_answer, reference_answer=None):
+        """计算评估内容哈希（用户问题、模型回答、参考答案），用于重复检测"""
+        raw = '\x00'.join(value or '' for value in (user_input, model_answer, reference_answer))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    @property
+    def evaluation_criteria(self):
+        """评估标准文本（同一内容在 evaluation_criteria_texts 中只存一份）"""
+        pending = getattr(self, '_pending_criteria', None)
+        if pending is not None:
+            return pending
+        return EvaluationCriteriaText.get_content(self.criteria_hash) if self.criteria_hash else None
+    
+    @evaluation_criteria.setter
+    def evaluation_criteria(self, value):
+        # 文本在记录写入前由 before_insert/before_update 事件存入 evaluation_criteria_texts
+        self._pending_criteria = value
+        self.criteria_hash = EvaluationCriteriaText.compute_hash(value) if value is not None else None
+    
+    @property
+    def raw_response(self):
+        """原始LLM响应（从 evaluation_raw_responses 加载并解压）"""
+        record = self.raw_response_record
+        return record.text if record is not None else None
+    
+    @raw_response.setter
+    def raw_response(self, value):
+        if value is None:
+            self.raw_response_record = None
+        elif self.raw_response_record is None:
+            self.raw_response_record = EvaluationRawResponse(text=value)
+        else:
+            self.raw_response_record.text = value
+    
+    # 列表视图默认返回的字段（不含原始响应、评估标准、模型回答等大字段，完整记录通过详情接口获取）
+    LIST_FIELDS = (
+        'id', 'user_input', 'total_score', 'dimensions',
+        'classification_level1', 'classification_level2', 'classification_level3',
+        'evaluation_time_seconds', 'model_used',
+        'human_total_score', 'human_dimensions', 'human_evaluation_by', 'human_evaluation_time',
+        'is_human_modified', 'is_badcase', 'ai_is_badcase', 'human_is_badcase', 'badcase_reason',
+        'created_at', 'updated_at'
+    )
+    # 列表视图中按预览长度截断的长文本字段
+    PREVIEW_FIELDS = ('user_input', 'model_answer', 'reference_answer', 'evaluation_criteria',
+                      'reasoning', 'raw_response', 'human_reasoning', 'badcase_reason')
+    # 输出字段与数据库列名不同的字段（JSON列）
+    JSON_FIELD_COLUMNS = {
+        'dimensions': 'dimensions_json',
+        'human_dimensions': 'human_dimensions_json',
+        'uploaded_images': 'uploaded_images_json'
+    }
+    # 不在 evaluation_history 表中的字段及其需要加载的列（None 表示按需从冷存储表加载）
+    COLD_FIELD_COLUMNS = {
+        'evaluation_criteria': 'criteria_hash',
+        'raw_response': None
+    }
+    DATETIME_FIELDS = ('question_time', 'human_evaluation_time', 'created_at', 'updated_at')
+    
+    @classmethod
+    def resolve_fields(cls, fields):
+        """
+        校验并整理需要返回的字段（忽略未知字段，始终包含id）
+        
+        Args:
+            fields: 字段名列表或逗号分隔的字符串
+            
+        Returns:
+            tuple: 有效的字段名
+        """
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        columns = cls.__table__.columns
+        resolved = ['id']
+        for field in fields or ():
+            field = field.strip()
+            if field in resolved:
+                continue
+            if field in cls.JSON_FIELD_COLUMNS or field in cls.COLD_FIELD_COLUMNS or (
+                field in columns and field not in cls.JSON_FIELD_COLUMNS.values()
+            ):
+                resolved.append(field)
+        return tuple(resolved)
+    
+    @classmethod
+    def columns_for_fields(cls, fields):
+        """返回输出指定字段需要加载的列（用于 load_only，其余列延迟加载）"""
+        columns = []
+        for field in fields:
+            if field in cls.COLD_FIELD_COLUMNS:
+                if cls.COLD_FIELD_COLUMNS[field]:
+                    columns.append(getattr(cls, cls.COLD_FIELD_COLUMNS[field]))
+            else:
+                columns.append(getattr(cls, cls.JSON_FIELD_COLUMNS.get(field, field)))
+        return columns
+    
+    def to_dict(self, fields=None, preview_length=None):
+        """
+        转换为字典格式
+        
+        Args:
+            fields: 只输出指定字段（resolve_fields 的结果），为空时输出完整记录
+            preview_length: 长文本字段的截断长度（仅在指定fields时生效）
+        """
+        if fields:
+            return self._to_projected_dict(fields, preview_length)
+        
         dimensions = {}
         if self.dimensions_json:
             try:
@@ -291,6 +415,27 @@ class EvaluationHistory(db.Model):
             'updated_at': safe_datetime_format(self.updated_at)
         }
     
+    def _to_projected_dict(self, fields, preview_length=None):
+        """只输出指定字段，长文本按预览长度截断"""
+        result = {}
+        for field in fields:
+            if field in self.JSON_FIELD_COLUMNS:
+                default = [] if field == 'uploaded_images' else {}
+                raw = getattr(self, self.JSON_FIELD_COLUMNS[field])
+                try:
+                    value = json.loads(raw) if raw else default
+                except (json.JSONDecodeError, TypeError):
+                    value = default
+            elif field in self.DATETIME_FIELDS:
+                value = getattr(self, field)
+                value = value.isoformat() if hasattr(value, 'isoformat') else value
+            else:
+                value = getattr(self, field)
+                if preview_length and field in self.PREVIEW_FIELDS and value and len(value) > preview_length:
+                    value = value[:preview_length] + '...'
+            result[field] = value
+        return result
+    
     @classmethod
     def from_dict(cls, data):
         """从字典创建实例"""
@@ -370,8 +515,230 @@ class EvaluationHistory(db.Model):
             is_badcase=data.get('is_badcase', False),
             ai_is_badcase=data.get('ai_is_badcase', False),
             human_is_badcase=data.get('human_is_badcase', False),
-            badcase_reason=data.get('badcase_reason', '')
+            badcase_reason=data.get('badcase_reason', ''),
+            
+            content_hash=cls.compute_content_hash(
+                data.get('user_input'), data.get('model_answer'), data.get('reference_answer')
+            )
+        )
+    
+    def __repr__(self):
+        return f'<EvaluationHistory {self.id}: {self.total_score}/10>' 
+
+class EvaluationDedupClaim(db.Model):
+    """评估内容去重占位：同一内容哈希在有效期内只允许对应一条评估历史记录"""
+    __tablename__ = 'evaluation_dedup_claims'
+    
+    content_hash = db.Column(db.String(64), primary_key=True, comment='内容哈希')
+    history_id = db.Column(db.Integer, nullable=False, comment='占位的评估历史记录ID')
+    expires_at = db.Column(db.DateTime, nullable=False, index=True, comment='占位过期时间')
+    
+    def __repr__(self):
+        return f'<EvaluationDedupClaim {self.content_hash[:12]} -> {self.history_id}>'
+
+
+class EvaluationDailyStat(db.Model):
+    """评估统计汇总：每个分类每天一行（增量维护，见 services/evaluation_stats_rollup.py）"""
+    __tablename__ = 'evaluation_daily_stats'
+    
+    # 未分类的记录使用空字符串
+    category = db.Column(db.String(100), primary_key=True, comment='二级分类')
+    stat_date = db.Column(db.String(10), primary_key=True, comment='日期(YYYY-MM-DD, UTC)')
+    
+    evaluation_count = db.Column(db.Integer, nullable=False, default=0, comment='评估数')
+    score_sum = db.Column(db.Float, nullable=False, default=0.0, comment='总分之和')
+    score_min = db.Column(db.Float, comment='最低总分')
+    score_max = db.Column(db.Float, comment='最高总分')
+    badcase_count = db.Column(db.Integer, nullable=False, default=0, comment='badcase数')
+    ai_badcase_count = db.Column(db.Integer, nullable=False, default=0, comment='AI判断的badcase数')
+    human_badcase_count = db.Column(db.Integer, nullable=False, default=0, comment='人工判断的badcase数')
+    ai_dimension_evaluations = db.Column(db.Integer, nullable=False, default=0, comment='有AI维度评分的评估数')
+    human_dimension_evaluations = db.Column(db.Integer, nullable=False, default=0, comment='有人工维度评分的评估数')
+    
+    __table_args__ = (
+        db.Index('idx_eds_stat_date', 'stat_date'),
+    )
+
+
+class EvaluationDimensionDailyStat(db.Model):
+    """维度得分汇总：每个分类、每天、每个维度、每个分值一行，记录出现次数"""
+    __tablename__ = 'evaluation_dimension_daily_stats'
+    
+    category = db.Column(db.String(100), primary_key=True, comment='二级分类')
+    stat_date = db.Column(db.String(10), primary_key=True, comment='日期(YYYY-MM-DD, UTC)')
+    source = db.Column(db.String(10), primary_key=True, comment='评分来源: ai/human')
+    dimension = db.Column(db.String(100), primary_key=True, comment='维度名称')
+    score = db.Column(db.Float, primary_key=True, comment='维度得分')
+    
+    score_count = db.Column(db.Integer, nullable=False, default=0, comment='该得分出现次数')
+
+
+class EvaluationDimensionScore(db.Model):
+    """评估维度得分（与 evaluation_history 的 dimensions_json / human_dimensions_json 同步写入）"""
+    __tablename__ = 'evaluation_dimension_scores'
+    
+    SOURCE_AI = 'ai'
+    SOURCE_HUMAN = 'human'
+    
+    history_id = db.Column(db.Integer, db.ForeignKey('evaluation_history.id', ondelete='CASCADE'), primary_key=True, comment='评估历史ID')
+    source = db.Column(db.String(10), primary_key=True, comment='评分来源: ai/human')
+    dimension = db.Column(db.String(100), primary_key=True, comment='维度名称')
+    score = db.Column(db.Float, nullable=False, comment='维度得分')
+    max_score = db.Column(db.Float, comment='写入时该维度的满分')
+    
+    history = db.relationship(
+        'EvaluationHistory',
+        backref=db.backref('dimension_scores', cascade='all, delete-orphan')
+    )
+    
+    __table_args__ = (
+        db.Index('idx_edsc_source_dimension_score', 'source', 'dimension', 'score'),
+    )
+    
+    @staticmethod
+    def parse_scores(raw_value):
+        """解析维度评分JSON，只保留数值分数（忽略无法转换为数字的值）"""
+        if not raw_value:
+            return {}
+        try:
+            dimensions = json.loads(raw_value)
+        except (json.JSONDecodeError, TypeError):
+            return {}
+        if not isinstance(dimensions, dict):
+            return {}
+        scores = {}
+        for dimension, score in dimensions.items():
+            if isinstance(score, bool):
+                continue
+            try:
+                scores[dimension] = float(score)
+            except (TypeError, ValueError):
+                continue
+        return scores
+    
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'history_id': self.history_id,
+            'source': self.source,
+            'dimension': self.dimension,
+            'score': self.score,
+            'max_score': self.max_score
+        }
+
+
+class EvaluationCriteriaText(db.Model):
+    """评估标准文本（按内容哈希去重，同一分类的评估记录共用一行）"""
+    __tablename__ = 'evaluation_criteria_texts'
+    
+    # 内容哈希 -> 文本的进程内缓存（内容寻址，缓存不会过期）
+    _content_cache = {}
+    CACHE_MAX_SIZE = 256
+    
+    criteria_hash = db.Column(db.String(64), primary_key=True, comment='评估标准内容哈希(SHA-256)')
+    content = db.Column(db.Text, nullable=False, comment='评估标准文本')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='首次写入时间')
+    
+    @staticmethod
+    def compute_hash(content):
+        """计算评估标准文本的内容哈希"""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def _cache(cls, criteria_hash, content):
+        if len(cls._content_cache) >= cls.CACHE_MAX_SIZE:
+            cls._content_cache.clear()
+        cls._content_cache[criteria_hash] = content
+    
+    @classmethod
+    def get_content(cls, criteria_hash):
+        """按内容哈希获取评估标准文本"""
+        content = cls._content_cache.get(criteria_hash)
+        if content is None:
+            content = db.session.query(cls.content).filter(cls.criteria_hash == criteria_hash).scalar()
+            if content is not None:
+                cls._cache(criteria_hash, content)
+        return content
+    
+    @classmethod
+    def store(cls, connection, content):
+        """
+        写入评估标准文本（已存在时忽略，在调用方的事务中执行）
+        
+        Returns:
+            str: 内容哈希
+        """
+        criteria_hash = cls.compute_hash(content)
+        connection.exec_driver_sql(
+            f'INSERT OR IGNORE INTO {cls.__tablename__} (criteria_hash, content, created_at) VALUES (?, ?, ?)',
+            (criteria_hash, content, datetime.utcnow())
         )
+        cls._cache(criteria_hash, content)
+        return criteria_hash
+    
+    def __repr__(self):
+        return f'<EvaluationCriteriaText {self.criteria_hash[:12]}>'
+
+
+class EvaluationRawResponse(db.Model):
+    """评估记录的原始LLM响应（压缩存储，只在查看记录详情时加载）"""
+    __tablename__ = 'evaluation_raw_responses'
+    
+    CODEC_ZLIB = 'zlib'
+    CODEC_NONE = 'none'
+    COMPRESSION_LEVEL = 6
+    
+    history_id = db.Column(db.Integer, db.ForeignKey('evaluation_history.id', ondelete='CASCADE'), primary_key=True, comment='评估历史ID')
+    codec = db.Column(db.String(10), nullable=False, default=CODEC_ZLIB, comment='压缩方式: zlib/none')
+    payload = db.Column(db.LargeBinary, nullable=False, comment='压缩后的响应内容(UTF-8)')
+    original_length = db.Column(db.Integer, comment='原始响应字符数')
+    
+    history = db.relationship(
+        'EvaluationHistory',
+        backref=db.backref('raw_response_record', uselist=False, cascade='all, delete-orphan')
+    )
+    
+    @classmethod
+    def encode(cls, text):
+        """
+        压缩响应文本（压缩后不更小时按原文存储）
+        
+        Returns:
+            tuple: (压缩方式, 字节内容)
+        """
+        raw = text.encode('utf-8')
+        compressed = zlib.compress(raw, cls.COMPRESSION_LEVEL)
+        if len(compressed) < len(raw):
+            return cls.CODEC_ZLIB, compressed
+        return cls.CODEC_NONE, raw
+    
+    @classmethod
+    def decode(cls, codec, payload):
+        """解压响应文本"""
+        if payload is None:
+            return None
+        raw = zlib.decompress(payload) if codec == cls.CODEC_ZLIB else payload
+        return raw.decode('utf-8')
+    
+    @property
+    def text(self):
+        return self.decode(self.codec, self.payload)
+    
+    @text.setter
+    def text(self, value):
+        self.codec, self.payload = self.encode(value)
+        self.original_length = len(value)
     
     def __repr__(self):
-        return f'<EvaluationHistory {self.id}: {self.total_score}/10>' 
\ No newline at end of file
+        return f'<EvaluationRawResponse {self.history_id}: {self.codec}>'
+
+
+def _store_pending_criteria(mapper, connection, target):
+    """评估记录写入前，将新设置的评估标准文本存入 evaluation_criteria_texts"""
+    content = target.__dict__.pop('_pending_criteria', None)
+    if content is not None:
+        EvaluationCriteriaText.store(connection, content)
+
+
+event.listen(EvaluationHistory, 'before_insert', _store_pending_criteria)
+event.listen(EvaluationHistory, 'before_update', _store_pending_criteria)
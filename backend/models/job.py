@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+后台任务数据模型
+"""
+
+import json
+from datetime import datetime
+from models.classification import db
+
+
+class Job(db.Model):
+    """后台任务数据模型（持久化在SQLite中，服务重启后可继续执行）"""
+    __tablename__ = 'jobs'
+
+    # 任务状态
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.String(36), primary_key=True, comment='任务ID(UUID)')
+    job_type = db.Column(db.String(50), nullable=False, comment='任务类型')
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING, comment='任务状态')
+
+    payload = db.Column(db.Text, comment='任务参数(JSON格式)')
+    result = db.Column(db.Text, comment='任务结果(JSON格式)')
+    error = db.Column(db.Text, comment='最近一次失败的错误信息')
+
+    # 重试控制
+    attempts = db.Column(db.Integer, default=0, comment='已执行次数')
+    max_attempts = db.Column(db.Integer, default=3, comment='最大执行次数')
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, comment='最早可执行时间(重试退避)')
+
+    # 执行信息
+    locked_by = db.Column(db.String(200), comment='执行该任务的worker标识')
+    lease_expires_at = db.Column(db.DateTime, comment='执行租约到期时间，超时后任务可被重新领取')
+    started_at = db.Column(db.DateTime, comment='最近一次开始执行时间')
+    finished_at = db.Column(db.DateTime, comment='完成时间')
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+
+    __table_args__ = (
+        db.Index('idx_jobs_status_available', 'status', 'available_at'),
+    )
+
+    def to_dict(self, include_result=True):
+        """转换为字典格式"""
+        data = {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'error': self.error,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+        if include_result:
+            data['payload'] = json.loads(self.payload) if self.payload else None
+            data['result'] = json.loads(self.result) if self.result else None
+        return data
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+后台任务API路由
+"""
+
+from flask import Blueprint, request, jsonify
+from models.job import Job
+from services.job_queue_service import job_queue_service
+
+# 创建蓝图
+job_bp = Blueprint('job', __name__)
+
+@job_bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    提交后台任务
+
+    Request Body:
+        {
+            "job_type": "evaluate",   # 任务类型: evaluate / badcase_summary
+            "payload": {...},         # 任务参数
+            "max_attempts": 3         # 最大执行次数（可选）
+        }
+
+    Returns:
+        JSON: 任务信息（202）
+    """
+    try:
+        data = request.get_json() or {}
+        job_type = data.get('job_type')
+        if not job_type:
+            return jsonify({'success': False, 'message': '缺少必需字段: job_type'}), 400
+
+        result = job_queue_service.submit(job_type, data.get('payload') or {}, data.get('max_attempts'))
+        return jsonify(result), 202 if result['success'] else 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'提交任务失败: {str(e)}'
+        }), 500
+
+@job_bp.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """获取最近的任务列表，支持 status、job_type、limit 参数"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        result = job_queue_service.list_jobs(
+            status=request.args.get('status'),
+            job_type=request.args.get('job_type'),
+            limit=limit
+        )
+        return jsonify(result), 200 if result['success'] else 500
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取任务列表失败: {str(e)}'
+        }), 500
+
+@job_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """获取任务状态（不包含任务结果）"""
+    try:
+        result = job_queue_service.get_job(job_id, include_result=False)
+        return jsonify(result), 200 if result['success'] else 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取任务状态失败: {str(e)}'
+        }), 500
+
+@job_bp.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    获取任务结果
+
+    Returns:
+        JSON: 任务成功时返回结果（200）；排队或执行中返回202；失败返回错误信息（500）
+    """
+    try:
+        result = job_queue_service.get_job(job_id)
+        if not result['success']:
+            return jsonify(result), 404
+
+        job = result['data']
+        if job['status'] == Job.STATUS_SUCCEEDED:
+            return jsonify({'success': True, 'status': job['status'], 'data': job['result']})
+        if job['status'] == Job.STATUS_FAILED:
+            return jsonify({'success': False, 'status': job['status'], 'message': job['error']}), 500
+        return jsonify({
+            'success': True,
+            'status': job['status'],
+            'message': '任务尚未完成',
+            'attempts': job['attempts']
+        }), 202
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取任务结果失败: {str(e)}'
+        }), 500
@@ -7,20 +7,24 @@
 import os
 import json
 import sqlite3
+import sys
 from datetime import datetime
 
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sqlite_pool import sqlite_pool
+
 
 def connect_database():
-    """连接SQLite数据库"""
-    db_path = '../data/qa_evaluator.db'
+    """从共享连接池获取数据库连接（与后端服务使用同一个数据库文件）"""
+    db_path = sqlite_pool.db_path
     if not os.path.exists(db_path):
         print(f"❌ 数据库文件不存在: {db_path}")
         return None
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # 返回字典格式的行
-        return conn
+        return sqlite_pool.acquire()
     except Exception as e:
         print(f"❌ 数据库连接失败: {e}")
         return None
@@ -30,6 +34,7 @@ def export_classification_standards(conn):
     """导出分类标准数据"""
     try:
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row  # 返回字典格式的行
         cursor.execute("""
             SELECT level1, level1_definition, level2, level3, 
                    level3_definition, examples, is_default
@@ -59,6 +64,7 @@ def export_evaluation_standards(conn):
     """导出评估标准数据"""
     try:
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row  # 返回字典格式的行
         cursor.execute("""
             SELECT level2_category, dimension, reference_standard,
                    scoring_principle, max_score, is_default
@@ -168,7 +174,7 @@ def main():
         return False
     
     finally:
-        conn.close()
+        sqlite_pool.release(conn)
     
     return False
 
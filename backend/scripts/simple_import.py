@@ -6,20 +6,24 @@
 
 import os
 import json
-import sqlite3
+import sys
 from datetime import datetime
 
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sqlite_pool import sqlite_pool
+
 
 def connect_database():
-    """连接SQLite数据库"""
-    db_path = '../data/qa_evaluator.db'
+    """从共享连接池获取数据库连接（与后端服务使用同一个数据库文件）"""
+    db_path = sqlite_pool.db_path
     if not os.path.exists(db_path):
         print(f"❌ 数据库文件不存在: {db_path}")
         return None
     
     try:
-        conn = sqlite3.connect(db_path)
-        return conn
+        return sqlite_pool.acquire()
     except Exception as e:
         print(f"❌ 数据库连接失败: {e}")
         return None
@@ -228,7 +232,7 @@ def import_config_data(config_dir='config_data', force_update=False):
         return False
     
     finally:
-        conn.close()
+        sqlite_pool.release(conn)
 
 
 def main():
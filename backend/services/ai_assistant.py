@@ -1,6 +1,7 @@
 import requests
 import json
 import logging
+from utils.http_session_pool import http_session_pool
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -45,12 +46,12 @@ class AIAssistant:
             
             # 发送请求
             logger.info("📡 正在向AI大模型发送请求...")
-            response = requests.post(
+            response = http_session_pool.post(
                 self.api_url, 
+                task_type='assistant',  # 默认3分钟超时，适应大模型长时间处理
                 headers=self.headers, 
                 params=self.params, 
-                data=json.dumps(data),
-                timeout=180  # 增加到3分钟超时，适应大模型长时间处理
+                data=json.dumps(data)
             )
             
             if response.status_code == 200:
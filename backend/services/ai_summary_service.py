@@ -46,23 +46,16 @@ class AISummaryService:
             self.logger.info(f"📏 Prompt长度: {len(prompt)}字符")
             
             # 调用Venus接口，使用summary任务类型（会自动选择deepseek-r1-local-II模型）
-            # 为AI总结任务使用更长的超时时间
-            original_timeout = self.llm_client.timeout
-            self.llm_client.timeout = 300  # 5分钟超时，适应复杂分析任务
-            
-            self.logger.info(f"⏱️  设置超时时间: {self.llm_client.timeout}秒")
+            # summary任务的超时时间由连接池按任务类型配置（默认5分钟），无需修改共享客户端的状态
+            self.logger.info(f"⏱️  超时时间: {self.llm_client.http_pool.get_timeout('summary')}秒")
             self.logger.info(f"🚀 开始调用大模型API...")
             
-            try:
-                summary_text = self.llm_client.dialog(prompt, task_type='summary')
-                self.logger.info(f"✅ 大模型响应成功，响应长度: {len(summary_text)}字符")
-                self.logger.info(f"📄 大模型原始响应:")
-                self.logger.info("-" * 60)
-                self.logger.info(summary_text)
-                self.logger.info("-" * 60)
-            finally:
-                # 恢复原始超时时间
-                self.llm_client.timeout = original_timeout
+            summary_text = self.llm_client.dialog(prompt, task_type='summary')
+            self.logger.info(f"✅ 大模型响应成功，响应长度: {len(summary_text)}字符")
+            self.logger.info(f"📄 大模型原始响应:")
+            self.logger.info("-" * 60)
+            self.logger.info(summary_text)
+            self.logger.info("-" * 60)
             
             # 解析总结结果
             self.logger.info(f"🔧 开始解析AI总结结果...")
@@ -99,11 +92,12 @@ class AISummaryService:
             self.logger.error(f"   - 输入原因数: {len(reasons_data.get('reasons', []))}")
             
             # 如果是超时异常，提供更具体的信息
-            if 'timeout' in str(e).lower() or 'Timeout' in str(e):
-                self.logger.error(f"⏰ 检测到超时异常，当前配置的超时时间: {getattr(self.llm_client, 'timeout', '未知')}秒")
+            if 'timeout' in str(e).lower() or 'Timeout' in str(e) or '超时' in str(e):
+                summary_timeout = self.llm_client.http_pool.get_timeout('summary')
+                self.logger.error(f"⏰ 检测到超时异常，当前配置的超时时间: {summary_timeout}秒")
                 return {
                     'success': False,
-                    'message': f'AI总结请求超时，大模型处理时间过长。当前超时设置: {getattr(self.llm_client, "timeout", "未知")}秒'
+                    'message': f'AI总结请求超时，大模型处理时间过长。当前超时设置: {summary_timeout}秒'
                 }
             
             return {
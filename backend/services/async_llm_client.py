@@ -0,0 +1,251 @@
+"""
+异步LLM客户端
+基于asyncio/aiohttp，在单个后台事件循环中并发执行LLM调用，
+通过全局信号量和按模型的并发上限控制压力，不再为每个在途请求占用一个线程
+"""
+import asyncio
+import os
+import threading
+import time
+
+import aiohttp
+
+from .llm_client import LLMClient
+from utils.logger import get_logger
+
+
+class AsyncLLMClient(LLMClient):
+    """LLMClient的异步版本，复用相同的模型路由(self.models)和请求参数"""
+
+    def __init__(self):
+        super().__init__()
+        self.logger = get_logger(__name__)
+
+        # 全局并发上限，以及按模型的并发上限，格式: "deepseek-r1-local-II:4,deepseek-v3-local-II:16"
+        self.max_concurrency = int(os.getenv('LLM_ASYNC_MAX_CONCURRENCY', '32'))
+        self.model_concurrency = self._parse_model_concurrency(
+            os.getenv('LLM_ASYNC_MODEL_CONCURRENCY', 'deepseek-r1-local-II:4')
+        )
+
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._session = None
+        self._global_semaphore = None
+        self._model_semaphores = {}
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'in_flight': 0,
+            'waiting': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'by_model': {}
+        }
+
+    def _parse_model_concurrency(self, raw_value):
+        """解析按模型的并发配置"""
+        limits = {}
+        for item in raw_value.split(','):
+            item = item.strip()
+            if not item or ':' not in item:
+                continue
+            model_name, limit = item.rsplit(':', 1)
+            try:
+                limits[model_name.strip()] = max(int(limit), 1)
+            except ValueError:
+                self.logger.warning(f"无效的模型并发配置: {item}")
+        return limits
+
+    # ==================== 事件循环管理 ====================
+
+    def _ensure_loop(self):
+        """启动后台事件循环线程（只启动一次）"""
+        if self._loop is not None and self._loop.is_running():
+            return self._loop
+
+        with self._loop_lock:
+            if self._loop is None or not self._loop.is_running():
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+
+                def run_loop():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(started.set)
+                    loop.run_forever()
+
+                self._loop_thread = threading.Thread(target=run_loop, name='async-llm-loop', daemon=True)
+                self._loop_thread.start()
+                started.wait()
+                self._loop = loop
+                self.logger.info(f"异步LLM事件循环已启动，全局并发上限: {self.max_concurrency}, 模型并发上限: {self.model_concurrency}")
+
+        return self._loop
+
+    def submit(self, coro):
+        """
+        将协程提交到后台事件循环执行（可在任意同步线程中调用）
+
+        Returns:
+            concurrent.futures.Future: 调用 future.cancel() 即可取消对应的LLM请求
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro, timeout=None):
+        """同步等待协程执行结果，超时后取消该协程"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def run_all(self, coros, timeout=None):
+        """
+        并发执行多个协程并按顺序返回结果，单个失败不影响其他请求
+
+        Returns:
+            list: 每个元素为结果或对应的异常对象
+        """
+        async def gather_all():
+            return await asyncio.gather(*coros, return_exceptions=True)
+
+        return self.run(gather_all(), timeout=timeout)
+
+    async def _get_session(self):
+        """获取（或创建）绑定在当前事件循环上的aiohttp会话"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _get_semaphores(self, model_name):
+        """获取全局信号量和模型信号量（在事件循环线程中调用）"""
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        if model_name not in self._model_semaphores:
+            limit = self.model_concurrency.get(model_name, self.max_concurrency)
+            self._model_semaphores[model_name] = asyncio.Semaphore(limit)
+        return self._global_semaphore, self._model_semaphores[model_name]
+
+    def _update_stats(self, model_name, **deltas):
+        """更新并发统计"""
+        with self._stats_lock:
+            model_stats = self._stats['by_model'].setdefault(
+                model_name, {'in_flight': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+            )
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+                if key in model_stats:
+                    model_stats[key] += delta
+
+    # ==================== 异步接口 ====================
+
+    async def dialog_async(self, prompt, task_type='default', max_tokens=None, temperature=None):
+        """
+        异步调用LLM API获取响应
+
+        Args:
+            prompt: 输入的prompt内容
+            task_type: 任务类型 ('classification', 'evaluation', 'summary', 'default')
+            max_tokens: 最大token数（可选，使用默认值）
+            temperature: 温度参数（可选，使用默认值）
+
+        Returns:
+            str: LLM的响应内容
+        """
+        model_name = self.models.get(task_type, self.default_model)
+        timeout = self.http_pool.get_timeout(task_type)
+        global_semaphore, model_semaphore = self._get_semaphores(model_name)
+
+        data = {
+            "model": model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
+            "temperature": temperature if temperature is not None else self.temperature
+        }
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+
+        self._update_stats(model_name, waiting=1)
+        acquired = False
+        try:
+            async with model_semaphore, global_semaphore:
+                acquired = True
+                self._update_stats(model_name, waiting=-1, in_flight=1)
+                start_time = time.time()
+                self.logger.info(f"发送异步请求到LLM API - 任务类型: {task_type}, 模型: {model_name}")
+
+                session = await self._get_session()
+                async with session.post(
+                    f"{self.api_base}/chat/completions",
+                    json=data,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout, connect=self.http_pool.connect_timeout)
+                ) as response:
+                    if response.status != 200:
+                        text = await response.text()
+                        raise Exception(f"API请求失败，状态码: {response.status}, 响应: {text}")
+
+                    result = await response.json(content_type=None)
+
+                if 'choices' not in result or len(result['choices']) == 0:
+                    raise Exception("API响应格式错误：没有找到choices字段")
+
+                content = result['choices'][0]['message']['content']
+                self.logger.info(f"异步LLM API调用成功，任务: {task_type}, 模型: {model_name}, 响应长度: {len(content)}, 耗时: {time.time() - start_time:.2f}秒")
+                self._update_stats(model_name, completed=1)
+                return content
+
+        except asyncio.CancelledError:
+            self.logger.warning(f"异步LLM请求已取消，任务: {task_type}, 模型: {model_name}")
+            self._update_stats(model_name, cancelled=1)
+            raise
+        except asyncio.TimeoutError:
+            self.logger.error(f"异步LLM API调用超时，超时时间: {timeout}秒")
+            self._update_stats(model_name, failed=1)
+            raise Exception("LLM API调用超时")
+        except aiohttp.ClientError as e:
+            self.logger.error(f"异步LLM API请求异常: {str(e)}")
+            self._update_stats(model_name, failed=1)
+            raise Exception(f"LLM API请求失败: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"异步LLM API调用失败: {str(e)}")
+            self._update_stats(model_name, failed=1)
+            raise e
+        finally:
+            if acquired:
+                self._update_stats(model_name, in_flight=-1)
+            else:
+                self._update_stats(model_name, waiting=-1)
+
+    async def get_evaluation_async(self, prompt, max_tokens=None, temperature=None, task_type='evaluation'):
+        """
+        异步获取评估结果（与 get_evaluation 接口保持一致）
+
+        与同步版本不同，这里不修改实例属性，参数按请求传递，可安全并发调用
+        """
+        return await self.dialog_async(
+            prompt,
+            task_type=task_type,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+    def get_stats(self):
+        """获取并发统计信息"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['by_model'] = {name: dict(values) for name, values in self._stats['by_model'].items()}
+        stats['max_concurrency'] = self.max_concurrency
+        stats['model_concurrency'] = dict(self.model_concurrency)
+        stats['loop_running'] = self._loop is not None and self._loop.is_running()
+        return stats
+
+
+# 创建全局实例，所有服务共享同一个事件循环和并发上限
+async_llm_client = AsyncLLMClient()
@@ -0,0 +1,246 @@
+"""
+分类历史异步批量写入
+分类请求只把历史记录放入有界队列，由后台线程按批次（达到批量大小或等待超过刷新间隔）
+在一个事务中写入 classification_history，请求不再等待SQLite写锁和fsync；
+进程退出时写入队列中剩余的记录，队列已满时丢弃新记录并计数
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.classification import db, ClassificationHistory
+from utils.logger import get_logger
+
+
+class ClassificationHistoryWriter:
+    """classification_history 的后台批量写入器"""
+
+    # 队列中的刷新标记：后台线程收到后立即写入当前批次
+    _FLUSH = object()
+    # 队列已满时丢弃日志的最小间隔（秒）
+    DROP_LOG_INTERVAL = 10.0
+
+    def __init__(self, app=None):
+        self.logger = get_logger(__name__)
+        self.enabled = os.getenv('CLASSIFICATION_HISTORY_ASYNC', 'true').lower() == 'true'
+        self.max_queue_size = int(os.getenv('CLASSIFICATION_HISTORY_QUEUE_SIZE', '10000'))
+        self.batch_size = int(os.getenv('CLASSIFICATION_HISTORY_BATCH_SIZE', '200'))
+        self.flush_interval = float(os.getenv('CLASSIFICATION_HISTORY_FLUSH_INTERVAL', '1.0'))
+
+        self.app = None
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._atexit_registered = False
+        self._last_drop_log = 0.0
+
+        # 已提交但尚未写入（或丢弃）的记录数，flush() 等待其归零
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0, 'written': 0, 'batches': 0, 'dropped': 0,
+            'failed': 0, 'failed_batches': 0, 'max_queue_depth': 0
+        }
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """初始化Flask应用（后台线程在应用上下文中写入）"""
+        self.app = app
+
+    def _update_stats(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+
+    # ==================== 提交 ====================
+
+    def submit(self, user_input, classification_result, confidence, classification_time, model_used):
+        """
+        提交一条分类历史
+
+        Returns:
+            bool: 已由后台写入器接收（包括队列已满被丢弃）时为True；
+                  写入器未启用时为False，调用方应同步写入
+        """
+        if not self.enabled or self.app is None or not self._ensure_started():
+            return False
+
+        row = {
+            'user_input': user_input,
+            'classification_result': classification_result,
+            'confidence': confidence,
+            'classification_time': classification_time,
+            'model_used': model_used,
+            # 使用请求时的时间，而不是批量写入的时间
+            'created_at': datetime.utcnow()
+        }
+        with self._pending_cond:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._finish(1)
+            self._update_stats(dropped=1)
+            now = time.time()
+            if now - self._last_drop_log >= self.DROP_LOG_INTERVAL:
+                self._last_drop_log = now
+                self.logger.warning(
+                    f"分类历史写入队列已满（{self.max_queue_size}），丢弃新记录，累计丢弃: {self._stats['dropped']}"
+                )
+            return True
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], depth)
+        return True
+
+    def _finish(self, count):
+        with self._pending_cond:
+            self._pending -= count
+            self._pending_cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """
+        等待已提交的记录全部写入
+
+        Returns:
+            bool: 超时前全部写入时为True
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._pending == 0
+        try:
+            self._queue.put(self._FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        deadline = time.time() + timeout
+        with self._pending_cond:
+            while self._pending > 0:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._pending_cond.wait(remaining)
+        return True
+
+    # ==================== 后台线程 ====================
+
+    def _ensure_started(self):
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            return True
+
+        with self._start_lock:
+            if self._pid != os.getpid():
+                # fork出的子进程不继承后台线程，父进程队列中的记录由父进程负责写入
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+                with self._pending_cond:
+                    self._pending = 0
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                if self._stopping.is_set():
+                    return False
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='classification-history-writer', daemon=True
+                )
+                self._thread.start()
+                if not self._atexit_registered:
+                    atexit.register(self.stop)
+                    self._atexit_registered = True
+                self.logger.info(
+                    f"分类历史异步写入已启动，批量大小: {self.batch_size}，刷新间隔: {self.flush_interval}秒"
+                )
+        return True
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+            elif self._stopping.is_set() and self._queue.empty():
+                return
+
+    def _collect_batch(self):
+        """取出一批记录：达到批量大小、距第一条超过刷新间隔、收到刷新标记或正在停止时返回"""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if self._stopping.is_set():
+                timeout = 0
+            elif deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = max(deadline - time.time(), 0)
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._FLUSH:
+                break
+            batch.append(item)
+            if deadline is None:
+                deadline = time.time() + self.flush_interval
+        return batch
+
+    def _write_batch(self, batch):
+        """在一个事务中写入一批记录，失败时重试一次"""
+        for attempt in (1, 2):
+            with self.app.app_context():
+                try:
+                    db.session.execute(ClassificationHistory.__table__.insert(), batch)
+                    db.session.commit()
+                    self._update_stats(written=len(batch), batches=1)
+                    self.logger.debug(f"分类历史批量写入 {len(batch)} 条")
+                    break
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    if attempt == 2:
+                        self._update_stats(failed=len(batch), failed_batches=1)
+                        self.logger.error(f"分类历史批量写入失败，丢弃 {len(batch)} 条记录: {str(e)}")
+                    else:
+                        self.logger.warning(f"分类历史批量写入失败，重试: {str(e)}")
+        self._finish(len(batch))
+
+    def stop(self, timeout=5.0):
+        """停止后台线程（先写入队列中剩余的记录）"""
+        self._stopping.set()
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(self._FLUSH, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout=timeout)
+        if thread.is_alive():
+            self.logger.warning(f"分类历史写入线程未在 {timeout} 秒内退出，剩余 {self._queue.qsize()} 条记录未写入")
+        else:
+            self.logger.info("分类历史异步写入已停止")
+
+    def get_stats(self):
+        """获取写入器统计信息"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        stats['queue_depth'] = self._queue.qsize()
+        stats['pending'] = self._pending
+        stats['max_queue_size'] = self.max_queue_size
+        stats['batch_size'] = self.batch_size
+        stats['flush_interval'] = self.flush_interval
+        stats['avg_batch_size'] = round(stats['written'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
+
+
+# 创建全局实例，由 app.py 绑定Flask应用
+classification_history_writer = ClassificationHistoryWriter()
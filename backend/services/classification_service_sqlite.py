@@ -1,20 +1,65 @@
 """
 基于SQLite的问题分类服务类
 """
+import asyncio
 import json
+import os
+import threading
 import time
 from datetime import datetime
 from .llm_client import LLMClient
+from .async_llm_client import async_llm_client
+from .local_classifier import LocalClassifier
+from .classification_history_writer import classification_history_writer
 from utils.logger import get_logger
+from utils.classification_cache import ClassificationCache
 from models.classification import db, ClassificationStandard, ClassificationHistory
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
 
+class TaxonomySnapshot:
+    """分类标准快照（构建后只读，变更时整体替换）"""
+    
+    def __init__(self, version, standards, standards_text, prompt_prefix, prompt_suffix):
+        self.version = version
+        self.standards = standards
+        self.standards_text = standards_text
+        self.prompt_prefix = prompt_prefix
+        self.prompt_suffix = prompt_suffix
+        self.built_at = time.time()
+        self.checked_at = self.built_at
+        
+        # (level1, level2, level3) -> 分类标准，重复的组合保留ID最小的一条
+        self.index = {}
+        for standard in sorted(standards.get('standards', []), key=lambda item: item.get('id') or 0):
+            key = (standard.get('level1'), standard.get('level2'), standard.get('level3'))
+            self.index.setdefault(key, standard)
+        
+        # 解析失败时使用的兜底分类：第一个"信息查询"分类
+        self.fallback_standard = next(
+            (standard for key, standard in self.index.items() if key[0] == '信息查询'), None
+        )
+    
+    def lookup(self, level1, level2, level3):
+        """按三级分类查找分类标准，不存在时返回None"""
+        return self.index.get((level1, level2, level3))
+
 class ClassificationService:
     """问题分类服务类 - SQLite版本"""
     
     def __init__(self, app=None):
         self.logger = get_logger(__name__)
         self.llm_client = LLMClient()
+        self.async_llm_client = async_llm_client
+        # 按规范化输入和分类标准版本缓存分类结果
+        self.result_cache = ClassificationCache()
+        # 本地快速分类器，可确定性判断的输入不调用LLM
+        self.local_classifier = LocalClassifier()
+        
+        # 分类标准快照：格式化后的标准文本和prompt固定部分，分类标准变更时整体替换
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+        self.snapshot_check_interval = float(os.getenv('CLASSIFICATION_SNAPSHOT_CHECK_INTERVAL', '30'))
         
         if app is not None:
             self.init_app(app)
@@ -24,12 +69,13 @@ class ClassificationService:
         self.app = app
         # 不需要重复初始化 db，因为在 app.py 中已经初始化过了
     
-    def classify_user_input(self, user_input):
+    def classify_user_input(self, user_input, snapshot=None):
         """
         对用户输入进行分类
         
         Args:
             user_input: 用户输入的文本
+            snapshot: 分类标准快照（可选，批量分类时整批复用同一份快照）
             
         Returns:
             dict: 分类结果
@@ -38,54 +84,240 @@ class ClassificationService:
             self.logger.info(f"开始分类用户输入，输入长度: {len(user_input)}")
             start_time = time.time()
             
-            # 获取分类标准
-            standards = self.get_classification_standards()
-            if not standards:
-                raise Exception("未找到分类标准")
+            snapshot = snapshot or self.get_taxonomy_snapshot()
+            
+            # 本地快速分类：纯股票代码、与示例一致的输入等直接返回
+            local_result = self._classify_locally(user_input, snapshot)
+            if local_result is not None:
+                return local_result
+            
+            # 相同输入在分类标准未变化时直接使用缓存结果
+            cached_result = self._get_cached_classification(user_input, snapshot.version, start_time)
+            if cached_result is not None:
+                return cached_result
             
             # 构建分类prompt
-            prompt = self._build_classification_prompt(user_input, standards)
+            prompt = self._prepare_classification_prompt(user_input, snapshot)
             
             # 调用LLM进行分类，指定使用classification任务类型
             response = self.llm_client.dialog(prompt, task_type='classification')
             
-            # 解析分类结果
-            classification_result = self._parse_classification_result(response)
+            classification_result = self._finish_classification(user_input, response, start_time, snapshot)
+            self._cache_classification(user_input, snapshot.version, classification_result)
+            return classification_result
             
-            # 计算分类耗时
-            classification_time = time.time() - start_time
-            classification_result['classification_time_seconds'] = round(classification_time, 3)
+        except Exception as e:
+            self.logger.error(f"用户输入分类失败: {str(e)}")
+            return self._get_error_classification(e)
+    
+    async def classify_user_input_async(self, user_input):
+        """
+        对用户输入进行分类（异步版本，返回值与 classify_user_input 相同）
+        
+        数据库读写在线程池中执行（不阻塞共享事件循环上的其它LLM调用），LLM调用在共享事件循环中并发执行
+        """
+        try:
+            self.logger.info(f"开始异步分类用户输入，输入长度: {len(user_input)}")
+            start_time = time.time()
             
-            # 保存分类历史
-            self._save_classification_history(user_input, classification_result, classification_time)
+            snapshot, early_result = await asyncio.to_thread(self._classify_without_llm, user_input, start_time)
+            if early_result is not None:
+                return early_result
             
-            self.logger.info(f"分类完成: {classification_result.get('level1')} -> {classification_result.get('level2')} -> {classification_result.get('level3')}, 耗时: {classification_time:.3f}s")
+            prompt = self._prepare_classification_prompt(user_input, snapshot)
+            response = await self.async_llm_client.dialog_async(prompt, task_type='classification')
             
+            classification_result = await asyncio.to_thread(
+                self._run_in_app_context, self._finish_classification, user_input, response, start_time, snapshot
+            )
+            self._cache_classification(user_input, snapshot.version, classification_result)
             return classification_result
             
         except Exception as e:
-            self.logger.error(f"用户输入分类失败: {str(e)}")
-            # 返回默认分类结果
-            return {
-                'level1': '信息查询',
-                'level1_definition': '解决用户对股票市场信息的查询需求',
-                'level2': '信息查询', 
-                'level3': '通用查询',
-                'level3_definition': '一些比较泛化和轻量级的问题',
-                'confidence': 0.5,
-                'classification_time_seconds': 0,
-                'error': str(e)
-            }
+            self.logger.error(f"异步用户输入分类失败: {str(e)}")
+            return self._get_error_classification(e)
+    
+    def _run_in_app_context(self, func, *args):
+        with self.app.app_context():
+            return func(*args)
     
-    def _save_classification_history(self, user_input, classification_result, classification_time):
-        """保存分类历史到数据库"""
+    def _classify_without_llm(self, user_input, start_time):
+        """
+        获取快照并尝试本地分类和分类缓存（访问数据库，异步版本在线程池中调用）
+        
+        Returns:
+            tuple: (快照, 本地分类或缓存命中的结果，未命中时为None)
+        """
+        with self.app.app_context():
+            snapshot = self.get_taxonomy_snapshot()
+            result = self._classify_locally(user_input, snapshot)
+            if result is None:
+                result = self._get_cached_classification(user_input, snapshot.version, start_time)
+            return snapshot, result
+    
+    # ==================== 分类标准快照 ====================
+    
+    def get_standards_version(self):
+        """
+        获取分类标准表的版本标识（条数、最大ID和、最近更新时间）
+        
+        其他进程修改分类标准后版本随之变化，快照会在下次检查时重建
+        """
         try:
-            # 获取当前使用的模型名称
-            current_model = self.llm_client.models.get('classification', self.llm_client.default_model)
+            count, id_sum, last_updated = db.session.query(
+                func.count(ClassificationStandard.id),
+                func.sum(ClassificationStandard.id),
+                func.max(ClassificationStandard.updated_at)
+            ).one()
+            return f"{count}:{id_sum}:{last_updated}"
+        except SQLAlchemyError as e:
+            self.logger.warning(f"获取分类标准版本失败: {str(e)}")
+            return None
+    
+    def get_taxonomy_snapshot(self):
+        """
+        获取当前的分类标准快照
+        
+        快照在进程内构建一次并整体替换；每隔 snapshot_check_interval 秒检查一次数据库中的版本，
+        用于感知其他进程对分类标准的修改，其余请求不访问数据库
+        """
+        snapshot = self._snapshot
+        now = time.time()
+        if snapshot is not None and now - snapshot.checked_at < self.snapshot_check_interval:
+            return snapshot
+        
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.time() - snapshot.checked_at < self.snapshot_check_interval:
+                return snapshot
+            
+            version = self.get_standards_version()
+            if snapshot is not None and version == snapshot.version:
+                snapshot.checked_at = time.time()
+                return snapshot
             
+            return self._rebuild_snapshot(version)
+    
+    def refresh_taxonomy_snapshot(self):
+        """分类标准变更后立即重建快照"""
+        with self._snapshot_lock:
+            return self._rebuild_snapshot(self.get_standards_version())
+    
+    def _rebuild_snapshot(self, version):
+        """从数据库构建新的快照并原子替换（调用方需持有 _snapshot_lock）"""
+        standards = self.get_classification_standards()
+        if 'error' in standards and self._snapshot is not None:
+            # 读取失败时继续使用旧快照，下次检查时重试
+            self._snapshot.checked_at = time.time()
+            return self._snapshot
+        
+        standards_text = self._format_classification_standards(standards)
+        prompt_prefix, prompt_suffix = self._build_classification_prompt_parts(standards_text)
+        
+        snapshot = TaxonomySnapshot(
+            version=version,
+            standards=standards,
+            standards_text=standards_text,
+            prompt_prefix=prompt_prefix,
+            prompt_suffix=prompt_suffix
+        )
+        self._snapshot = snapshot
+        self.logger.info(f"分类标准快照已更新，版本: {version}, 分类数: {standards['total_count']}, 标准文本长度: {len(standards_text)}")
+        return snapshot
+    
+    def _classify_locally(self, user_input, snapshot):
+        """本地快速分类，命中时记录分类历史并返回结果，否则返回None"""
+        if snapshot.version is None:
+            return None
+        
+        local_result = self.local_classifier.classify(user_input, snapshot.version, lambda: snapshot.standards)
+        if local_result is None:
+            return None
+        
+        self._save_classification_history(
+            user_input, local_result, local_result['classification_time_seconds'], model_used='local'
+        )
+        self.logger.info(f"本地分类命中({local_result['match_type']}): {local_result.get('level1')} -> {local_result.get('level2')} -> {local_result.get('level3')}")
+        return local_result
+    
+    def _get_cached_classification(self, user_input, standards_version, start_time):
+        """查询分类结果缓存，命中时记录分类历史并返回结果"""
+        if standards_version is None:
+            return None
+        
+        classification_result = self.result_cache.get(user_input, standards_version)
+        if classification_result is None:
+            return None
+        
+        classification_time = time.time() - start_time
+        classification_result['classification_time_seconds'] = round(classification_time, 3)
+        classification_result['cache_hit'] = True
+        self._save_classification_history(user_input, classification_result, classification_time)
+        
+        self.logger.info(f"命中分类缓存: {classification_result.get('level1')} -> {classification_result.get('level2')} -> {classification_result.get('level3')}")
+        return classification_result
+    
+    def _cache_classification(self, user_input, standards_version, classification_result):
+        """缓存成功解析的分类结果（解析失败的兜底分类不缓存）"""
+        if standards_version is None or classification_result.get('error') or not classification_result.get('confidence'):
+            return
+        self.result_cache.set(
+            user_input,
+            standards_version,
+            classification_result,
+            llm_seconds=classification_result.get('classification_time_seconds', 0.0)
+        )
+    
+    def _prepare_classification_prompt(self, user_input, snapshot):
+        """基于快照构建分类prompt（只做字符串拼接，不访问数据库）"""
+        prompt = snapshot.prompt_prefix + user_input + snapshot.prompt_suffix
+        self.logger.debug(f"构建的完整分类prompt (总长度: {len(prompt)}):\n{prompt}")
+        return prompt
+    
+    def _finish_classification(self, user_input, response, start_time, snapshot):
+        """解析LLM分类响应（按构建prompt时使用的快照校验）、记录耗时并保存分类历史"""
+        # 解析分类结果
+        classification_result = self._parse_classification_result(response, snapshot)
+        
+        # 计算分类耗时
+        classification_time = time.time() - start_time
+        classification_result['classification_time_seconds'] = round(classification_time, 3)
+        
+        # 保存分类历史
+        self._save_classification_history(user_input, classification_result, classification_time)
+        
+        self.logger.info(f"分类完成: {classification_result.get('level1')} -> {classification_result.get('level2')} -> {classification_result.get('level3')}, 耗时: {classification_time:.3f}s")
+        
+        return classification_result
+    
+    def _get_error_classification(self, error):
+        """分类失败时返回的默认分类结果"""
+        return {
+            'level1': '信息查询',
+            'level1_definition': '解决用户对股票市场信息的查询需求',
+            'level2': '信息查询', 
+            'level3': '通用查询',
+            'level3_definition': '一些比较泛化和轻量级的问题',
+            'confidence': 0.5,
+            'classification_time_seconds': 0,
+            'error': str(error)
+        }
+    
+    def _save_classification_history(self, user_input, classification_result, classification_time, model_used=None):
+        """保存分类历史到数据库（启用异步写入时放入后台批量写入队列）"""
+        # 获取当前使用的模型名称（本地分类记录为 local）
+        current_model = model_used or self.llm_client.models.get('classification', self.llm_client.default_model)
+        result_json = json.dumps(classification_result, ensure_ascii=False)
+        
+        if classification_history_writer.submit(
+            user_input, result_json, classification_result.get('confidence'), classification_time, current_model
+        ):
+            return
+        
+        try:
             history = ClassificationHistory(
                 user_input=user_input,
-                classification_result=json.dumps(classification_result, ensure_ascii=False),
+                classification_result=result_json,
                 confidence=classification_result.get('confidence'),
                 classification_time=classification_time,
                 model_used=current_model
@@ -100,28 +332,24 @@ class ClassificationService:
             self.logger.error(f"保存分类历史失败: {str(e)}")
             db.session.rollback()
     
-    def _build_classification_prompt(self, user_input, standards):
-        """构建分类prompt"""
-        
-        # 记录用户输入
-        self.logger.info(f"构建分类prompt - 用户输入: '{user_input}' (长度: {len(user_input)})")
-        
-        # 从数据库获取分类标准
-        classification_standards_text = self._format_classification_standards(standards)
+    def _build_classification_prompt_parts(self, classification_standards_text):
+        """构建分类prompt中用户输入之前和之后的固定部分"""
         
         # 记录分类标准
         self.logger.debug(f"分类标准文本长度: {len(classification_standards_text)}")
         
-        prompt = f"""请根据以下分类标准，对用户输入进行准确分类。
+        prompt_prefix = f"""请根据以下分类标准，对用户输入进行准确分类。
 
 分类标准：
 {classification_standards_text}
 
-用户输入：{user_input}
+用户输入："""
+        
+        prompt_suffix = """
 
 请分析用户输入的问题类型，并严格按照以下JSON格式返回分类结果：
 
-{{
+{
     "level1": "一级分类名称",
     "level2": "二级分类名称", 
     "level3": "三级分类名称",
@@ -130,7 +358,7 @@ class ClassificationService:
     "level3_definition": "三级分类定义",
     "confidence": 0.95,
     "reasoning": "分类理由和分析过程"
-}}
+}
 
 注意：
 1. 请仔细分析用户问题的核心意图
@@ -138,29 +366,23 @@ class ClassificationService:
 3. 必须选择已有的分类，不能创建新分类
 4. 如果不确定，选择最相近的分类"""
 
-        # 记录完整的prompt
-        self.logger.info(f"构建的完整prompt (总长度: {len(prompt)}):")
-        self.logger.info("=" * 50)
-        self.logger.info(prompt)
-        self.logger.info("=" * 50)
-
-        return prompt
+        return prompt_prefix, prompt_suffix
     
     def _format_classification_standards(self, standards):
         """从数据库格式化分类标准为文本"""
         try:
-            formatted_text = ""
+            parts = []
             
             # 格式化输出
             for standard in standards['standards']:
-                formatted_text += f"\n【{standard['level1']}】（{standard['level1_definition']}）\n"
-                
-                formatted_text += f"  └─ {standard['level2']}\n"
-                
-                formatted_text += f"     └─ {standard['level3']}: {standard['level3_definition']}\n"
-                formatted_text += f"        示例: {standard['examples']}\n"
+                parts.append(
+                    f"\n【{standard['level1']}】（{standard['level1_definition']}）\n"
+                    f"  └─ {standard['level2']}\n"
+                    f"     └─ {standard['level3']}: {standard['level3_definition']}\n"
+                    f"        示例: {standard['examples']}\n"
+                )
             
-            return formatted_text
+            return "".join(parts)
             
         except SQLAlchemyError as e:
             self.logger.error(f"从数据库获取分类标准失败: {str(e)}")
@@ -202,8 +424,8 @@ class ClassificationService:
         示例: XX公司什么时候上市
 """
     
-    def _parse_classification_result(self, classification_text):
-        """解析分类结果"""
+    def _parse_classification_result(self, classification_text, snapshot):
+        """解析分类结果（snapshot: 构建分类prompt时使用的分类标准快照）"""
         try:
             self.logger.debug(f"原始分类响应: {classification_text}")
             
@@ -241,12 +463,12 @@ class ClassificationService:
                                 raise ValueError(f"缺少必需字段: {field}")
                         
                         # 验证分类是否在数据库中存在
-                        if self._validate_classification_exists(result['level1'], result['level2'], result['level3']):
+                        if self._validate_classification_exists(snapshot, result['level1'], result['level2'], result['level3']):
                             # 添加原始响应
                             result['raw_response'] = classification_text
                             
                             # 确保所有字段都存在
-                            self._fill_missing_fields(result)
+                            self._fill_missing_fields(snapshot, result)
                             
                             self.logger.info(f"JSON解析成功: {result['level1']} -> {result['level2']} -> {result['level3']}")
                             return result
@@ -265,7 +487,7 @@ class ClassificationService:
             
             # 使用正则表达式尝试提取分类信息
             try:
-                result = self._regex_parse_classification(classification_text)
+                result = self._regex_parse_classification(classification_text, snapshot)
                 if result:
                     return result
                 
@@ -273,59 +495,34 @@ class ClassificationService:
                 self.logger.error(f"正则表达式解析失败: {regex_error}")
             
             # 最后的兜底方案 - 返回数据库中的第一个分类
-            return self._get_fallback_classification(classification_text)
+            return self._get_fallback_classification(classification_text, snapshot)
     
-    def _validate_classification_exists(self, level1, level2, level3):
-        """验证分类是否在数据库中存在"""
-        try:
-            exists = ClassificationStandard.query.filter_by(
-                level1=level1,
-                level2=level2, 
-                level3=level3
-            ).first() is not None
-            
-            return exists
-            
-        except SQLAlchemyError as e:
-            self.logger.error(f"验证分类存在性失败: {str(e)}")
-            return False
+    def _validate_classification_exists(self, snapshot, level1, level2, level3):
+        """验证分类是否存在（查询快照中的分类索引）"""
+        return snapshot.lookup(level1, level2, level3) is not None
     
-    def _fill_missing_fields(self, result):
+    def _fill_missing_fields(self, snapshot, result):
         """填充缺失的字段"""
-        try:
-            # 从数据库获取完整信息
-            standard = ClassificationStandard.query.filter_by(
-                level1=result['level1'],
-                level2=result['level2'],
-                level3=result['level3']
-            ).first()
-            
-            if standard:
-                result['level1_definition'] = result.get('level1_definition') or standard.level1_definition
-                result['level2_definition'] = result.get('level2_definition') or standard.level1_definition
-                result['level3_definition'] = result.get('level3_definition') or standard.level3_definition
-            else:
-                # 使用默认值
-                result['level1_definition'] = result.get('level1_definition') or result.get('level1', '未知')
-                result['level2_definition'] = result.get('level2_definition') or result.get('level2', '未知')
-                result['level3_definition'] = result.get('level3_definition') or result.get('level3', '未知')
-            
-            # 其他默认字段
-            if 'confidence' not in result:
-                result['confidence'] = 0.8
-            if 'reasoning' not in result:
-                result['reasoning'] = '自动解析结果'
-                
-        except SQLAlchemyError as e:
-            self.logger.error(f"填充字段信息失败: {str(e)}")
+        # 从快照的分类索引获取完整信息
+        standard = snapshot.lookup(result['level1'], result['level2'], result['level3'])
+        
+        if standard:
+            result['level1_definition'] = result.get('level1_definition') or standard['level1_definition']
+            result['level2_definition'] = result.get('level2_definition') or standard['level1_definition']
+            result['level3_definition'] = result.get('level3_definition') or standard['level3_definition']
+        else:
             # 使用默认值
-            result['level1_definition'] = result.get('level1', '未知')
-            result['level2_definition'] = result.get('level2', '未知')  
-            result['level3_definition'] = result.get('level3', '未知')
+            result['level1_definition'] = result.get('level1_definition') or result.get('level1', '未知')
+            result['level2_definition'] = result.get('level2_definition') or result.get('level2', '未知')
+            result['level3_definition'] = result.get('level3_definition') or result.get('level3', '未知')
+        
+        # 其他默认字段
+        if 'confidence' not in result:
             result['confidence'] = 0.8
+        if 'reasoning' not in result:
             result['reasoning'] = '自动解析结果'
     
-    def _regex_parse_classification(self, classification_text):
+    def _regex_parse_classification(self, classification_text, snapshot):
         """使用正则表达式解析分类"""
         import re
         
@@ -353,7 +550,7 @@ class ClassificationService:
         
         if level1 and level2 and level3:
             # 验证分类是否在数据库中存在
-            if self._validate_classification_exists(level1, level2, level3):
+            if self._validate_classification_exists(snapshot, level1, level2, level3):
                 result = {
                     'level1': level1,
                     'level2': level2,
@@ -362,7 +559,7 @@ class ClassificationService:
                     'reasoning': '正则表达式解析结果',
                     'raw_response': classification_text
                 }
-                self._fill_missing_fields(result)
+                self._fill_missing_fields(snapshot, result)
                 return result
         
         return None
@@ -377,51 +574,36 @@ class ClassificationService:
                 return match.group(1).strip()
         return None
     
-    def _get_fallback_classification(self, classification_text):
+    def _get_fallback_classification(self, classification_text, snapshot):
         """获取兜底分类"""
-        try:
-            # 获取数据库中的第一个"信息查询"分类
-            fallback = ClassificationStandard.query.filter_by(level1='信息查询').first()
-            
-            if fallback:
-                return {
-                    'level1': fallback.level1,
-                    'level2': fallback.level2,
-                    'level3': fallback.level3,
-                    'level1_definition': fallback.level1_definition,
-                    'level2_definition': fallback.level1_definition,
-                    'level3_definition': fallback.level3_definition,
-                    'confidence': 0.0,
-                    'reasoning': '解析失败，使用兜底分类',
-                    'raw_response': classification_text
-                }
-            else:
-                # 如果数据库中也没有，使用硬编码的默认值
-                return {
-                    'level1': '信息查询',
-                    'level2': '通用查询',
-                    'level3': '通用查询',
-                    'level1_definition': '通用查询',
-                    'level2_definition': '通用查询',
-                    'level3_definition': '一些比较泛化和轻量级的问题',
-                    'confidence': 0.0,
-                    'reasoning': '解析失败，使用默认分类',
-                    'raw_response': classification_text
-                }
-                
-        except SQLAlchemyError as e:
-            self.logger.error(f"获取兜底分类失败: {str(e)}")
+        # 快照分类索引中的第一个"信息查询"分类
+        fallback = snapshot.fallback_standard
+        
+        if fallback:
             return {
-                'level1': '信息查询',
-                'level2': '通用查询',
-                'level3': '通用查询',
-                'level1_definition': '通用查询',
-                'level2_definition': '通用查询',
-                'level3_definition': '一些比较泛化和轻量级的问题',
+                'level1': fallback['level1'],
+                'level2': fallback['level2'],
+                'level3': fallback['level3'],
+                'level1_definition': fallback['level1_definition'],
+                'level2_definition': fallback['level1_definition'],
+                'level3_definition': fallback['level3_definition'],
                 'confidence': 0.0,
-                'reasoning': '解析失败，使用默认分类',
+                'reasoning': '解析失败，使用兜底分类',
                 'raw_response': classification_text
             }
+        
+        # 如果分类标准中也没有，使用硬编码的默认值
+        return {
+            'level1': '信息查询',
+            'level2': '通用查询',
+            'level3': '通用查询',
+            'level1_definition': '通用查询',
+            'level2_definition': '通用查询',
+            'level3_definition': '一些比较泛化和轻量级的问题',
+            'confidence': 0.0,
+            'reasoning': '解析失败，使用默认分类',
+            'raw_response': classification_text
+        }
     
     def get_classification_standards(self):
         """获取当前分类标准"""
@@ -483,6 +665,8 @@ class ClassificationService:
                 db.session.add(new_standard)
             
             db.session.commit()
+            self.result_cache.invalidate()
+            self.refresh_taxonomy_snapshot()
             self.logger.info(f"分类标准已更新，共 {len(new_standards)} 条")
             
             return {
@@ -508,6 +692,8 @@ class ClassificationService:
             deleted_count = ClassificationStandard.query.filter_by(is_default=False).delete()
             
             db.session.commit()
+            self.result_cache.invalidate()
+            self.refresh_taxonomy_snapshot()
             
             # 获取剩余的默认标准数量
             default_count = ClassificationStandard.query.filter_by(is_default=True).count()
@@ -534,6 +720,8 @@ class ClassificationService:
     def get_classification_history(self, limit=100):
         """获取分类历史记录"""
         try:
+            # 先写入异步队列中的记录，避免刚完成的分类不在列表中
+            classification_history_writer.flush(timeout=2.0)
             history = ClassificationHistory.query.order_by(
                 ClassificationHistory.created_at.desc()
             ).limit(limit).all()
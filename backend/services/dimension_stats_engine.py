@@ -0,0 +1,174 @@
+"""
+维度统计计算引擎
+把所有 (分类, 维度, 来源) 分组的得分按列存放（分组号、分值、次数三个数组），
+折叠成 分组 x 分值 的次数矩阵后一次性向量化计算每组的均值、标准差、分位数、
+百分比区间和得分分布；
+输入既可以是汇总表中的得分分布（分值+次数），也可以是逐条得分（次数为1）。
+安装了 numpy 时使用 numpy 计算，否则退回纯Python实现（结果一致）
+"""
+import math
+import os
+
+try:
+    import numpy as np
+except ImportError:  # numpy为可选依赖
+    np = None
+
+from utils.logger import get_logger
+
+
+class DimensionStatsEngine:
+    """按分组向量化计算维度得分统计"""
+
+    # 输出的分位数（按次数加权的最近秩分位数）
+    PERCENTILES = (25, 50, 75, 90)
+    # 百分比分数的分布区间下限：poor < 40 <= fair < 60 <= good < 80 <= excellent
+    DISTRIBUTION_EDGES = (40, 60, 80)
+    DISTRIBUTION_LABELS = ('poor', 'fair', 'good', 'excellent')
+    # 分组 x 分值 矩阵的最大单元数，超出时（分值过于分散）改用纯Python计算
+    MAX_MATRIX_CELLS = 20_000_000
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self.use_numpy = np is not None and os.getenv('DIMENSION_STATS_USE_NUMPY', 'true').lower() == 'true'
+
+    def compute(self, group_ids, values, counts, max_scores):
+        """
+        计算每个分组的得分统计
+
+        Args:
+            group_ids: 每行所属的分组号（0 ~ len(max_scores)-1）
+            values: 每行的得分
+            counts: 每行得分出现的次数
+            max_scores: 每个分组的满分
+
+        Returns:
+            list: 与 max_scores 对应的统计字典，没有得分或满分不大于0的分组为None
+        """
+        if self.use_numpy:
+            return self._compute_numpy(group_ids, values, counts, max_scores)
+        return self._compute_python(group_ids, values, counts, max_scores)
+
+    def _build_result(self, count, score_sum, score_sq_sum, min_score, max_score, max_possible, percentiles, buckets):
+        avg_score = score_sum / count
+        return {
+            'count': int(count),
+            'avg_score': avg_score,
+            'std_score': math.sqrt(max(score_sq_sum / count - avg_score * avg_score, 0.0)),
+            'min_score': min_score,
+            'max_score': max_score,
+            'avg_percentage': avg_score / max_possible * 100,
+            'min_percentage': min_score / max_possible * 100,
+            'max_percentage': max_score / max_possible * 100,
+            'percentiles': {f'p{p}': value for p, value in zip(self.PERCENTILES, percentiles)},
+            'distribution': {
+                label: round(bucket / count * 100, 1)
+                for label, bucket in zip(reversed(self.DISTRIBUTION_LABELS), reversed(buckets))
+            }
+        }
+
+    # ==================== numpy 实现 ====================
+
+    def _compute_numpy(self, group_ids, values, counts, max_scores):
+        group_count = len(max_scores)
+        groups = np.asarray(group_ids, dtype=np.int64)
+        scores = np.asarray(values, dtype=np.float64)
+        weights = np.asarray(counts, dtype=np.float64)
+        max_possible = np.asarray(max_scores, dtype=np.float64)
+
+        valid = (weights > 0) & (max_possible[groups] > 0)
+        groups, scores, weights = groups[valid], scores[valid], weights[valid]
+        if not len(groups):
+            return [None] * group_count
+
+        # 维度得分的取值很少：先折叠成 分组 x 分值 的次数矩阵，后续计算都在矩阵上进行
+        distinct_scores, score_index = np.unique(scores, return_inverse=True)
+        if group_count * len(distinct_scores) > self.MAX_MATRIX_CELLS:
+            self.logger.warning(f"维度得分取值过多({len(distinct_scores)})，改用纯Python计算")
+            return self._compute_python(group_ids, values, counts, max_scores)
+        histogram = np.bincount(
+            groups * len(distinct_scores) + score_index, weights=weights,
+            minlength=group_count * len(distinct_scores)
+        ).reshape(group_count, len(distinct_scores))
+
+        totals = histogram.sum(axis=1)
+        sums = histogram @ distinct_scores
+        sq_sums = histogram @ (distinct_scores * distinct_scores)
+
+        present = histogram > 0
+        min_index = present.argmax(axis=1)
+        max_index = len(distinct_scores) - 1 - present[:, ::-1].argmax(axis=1)
+
+        cumulative = histogram.cumsum(axis=1)
+        percentile_values = []
+        for p in self.PERCENTILES:
+            rank = np.maximum(np.ceil(totals * p / 100.0), 1.0)
+            index = (cumulative < rank[:, None] - 0.5).sum(axis=1)
+            percentile_values.append(distinct_scores[np.minimum(index, len(distinct_scores) - 1)])
+
+        # 每个 (分组, 分值) 的百分比分数所在区间
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentages = distinct_scores[None, :] / max_possible[:, None] * 100
+        buckets = np.digitize(percentages, self.DISTRIBUTION_EDGES)
+        distribution = np.stack(
+            [(histogram * (buckets == bucket)).sum(axis=1) for bucket in range(len(self.DISTRIBUTION_LABELS))],
+            axis=1
+        )
+
+        results = []
+        for group in range(group_count):
+            if totals[group] <= 0:
+                results.append(None)
+                continue
+            results.append(self._build_result(
+                float(totals[group]), float(sums[group]), float(sq_sums[group]),
+                float(distinct_scores[min_index[group]]), float(distinct_scores[max_index[group]]),
+                float(max_possible[group]),
+                [float(values_[group]) for values_ in percentile_values],
+                [float(bucket) for bucket in distribution[group]]
+            ))
+        return results
+
+    # ==================== 纯Python实现 ====================
+
+    def _compute_python(self, group_ids, values, counts, max_scores):
+        grouped = [{} for _ in max_scores]
+        for group, score, count in zip(group_ids, values, counts):
+            if count > 0 and max_scores[group] > 0:
+                grouped[group][score] = grouped[group].get(score, 0) + count
+
+        results = []
+        for score_counts, max_possible in zip(grouped, max_scores):
+            if not score_counts:
+                results.append(None)
+                continue
+
+            ordered = sorted(score_counts.items())
+            total = sum(score_counts.values())
+            score_sum = sum(score * count for score, count in ordered)
+            score_sq_sum = sum(score * score * count for score, count in ordered)
+
+            percentiles = []
+            for p in self.PERCENTILES:
+                rank = max(math.ceil(total * p / 100.0), 1)
+                cumulative = 0
+                for score, count in ordered:
+                    cumulative += count
+                    if cumulative >= rank:
+                        percentiles.append(float(score))
+                        break
+
+            buckets = [0] * len(self.DISTRIBUTION_LABELS)
+            for score, count in ordered:
+                percentage = score / max_possible * 100
+                buckets[sum(percentage >= edge for edge in self.DISTRIBUTION_EDGES)] += count
+
+            results.append(self._build_result(
+                total, score_sum, score_sq_sum, float(ordered[0][0]), float(ordered[-1][0]), max_possible,
+                percentiles, buckets
+            ))
+        return results
+
+
+# 创建全局实例
+dimension_stats_engine = DimensionStatsEngine()
@@ -0,0 +1,114 @@
+"""
+维度权重注册表
+一次性加载所有分类在 evaluation_standards 中配置的维度权重和最大分数并常驻内存，
+评估计分只做内存计算；评估标准变更时由写入方调用 invalidate() 使其重新加载
+"""
+import os
+import threading
+import time
+
+from flask import has_app_context
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.classification import db, EvaluationStandard
+from utils.logger import get_logger
+
+
+class DimensionWeightRegistry:
+    """分类 -> 维度 -> {weight, max_score} 的内存注册表"""
+
+    def __init__(self, app=None):
+        self.logger = get_logger(__name__)
+        self.app = None
+        # 兜底的过期时间，用于感知其他进程对评估标准的修改
+        self.ttl_seconds = float(os.getenv('DIMENSION_WEIGHT_REGISTRY_TTL', '300'))
+
+        self._lock = threading.Lock()
+        self._weights = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._stats = {'loads': 0, 'invalidations': 0, 'lookups': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """初始化Flask应用（在没有应用上下文的线程中加载时使用）"""
+        self.app = app
+
+    def _load(self):
+        """从数据库加载所有分类的维度配置"""
+        rows = db.session.query(
+            EvaluationStandard.level2_category,
+            EvaluationStandard.dimension,
+            EvaluationStandard.weight,
+            EvaluationStandard.max_score
+        ).all()
+
+        weights = {}
+        for level2_category, dimension_name, weight, max_score in rows:
+            weights.setdefault(level2_category, {})[dimension_name] = {
+                'weight': weight or 1.0,
+                'max_score': max_score or 2
+            }
+        return weights
+
+    def _ensure_loaded(self):
+        weights = self._weights
+        if weights is not None and time.time() - self._loaded_at < self.ttl_seconds:
+            return weights
+
+        with self._lock:
+            if self._weights is not None and time.time() - self._loaded_at < self.ttl_seconds:
+                return self._weights
+
+            generation = self._generation
+            if has_app_context() or self.app is None:
+                weights = self._load()
+            else:
+                with self.app.app_context():
+                    weights = self._load()
+
+            # 加载期间发生了失效则不覆盖（下次访问重新加载）
+            if generation == self._generation:
+                self._weights = weights
+                self._loaded_at = time.time()
+            self._stats['loads'] += 1
+            self.logger.info(f"维度权重注册表已加载，分类数: {len(weights)}")
+            return weights
+
+    def get_category_weights(self, level2_category):
+        """
+        获取分类的维度配置
+
+        Returns:
+            dict: {维度名称: {'weight': 权重, 'max_score': 最大分数}}，未配置时返回空字典
+        """
+        self._stats['lookups'] += 1
+        try:
+            return self._ensure_loaded().get(level2_category, {})
+        except SQLAlchemyError as e:
+            self.logger.error(f"加载维度权重失败: {str(e)}")
+            return {}
+
+    def invalidate(self):
+        """使注册表失效（评估标准变更后调用）"""
+        with self._lock:
+            self._weights = None
+            self._generation += 1
+            self._stats['invalidations'] += 1
+        self.logger.info("维度权重注册表已失效")
+
+    def get_stats(self):
+        """获取注册表统计信息"""
+        weights = self._weights
+        stats = dict(self._stats)
+        stats['loaded'] = weights is not None
+        stats['categories'] = len(weights) if weights is not None else 0
+        stats['generation'] = self._generation
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
+
+
+# 创建全局实例
+dimension_weight_registry = DimensionWeightRegistry()
@@ -6,6 +6,8 @@
 import json
 from models.classification import db
 from models.evaluation_dimension import EvaluationDimension, CategoryDimensionMapping
+from .dimension_weight_registry import dimension_weight_registry
+from utils.database_operations import category_template_cache
 
 
 class EvaluationDimensionService:
@@ -39,6 +41,8 @@ class EvaluationDimensionService:
             dimension = EvaluationDimension.from_dict(data)
             db.session.add(dimension)
             db.session.commit()
+            dimension_weight_registry.invalidate()
+            category_template_cache.bump()
             return dimension.to_dict()
         except Exception as e:
             db.session.rollback()
@@ -67,6 +71,8 @@ class EvaluationDimensionService:
                 dimension.evaluation_criteria_json = evaluation_criteria_json
             
             db.session.commit()
+            dimension_weight_registry.invalidate()
+            category_template_cache.bump()
             return dimension.to_dict()
         except Exception as e:
             db.session.rollback()
@@ -86,6 +92,8 @@ class EvaluationDimensionService:
             # 删除维度
             db.session.delete(dimension)
             db.session.commit()
+            dimension_weight_registry.invalidate()
+            category_template_cache.bump()
             return True
         except Exception as e:
             db.session.rollback()
@@ -137,6 +145,8 @@ class CategoryDimensionService:
                 db.session.add(mapping)
             
             db.session.commit()
+            dimension_weight_registry.invalidate()
+            category_template_cache.bump()
             return True
         except Exception as e:
             db.session.rollback()
@@ -162,6 +172,8 @@ class CategoryDimensionService:
             )
             db.session.add(mapping)
             db.session.commit()
+            dimension_weight_registry.invalidate()
+            category_template_cache.bump()
             return mapping.to_dict()
         except Exception as e:
             db.session.rollback()
@@ -179,6 +191,8 @@ class CategoryDimensionService:
             if mapping:
                 db.session.delete(mapping)
                 db.session.commit()
+                dimension_weight_registry.invalidate()
+                category_template_cache.bump()
                 return True
             return False
         except Exception as e:
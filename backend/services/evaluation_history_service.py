@@ -1,11 +1,23 @@
 """
 评估历史管理服务类
 """
+import base64
 import json
+import os
+import time
 from datetime import datetime, timedelta
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func, desc, asc, or_
-from models.classification import db, EvaluationHistory
+from sqlalchemy import func, desc, asc, or_, and_, tuple_, exists, literal_column, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import load_only, selectinload
+from models.classification import (
+    db, EvaluationHistory, EvaluationDedupClaim, EvaluationDailyStat, EvaluationDimensionDailyStat,
+    EvaluationDimensionScore, EvaluationCriteriaText
+)
+from services.evaluation_stats_rollup import evaluation_stats_rollup
+from services.dimension_stats_engine import dimension_stats_engine
+from services.dimension_weight_registry import dimension_weight_registry
+from services.evaluation_search import evaluation_search
 from utils.logger import get_logger
 
 class EvaluationHistoryService:
@@ -13,6 +25,12 @@ class EvaluationHistoryService:
     
     def __init__(self, app=None):
         self.logger = get_logger(__name__)
+        # 相同内容（用户问题+模型回答+参考答案）在该时间窗口内只保存一次
+        self.dedup_window_seconds = int(os.getenv('EVALUATION_DEDUP_WINDOW_SECONDS', '300'))
+        self._claims_pruned_at = datetime.min
+        # badcase统计的结果缓存时间（秒），0表示不缓存
+        self.badcase_stats_memo_ttl = float(os.getenv('BADCASE_STATS_MEMO_TTL', '10'))
+        self._badcase_stats_memo = None
         
         if app is not None:
             self.init_app(app)
@@ -33,66 +51,34 @@ class EvaluationHistoryService:
             dict: 保存结果
         """
         try:
-            # ====== 新增：重复记录检测 ======
-            user_input = evaluation_data.get('user_input')
-            model_answer = evaluation_data.get('model_answer')
-            
-            if user_input and model_answer:
-                # 检查最近5分钟内是否有相同内容的记录
-                five_minutes_ago = datetime.utcnow() - timedelta(minutes=5)
-                existing_record = EvaluationHistory.query.filter(
-                    EvaluationHistory.user_input == user_input,
-                    EvaluationHistory.model_answer == model_answer,
-                    EvaluationHistory.created_at >= five_minutes_ago
-                ).first()
-                
+            # ====== 重复记录检测：按内容哈希查找去重窗口内的记录 ======
+            content_hash = None
+            if evaluation_data.get('user_input') and evaluation_data.get('model_answer'):
+                content_hash = EvaluationHistory.compute_content_hash(
+                    evaluation_data.get('user_input'),
+                    evaluation_data.get('model_answer'),
+                    evaluation_data.get('reference_answer')
+                )
+                existing_record = self._find_recent_duplicate(content_hash)
                 if existing_record:
-                    self.logger.warning(f"检测到重复记录，返回现有记录ID: {existing_record.id}")
-                    return {
-                        'success': True,
-                        'message': '检测到重复记录，返回现有记录',
-                        'history_id': existing_record.id,
-                        'data': existing_record.to_dict(),
-                        'is_duplicate': True
-                    }
+                    return self._duplicate_result(existing_record)
             # ====== 重复检测结束 ======
             
-            # 创建评估历史记录
-            history_data = {
-                'user_input': evaluation_data.get('user_input'),
-                'model_answer': evaluation_data.get('model_answer'),
-                'reference_answer': evaluation_data.get('reference_answer'),
-                'question_time': evaluation_data.get('question_time'),
-                # 兼容前端发送的字段名
-                'evaluation_criteria': evaluation_data.get('evaluation_criteria') or evaluation_data.get('evaluation_criteria_used'),
-                # 兼容前端发送的字段名
-                'total_score': evaluation_data.get('total_score') or evaluation_data.get('score', 0.0),
-                'dimensions': evaluation_data.get('dimensions', {}),
-                'reasoning': evaluation_data.get('reasoning'),
-                'evaluation_time_seconds': evaluation_data.get('evaluation_time_seconds'),
-                'model_used': evaluation_data.get('model_used'),
-                'raw_response': evaluation_data.get('raw_response'),
-                'uploaded_images': evaluation_data.get('uploaded_images', []),  # 添加图片信息
-                # 添加badcase相关字段
-                'is_badcase': evaluation_data.get('is_badcase', False),
-                'ai_is_badcase': evaluation_data.get('ai_is_badcase', False),
-                'human_is_badcase': evaluation_data.get('human_is_badcase', False),
-                'badcase_reason': evaluation_data.get('badcase_reason', '')
-            }
-            
-            # 如果有分类结果，添加分类信息
-            if classification_result:
-                history_data.update({
-                    'classification_level1': classification_result.get('level1'),
-                    'classification_level2': classification_result.get('level2'),
-                    'classification_level3': classification_result.get('level3')
-                })
-            
             # 创建数据库记录
-            history_record = EvaluationHistory.from_dict(history_data)
+            history_record = self._build_history_record(evaluation_data, classification_result)
             
             # 保存到数据库
             db.session.add(history_record)
+            if content_hash:
+                # 在同一事务中占位，并发写入相同内容时只有一个能成功
+                db.session.flush()
+                holder_id = self._claim_content(content_hash, history_record.id)
+                if holder_id is not None:
+                    db.session.rollback()
+                    existing_record = db.session.get(EvaluationHistory, holder_id)
+                    if existing_record:
+                        return self._duplicate_result(existing_record)
+                    raise SQLAlchemyError(f'重复内容占位的记录不存在: {holder_id}')
             db.session.commit()
             
             self.logger.info(f"成功保存评估历史记录，ID: {history_record.id}")
@@ -119,9 +105,345 @@ class EvaluationHistoryService:
                 'message': f'保存评估历史时发生错误: {str(e)}'
             }
     
+    # ==================== 重复检测 ====================
+    
+    def _duplicate_result(self, existing_record):
+        self.logger.warning(f"检测到重复记录，返回现有记录ID: {existing_record.id}")
+        return {
+            'success': True,
+            'message': '检测到重复记录，返回现有记录',
+            'history_id': existing_record.id,
+            'data': existing_record.to_dict(),
+            'is_duplicate': True
+        }
+    
+    def _find_recent_duplicate(self, content_hash):
+        """查找去重窗口内相同内容的记录（走 content_hash + created_at 索引）"""
+        window_start = datetime.utcnow() - timedelta(seconds=self.dedup_window_seconds)
+        return EvaluationHistory.query.filter(
+            EvaluationHistory.content_hash == content_hash,
+            EvaluationHistory.created_at >= window_start
+        ).order_by(EvaluationHistory.id).first()
+    
+    def _claim_content(self, content_hash, history_id):
+        """
+        在 evaluation_dedup_claims 中为内容哈希占位（在调用方的事务中执行，不提交）
+        
+        已有占位过期或对应记录已删除时接管占位；否则占位失败
+        
+        Returns:
+            int: 占位失败时返回持有占位的记录ID，成功时返回None
+        """
+        now = datetime.utcnow()
+        self._prune_expired_claims(now)
+        
+        stmt = sqlite_insert(EvaluationDedupClaim).values(
+            content_hash=content_hash,
+            history_id=history_id,
+            expires_at=now + timedelta(seconds=self.dedup_window_seconds)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EvaluationDedupClaim.content_hash],
+            set_={'history_id': stmt.excluded.history_id, 'expires_at': stmt.excluded.expires_at},
+            where=or_(
+                EvaluationDedupClaim.expires_at < now,
+                # 引用冲突行的 history_id（upsert 的 WHERE 中无法自动关联子查询）
+                ~exists().where(EvaluationHistory.id == literal_column('evaluation_dedup_claims.history_id'))
+            )
+        )
+        if db.session.execute(stmt).rowcount:
+            return None
+        return db.session.query(EvaluationDedupClaim.history_id).filter(
+            EvaluationDedupClaim.content_hash == content_hash
+        ).scalar()
+    
+    def _prune_expired_claims(self, now):
+        """定期清理过期的占位（每个去重窗口最多一次）"""
+        if (now - self._claims_pruned_at).total_seconds() < self.dedup_window_seconds:
+            return
+        self._claims_pruned_at = now
+        db.session.query(EvaluationDedupClaim).filter(
+            EvaluationDedupClaim.expires_at < now
+        ).delete(synchronize_session=False)
+    
+    def _build_history_record(self, evaluation_data, classification_result=None):
+        """根据评估结果数据和分类结果构建评估历史记录对象（不提交）"""
+        # 创建评估历史记录
+        history_data = {
+            'user_input': evaluation_data.get('user_input'),
+            'model_answer': evaluation_data.get('model_answer'),
+            'reference_answer': evaluation_data.get('reference_answer'),
+            'question_time': evaluation_data.get('question_time'),
+            # 兼容前端发送的字段名
+            'evaluation_criteria': evaluation_data.get('evaluation_criteria') or evaluation_data.get('evaluation_criteria_used'),
+            # 兼容前端发送的字段名
+            'total_score': evaluation_data.get('total_score') or evaluation_data.get('score', 0.0),
+            'dimensions': evaluation_data.get('dimensions', {}),
+            'reasoning': evaluation_data.get('reasoning'),
+            'evaluation_time_seconds': evaluation_data.get('evaluation_time_seconds'),
+            'model_used': evaluation_data.get('model_used'),
+            'raw_response': evaluation_data.get('raw_response'),
+            'uploaded_images': evaluation_data.get('uploaded_images', []),  # 添加图片信息
+            # 添加badcase相关字段
+            'is_badcase': evaluation_data.get('is_badcase', False),
+            'ai_is_badcase': evaluation_data.get('ai_is_badcase', False),
+            'human_is_badcase': evaluation_data.get('human_is_badcase', False),
+            'badcase_reason': evaluation_data.get('badcase_reason', '')
+        }
+        
+        # 如果有分类结果，添加分类信息
+        if classification_result:
+            history_data.update({
+                'classification_level1': classification_result.get('level1'),
+                'classification_level2': classification_result.get('level2'),
+                'classification_level3': classification_result.get('level3')
+            })
+        
+        record = EvaluationHistory.from_dict(history_data)
+        self.sync_dimension_scores(record, EvaluationDimensionScore.SOURCE_AI)
+        return record
+    
+    def sync_dimension_scores(self, record, source):
+        """按记录中的维度评分JSON重建该来源的规范化维度得分（随记录一起提交）"""
+        if source == EvaluationDimensionScore.SOURCE_AI:
+            scores = EvaluationDimensionScore.parse_scores(record.dimensions_json)
+        else:
+            scores = EvaluationDimensionScore.parse_scores(record.human_dimensions_json)
+        category_weights = dimension_weight_registry.get_category_weights(record.classification_level2) if scores else {}
+        
+        dimension_scores = [row for row in record.dimension_scores if row.source != source]
+        dimension_scores.extend(
+            EvaluationDimensionScore(
+                source=source,
+                dimension=dimension,
+                score=score,
+                max_score=category_weights.get(dimension, {}).get('max_score')
+            )
+            for dimension, score in scores.items()
+        )
+        record.dimension_scores = dimension_scores
+    
+    def save_evaluation_results_bulk(self, entries):
+        """
+        批量保存评估结果到历史记录（一次查询做重复检测，一次提交写入所有记录）
+        
+        Args:
+            entries: [(evaluation_data, classification_result), ...]
+            
+        Returns:
+            dict: 保存结果，history_ids 与 entries 一一对应（保存失败的项为None）
+        """
+        if not entries:
+            return {'success': True, 'message': '没有需要保存的记录', 'history_ids': [], 'duplicate_count': 0}
+        
+        try:
+            # 重复记录检测：去重窗口内相同内容的记录，以及批次内部的重复项
+            window_start = datetime.utcnow() - timedelta(seconds=self.dedup_window_seconds)
+            content_hashes = [
+                EvaluationHistory.compute_content_hash(
+                    data.get('user_input'), data.get('model_answer'), data.get('reference_answer')
+                ) if data.get('user_input') and data.get('model_answer') else None
+                for data, _ in entries
+            ]
+            unique_hashes = list({content_hash for content_hash in content_hashes if content_hash})
+            existing_ids = {}
+            for chunk_start in range(0, len(unique_hashes), 500):
+                chunk = unique_hashes[chunk_start:chunk_start + 500]
+                rows = db.session.query(
+                    EvaluationHistory.id, EvaluationHistory.content_hash
+                ).filter(
+                    EvaluationHistory.content_hash.in_(chunk),
+                    EvaluationHistory.created_at >= window_start
+                ).order_by(EvaluationHistory.id).all()
+                for row in rows:
+                    existing_ids.setdefault(row.content_hash, row.id)
+            
+            history_ids = [None] * len(entries)
+            new_records = []
+            batch_records = {}
+            duplicate_count = 0
+            
+            for index, ((evaluation_data, classification_result), content_hash) in enumerate(zip(entries, content_hashes)):
+                if content_hash and content_hash in existing_ids:
+                    history_ids[index] = existing_ids[content_hash]
+                    duplicate_count += 1
+                    continue
+                if content_hash and content_hash in batch_records:
+                    batch_records[content_hash][1].append(index)
+                    duplicate_count += 1
+                    continue
+                
+                record = self._build_history_record(evaluation_data, classification_result)
+                new_records.append(record)
+                batch_records[content_hash or f'#{index}'] = (record, [index])
+            
+            db.session.add_all(new_records)
+            db.session.flush()
+            
+            # 占位失败（其他进程刚写入了相同内容）的记录不写入，复用对方的记录ID
+            for content_hash, (record, indexes) in batch_records.items():
+                holder_id = self._claim_content(content_hash, record.id) if not content_hash.startswith('#') else None
+                if holder_id is not None:
+                    db.session.delete(record)
+                    new_records.remove(record)
+                    batch_records[content_hash] = (None, indexes)
+                    for index in indexes:
+                        history_ids[index] = holder_id
+                    duplicate_count += len(indexes)
+            db.session.commit()
+            
+            for record, indexes in batch_records.values():
+                if record is None:
+                    continue
+                for index in indexes:
+                    history_ids[index] = record.id
+            
+            if duplicate_count:
+                self.logger.warning(f"批量保存时检测到 {duplicate_count} 条重复记录，已复用现有记录ID")
+            self.logger.info(f"成功批量保存评估历史记录 {len(new_records)} 条")
+            
+            return {
+                'success': True,
+                'message': f'批量保存成功，新增 {len(new_records)} 条记录',
+                'history_ids': history_ids,
+                'duplicate_count': duplicate_count
+            }
+            
+        except SQLAlchemyError as e:
+            self.logger.error(f"批量保存评估历史失败: {str(e)}")
+            db.session.rollback()
+            return {
+                'success': False,
+                'message': f'批量保存评估历史失败: {str(e)}',
+                'history_ids': [None] * len(entries)
+            }
+    
+    # ==================== 游标分页 ====================
+    
+    @staticmethod
+    def _encode_cursor(sort_value, record_id):
+        """将 (排序字段值, id) 编码为不透明的游标字符串"""
+        if isinstance(sort_value, datetime):
+            sort_value = {'dt': sort_value.isoformat()}
+        raw = json.dumps([sort_value, record_id], ensure_ascii=False, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def _decode_cursor(cursor):
+        """解析游标字符串，返回 (排序字段值, id)"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            sort_value, record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            if isinstance(sort_value, dict) and 'dt' in sort_value:
+                sort_value = datetime.fromisoformat(sort_value['dt'])
+            return sort_value, int(record_id)
+        except (ValueError, TypeError, UnicodeError) as e:
+            raise ValueError(f"无效的分页游标: {cursor}") from e
+    
+    @staticmethod
+    def _may_be_null(sort_column):
+        """排序字段是否可能为NULL（有默认值的列视为总有值）"""
+        column = sort_column.property.columns[0]
+        return column.nullable and column.default is None and not column.primary_key
+
+    def _keyset_page(self, query, sort_column, descending, per_page, cursor=None, include_total=True):
+        """
+        按 (排序字段, id) 做游标分页，任意深度的翻页代价都与第一页相同
+        
+        Args:
+            query: 已添加筛选条件的查询
+            sort_column: 排序字段
+            descending: 是否降序
+            per_page: 每页数量
+            cursor: 上一页返回的 next_cursor，为空时从第一页开始
+            include_total: 是否统计总数（COUNT(*)，大表上可关闭）
+            
+        Returns:
+            tuple: (记录列表, 分页信息)
+        """
+        id_column = EvaluationHistory.id
+        total = query.order_by(None).count() if include_total else None
+        
+        if cursor:
+            sort_value, last_id = self._decode_cursor(cursor)
+            # SQLite中NULL在升序时排最前、降序时排最后
+            if descending:
+                if sort_value is None:
+                    query = query.filter(and_(sort_column.is_(None), id_column < last_id))
+                else:
+                    # 行值比较可以直接利用 (排序字段, id) 索引定位起点
+                    condition = tuple_(sort_column, id_column) < (sort_value, last_id)
+                    if self._may_be_null(sort_column):
+                        condition = or_(condition, sort_column.is_(None))
+                    query = query.filter(condition)
+            else:
+                if sort_value is None:
+                    query = query.filter(or_(
+                        and_(sort_column.is_(None), id_column > last_id),
+                        sort_column.isnot(None)
+                    ))
+                else:
+                    query = query.filter(tuple_(sort_column, id_column) > (sort_value, last_id))
+        
+        if descending:
+            query = query.order_by(desc(sort_column), desc(id_column))
+        else:
+            query = query.order_by(asc(sort_column), asc(id_column))
+        
+        # 多取一条用于判断是否还有下一页
+        rows = query.limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        next_cursor = None
+        if has_next and rows:
+            last = rows[-1]
+            next_cursor = self._encode_cursor(getattr(last, sort_column.key), last.id)
+        
+        pagination = {
+            'mode': 'cursor',
+            'per_page': per_page,
+            'cursor': cursor or None,
+            'next_cursor': next_cursor,
+            'has_next': has_next,
+            'total': total
+        }
+        return rows, pagination
+    
+    def _offset_page_without_total(self, query, page, per_page):
+        """不统计总数的偏移分页（多取一条判断是否有下一页）"""
+        page = max(page, 1)
+        rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        pagination = {
+            'page': page,
+            'per_page': per_page,
+            'total': None,
+            'pages': None,
+            'has_prev': page > 1,
+            'has_next': has_next,
+            'prev_num': page - 1 if page > 1 else None,
+            'next_num': page + 1 if has_next else None
+        }
+        return rows[:per_page], pagination
+    
+    @staticmethod
+    def _apply_projection(query, fields, sort_by):
+        """只加载输出字段和排序字段对应的列，其余列延迟加载；原始响应只在需要输出时批量加载"""
+        if not fields or 'raw_response' in fields:
+            # 避免逐条记录延迟加载原始响应
+            query = query.options(selectinload(EvaluationHistory.raw_response_record))
+        if not fields:
+            return query
+        columns = EvaluationHistory.columns_for_fields(fields)
+        if sort_by in EvaluationHistory.__table__.columns and sort_by not in fields:
+            columns.append(getattr(EvaluationHistory, sort_by))
+        return query.options(load_only(*columns))
+    
     def get_evaluation_history(self, page=1, per_page=20, classification_level2=None, 
                               start_date=None, end_date=None, sort_by='created_at', 
-                              sort_order='desc'):
+                              sort_order='desc', cursor=None, include_total=True,
+                              fields=None, preview_length=None, search_query=None):
         """
         获取评估历史记录（分页）
         
@@ -131,15 +453,20 @@ class EvaluationHistoryService:
             classification_level2: 二级分类筛选
             start_date: 开始日期
             end_date: 结束日期
-            sort_by: 排序字段
+            sort_by: 排序字段（relevance 表示按检索相关度排序，仅在全文检索且非游标分页时有效）
             sort_order: 排序方向 (asc/desc)
+            cursor: 游标（不为None时使用游标分页，空字符串表示第一页）
+            include_total: 是否统计总数
+            fields: 只返回指定字段（EvaluationHistory.resolve_fields 的结果），为空时返回完整记录
+            preview_length: 长文本字段的截断长度
+            search_query: 全文检索词（多个检索词用空格分隔），结果中附带命中摘要 search_snippet
             
         Returns:
             dict: 分页的评估历史数据
         """
         try:
             # 构建查询
-            query = EvaluationHistory.query
+            query = self._apply_projection(EvaluationHistory.query, fields, sort_by)
             
             # 添加筛选条件
             if classification_level2:
@@ -167,28 +494,63 @@ class EvaluationHistoryService:
                 except (ValueError, TypeError) as e:
                     self.logger.warning(f"无效的结束日期格式: {end_date}, 错误: {e}")
             
-            # 添加排序
-            if hasattr(EvaluationHistory, sort_by):
-                sort_column = getattr(EvaluationHistory, sort_by)
-                if sort_order.lower() == 'desc':
-                    query = query.order_by(desc(sort_column))
-                else:
-                    query = query.order_by(asc(sort_column))
+            search = None
+            if search_query is not None:
+                search = evaluation_search.match_cte(search_query)
+                query = query.join(search, search.c.history_id == EvaluationHistory.id)
+            
+            if cursor is not None:
+                # 游标分页：按 (排序字段, id) 定位，不使用OFFSET
+                if sort_by not in EvaluationHistory.__table__.columns:
+                    sort_by = 'created_at'
+                records, pagination_info = self._keyset_page(
+                    query, getattr(EvaluationHistory, sort_by), sort_order.lower() == 'desc',
+                    per_page, cursor=cursor, include_total=include_total
+                )
             else:
-                query = query.order_by(desc(EvaluationHistory.created_at))
+                # 添加排序
+                if sort_by == 'relevance' and search is not None:
+                    query = query.order_by(asc(search.c.rank), desc(EvaluationHistory.created_at))
+                elif hasattr(EvaluationHistory, sort_by):
+                    sort_column = getattr(EvaluationHistory, sort_by)
+                    if sort_order.lower() == 'desc':
+                        query = query.order_by(desc(sort_column))
+                    else:
+                        query = query.order_by(asc(sort_column))
+                else:
+                    query = query.order_by(desc(EvaluationHistory.created_at))
+                
+                if include_total:
+                    # 执行分页查询
+                    pagination = query.paginate(
+                        page=page, 
+                        per_page=per_page, 
+                        error_out=False
+                    )
+                    records = pagination.items
+                    pagination_info = {
+                        'page': pagination.page,
+                        'per_page': pagination.per_page,
+                        'total': pagination.total,
+                        'pages': pagination.pages,
+                        'has_prev': pagination.has_prev,
+                        'has_next': pagination.has_next,
+                        'prev_num': pagination.prev_num,
+                        'next_num': pagination.next_num
+                    }
+                else:
+                    records, pagination_info = self._offset_page_without_total(query, page, per_page)
             
-            # 执行分页查询
-            pagination = query.paginate(
-                page=page, 
-                per_page=per_page, 
-                error_out=False
-            )
+            snippets = evaluation_search.snippets(search_query, [item.id for item in records]) if search is not None else None
             
             # 格式化结果 - 安全处理每个记录的转换
             items = []
-            for item in pagination.items:
+            for item in records:
                 try:
-                    items.append(item.to_dict())
+                    data = item.to_dict(fields, preview_length)
+                    if snippets is not None:
+                        data['search_snippet'] = snippets.get(item.id, '')
+                    items.append(data)
                 except Exception as e:
                     self.logger.warning(f"转换记录到字典时出错 (ID: {getattr(item, 'id', 'unknown')}): {str(e)}")
                     # 跳过有问题的记录，继续处理其他记录
@@ -198,22 +560,19 @@ class EvaluationHistoryService:
                 'success': True,
                 'data': {
                     'items': items,
-                    'pagination': {
-                        'page': pagination.page,
-                        'per_page': pagination.per_page,
-                        'total': pagination.total,
-                        'pages': pagination.pages,
-                        'has_prev': pagination.has_prev,
-                        'has_next': pagination.has_next,
-                        'prev_num': pagination.prev_num,
-                        'next_num': pagination.next_num
-                    }
+                    'pagination': pagination_info
                 }
             }
             
-            self.logger.info(f"成功获取评估历史，页码: {page}, 总数: {pagination.total}")
+            self.logger.info(f"成功获取评估历史，页码: {page if cursor is None else 'cursor'}, 总数: {pagination_info['total']}")
             return result
             
+        except ValueError as e:
+            self.logger.warning(f"获取评估历史参数错误: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e)
+            }
         except SQLAlchemyError as e:
             self.logger.error(f"获取评估历史失败: {str(e)}")
             return {
@@ -329,6 +688,7 @@ class EvaluationHistoryService:
             
             if 'human_dimensions' in human_data and human_data['human_dimensions']:
                 history.human_dimensions_json = json.dumps(human_data['human_dimensions'], ensure_ascii=False)
+                self.sync_dimension_scores(history, EvaluationDimensionScore.SOURCE_HUMAN)
             
             if 'human_reasoning' in human_data:
                 history.human_reasoning = human_data['human_reasoning']
@@ -389,35 +749,10 @@ class EvaluationHistoryService:
             dict: 统计信息
         """
         try:
-            # 基础统计
-            total_evaluations = EvaluationHistory.query.count()
-            
-            # 分类统计
-            classification_stats = db.session.query(
-                EvaluationHistory.classification_level2,
-                func.count(EvaluationHistory.id).label('count'),
-                func.avg(EvaluationHistory.total_score).label('avg_score'),
-                func.min(EvaluationHistory.total_score).label('min_score'),
-                func.max(EvaluationHistory.total_score).label('max_score')
-            ).filter(
-                EvaluationHistory.classification_level2.isnot(None)
-            ).group_by(
-                EvaluationHistory.classification_level2
-            ).all()
-            
-            # 最近7天的评估趋势
-            seven_days_ago = datetime.now() - timedelta(days=7)
-            recent_trend = db.session.query(
-                func.date(EvaluationHistory.created_at).label('date'),
-                func.count(EvaluationHistory.id).label('count'),
-                func.avg(EvaluationHistory.total_score).label('avg_score')
-            ).filter(
-                EvaluationHistory.created_at >= seven_days_ago
-            ).group_by(
-                func.date(EvaluationHistory.created_at)
-            ).order_by(
-                func.date(EvaluationHistory.created_at)
-            ).all()
+            if evaluation_stats_rollup.enabled:
+                total_evaluations, classification_stats, recent_trend = self._query_evaluation_statistics_rollup()
+            else:
+                total_evaluations, classification_stats, recent_trend = self._query_evaluation_statistics_history()
             
             # 格式化分类统计
             classification_data = []
@@ -460,6 +795,73 @@ class EvaluationHistoryService:
                 'message': f'获取评估统计失败: {str(e)}'
             }
     
+    def _query_evaluation_statistics_history(self):
+        """直接从 evaluation_history 聚合评估统计（汇总表未启用时使用）"""
+        # 基础统计
+        total_evaluations = EvaluationHistory.query.count()
+        
+        # 分类统计
+        classification_stats = db.session.query(
+            EvaluationHistory.classification_level2,
+            func.count(EvaluationHistory.id).label('count'),
+            func.avg(EvaluationHistory.total_score).label('avg_score'),
+            func.min(EvaluationHistory.total_score).label('min_score'),
+            func.max(EvaluationHistory.total_score).label('max_score')
+        ).filter(
+            EvaluationHistory.classification_level2.isnot(None)
+        ).group_by(
+            EvaluationHistory.classification_level2
+        ).all()
+        
+        # 最近7天的评估趋势
+        seven_days_ago = datetime.now() - timedelta(days=7)
+        recent_trend = db.session.query(
+            func.date(EvaluationHistory.created_at).label('date'),
+            func.count(EvaluationHistory.id).label('count'),
+            func.avg(EvaluationHistory.total_score).label('avg_score')
+        ).filter(
+            EvaluationHistory.created_at >= seven_days_ago
+        ).group_by(
+            func.date(EvaluationHistory.created_at)
+        ).order_by(
+            func.date(EvaluationHistory.created_at)
+        ).all()
+        return total_evaluations, classification_stats, recent_trend
+    
+    def _query_evaluation_statistics_rollup(self):
+        """从 evaluation_daily_stats 读取评估统计"""
+        total_evaluations = db.session.query(
+            func.coalesce(func.sum(EvaluationDailyStat.evaluation_count), 0)
+        ).scalar()
+        
+        # 分类统计（空字符串表示未分类）
+        classification_stats = db.session.query(
+            EvaluationDailyStat.category.label('classification_level2'),
+            func.sum(EvaluationDailyStat.evaluation_count).label('count'),
+            (func.sum(EvaluationDailyStat.score_sum) / func.sum(EvaluationDailyStat.evaluation_count)).label('avg_score'),
+            func.min(EvaluationDailyStat.score_min).label('min_score'),
+            func.max(EvaluationDailyStat.score_max).label('max_score')
+        ).filter(
+            EvaluationDailyStat.category != ''
+        ).group_by(
+            EvaluationDailyStat.category
+        ).all()
+        
+        # 最近7天的评估趋势（按天汇总，从7天前当天开始）
+        seven_days_ago = datetime.now() - timedelta(days=7)
+        recent_trend = db.session.query(
+            EvaluationDailyStat.stat_date.label('date'),
+            func.sum(EvaluationDailyStat.evaluation_count).label('count'),
+            (func.sum(EvaluationDailyStat.score_sum) / func.sum(EvaluationDailyStat.evaluation_count)).label('avg_score')
+        ).filter(
+            EvaluationDailyStat.stat_date >= seven_days_ago.strftime('%Y-%m-%d')
+        ).group_by(
+            EvaluationDailyStat.stat_date
+        ).order_by(
+            EvaluationDailyStat.stat_date
+        ).all()
+        return total_evaluations, classification_stats, recent_trend
+    
     def get_dimension_statistics(self):
         """
         获取维度统计信息 - 分别统计AI评估和人工评估的结果
@@ -468,95 +870,23 @@ class EvaluationHistoryService:
             dict: 维度统计信息，包含AI和人工评估的分离数据
         """
         try:
-            # 获取所有有维度数据的评估记录（包括AI评估和人工评估）
-            evaluations = EvaluationHistory.query.filter(
-                or_(
-                    EvaluationHistory.dimensions_json.isnot(None),
-                    EvaluationHistory.human_dimensions_json.isnot(None)
-                ),
-                EvaluationHistory.classification_level2.isnot(None)
-            ).all()
-            
             # 获取标准配置
             try:
-                import sys
-                import os
-                sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
-                from database_operations import db_ops
+                from utils.database_operations import db_ops
                 standards_result = db_ops.get_all_category_standards()
                 standards_data = standards_result.get('data', {}) if standards_result.get('success') else {}
             except Exception as e:
                 self.logger.warning(f"获取标准配置失败，使用旧逻辑: {str(e)}")
                 standards_data = {}
             
-            # 分别按分类组织AI和人工评估数据
-            ai_category_stats = {}
-            human_category_stats = {}
+            # 本次统计中各 (分类, 维度) 的满分只解析一次
+            max_score_index = self._build_max_score_index(standards_data)
             
-            for evaluation in evaluations:
-                try:
-                    category = evaluation.classification_level2
-                    
-                    # 处理AI评估数据
-                    if evaluation.dimensions_json:
-                        if category not in ai_category_stats:
-                            ai_category_stats[category] = {
-                                'total_evaluations': 0,
-                                'dimensions': {}
-                            }
-                        
-                        ai_category_stats[category]['total_evaluations'] += 1
-                        
-                        try:
-                            ai_dimensions = json.loads(evaluation.dimensions_json)
-                            self.logger.debug(f"解析到AI维度数据: {ai_dimensions}")
-                            
-                            for dimension_key, score in ai_dimensions.items():
-                                if dimension_key not in ai_category_stats[category]['dimensions']:
-                                    max_score = self._get_dimension_max_score_from_standards(
-                                        dimension_key, category, standards_data, evaluation.evaluation_criteria
-                                    )
-                                    ai_category_stats[category]['dimensions'][dimension_key] = {
-                                        'scores': [],
-                                        'max_possible_score': max_score
-                                    }
-                                ai_category_stats[category]['dimensions'][dimension_key]['scores'].append(score)
-                                
-                        except (json.JSONDecodeError, TypeError) as e:
-                            self.logger.warning(f"解析AI维度数据失败: {str(e)}")
-                    
-                    # 处理人工评估数据
-                    if evaluation.human_dimensions_json:
-                        if category not in human_category_stats:
-                            human_category_stats[category] = {
-                                'total_evaluations': 0,
-                                'dimensions': {}
-                            }
-                        
-                        human_category_stats[category]['total_evaluations'] += 1
-                        
-                        try:
-                            human_dimensions = json.loads(evaluation.human_dimensions_json)
-                            self.logger.debug(f"解析到人工维度数据: {human_dimensions}")
-                            
-                            for dimension_key, score in human_dimensions.items():
-                                if dimension_key not in human_category_stats[category]['dimensions']:
-                                    max_score = self._get_dimension_max_score_from_standards(
-                                        dimension_key, category, standards_data, evaluation.evaluation_criteria
-                                    )
-                                    human_category_stats[category]['dimensions'][dimension_key] = {
-                                        'scores': [],
-                                        'max_possible_score': max_score
-                                    }
-                                human_category_stats[category]['dimensions'][dimension_key]['scores'].append(score)
-                                
-                        except (json.JSONDecodeError, TypeError) as e:
-                            self.logger.warning(f"解析人工维度数据失败: {str(e)}")
-                            
-                except Exception as e:
-                    # 捕获任何在处理单个记录时发生的错误，包括fromisoformat错误
-                    self.logger.warning(f"处理评估记录时出错 (ID: {getattr(evaluation, 'id', 'unknown')}): {str(e)}")
-                    continue
+            # 分别按分类组织AI和人工评估数据：{分类: {'total_evaluations', 'dimensions': {维度: {'score_counts': {得分: 次数}, 'max_possible_score'}}}}
+            if evaluation_stats_rollup.enabled:
+                ai_category_stats, human_category_stats = self._collect_dimension_scores_rollup(max_score_index)
+            else:
+                ai_category_stats, human_category_stats = self._collect_dimension_scores_history(max_score_index)
             
             # 计算AI评估统计数据
             ai_result_stats = self._calculate_dimension_stats(ai_category_stats, standards_data, "AI")
@@ -569,6 +899,7 @@ class EvaluationHistoryService:
                 'data': {
                     'ai_evaluation': ai_result_stats,
                     'human_evaluation': human_result_stats,
+                    'comparison': self._compare_dimension_stats(ai_result_stats, human_result_stats),
                     'summary': {
                         'ai_total_evaluations': sum(cat.get('total_evaluations', 0) for cat in ai_result_stats.values()),
                         'human_total_evaluations': sum(cat.get('total_evaluations', 0) for cat in human_result_stats.values()),
@@ -588,9 +919,127 @@ class EvaluationHistoryService:
                 'message': f'获取维度统计失败: {str(e)}'
             }
     
+    def _collect_dimension_scores_history(self, max_score_index):
+        """用 evaluation_dimension_scores 上的SQL聚合统计各分类、各维度的得分分布（汇总表未启用时使用）"""
+        category = EvaluationHistory.classification_level2
+        evaluation_rows = db.session.query(
+            category,
+            func.count(EvaluationHistory.dimensions_json),
+            func.count(EvaluationHistory.human_dimensions_json)
+        ).filter(
+            category.isnot(None)
+        ).group_by(category).all()
+        
+        score_rows = db.session.query(
+            category,
+            EvaluationDimensionScore.source,
+            EvaluationDimensionScore.dimension,
+            EvaluationDimensionScore.score,
+            func.count()
+        ).join(
+            EvaluationHistory, EvaluationHistory.id == EvaluationDimensionScore.history_id
+        ).filter(
+            category.isnot(None)
+        ).group_by(
+            category,
+            EvaluationDimensionScore.source,
+            EvaluationDimensionScore.dimension,
+            EvaluationDimensionScore.score
+        ).all()
+        
+        return self._assemble_dimension_scores(evaluation_rows, score_rows, max_score_index)
+    
+    def _collect_dimension_scores_rollup(self, max_score_index):
+        """从维度得分汇总表读取各分类、各维度的得分分布"""
+        evaluation_rows = db.session.query(
+            EvaluationDailyStat.category,
+            func.sum(EvaluationDailyStat.ai_dimension_evaluations),
+            func.sum(EvaluationDailyStat.human_dimension_evaluations)
+        ).filter(
+            EvaluationDailyStat.category != ''
+        ).group_by(EvaluationDailyStat.category).all()
+        
+        score_rows = db.session.query(
+            EvaluationDimensionDailyStat.category,
+            EvaluationDimensionDailyStat.source,
+            EvaluationDimensionDailyStat.dimension,
+            EvaluationDimensionDailyStat.score,
+            func.sum(EvaluationDimensionDailyStat.score_count)
+        ).filter(
+            EvaluationDimensionDailyStat.category != ''
+        ).group_by(
+            EvaluationDimensionDailyStat.category,
+            EvaluationDimensionDailyStat.source,
+            EvaluationDimensionDailyStat.dimension,
+            EvaluationDimensionDailyStat.score
+        ).all()
+        
+        return self._assemble_dimension_scores(evaluation_rows, score_rows, max_score_index)
+    
+    def _assemble_dimension_scores(self, evaluation_rows, score_rows, max_score_index):
+        """
+        将聚合查询结果组织为 {分类: {'total_evaluations', 'dimensions': {维度: {'score_counts', 'max_possible_score'}}}}
+        
+        Args:
+            evaluation_rows: (分类, AI评估数, 人工评估数)
+            score_rows: (分类, 来源, 维度, 得分, 次数)
+        """
+        stats_by_source = {'ai': {}, 'human': {}}
+        for category, ai_count, human_count in evaluation_rows:
+            for source, count in (('ai', ai_count), ('human', human_count)):
+                if count:
+                    stats_by_source[source][category] = {'total_evaluations': count, 'dimensions': {}}
+        
+        for category, source, dimension_key, score, count in score_rows:
+            category_stats = stats_by_source[source].get(category)
+            if category_stats is None or not count:
+                continue
+            dimension = category_stats['dimensions'].get(dimension_key)
+            if dimension is None:
+                max_score = self._resolve_max_score(
+                    max_score_index, category, dimension_key,
+                    lambda: self._find_criteria_mentioning(category, dimension_key)
+                )
+                dimension = {'score_counts': {}, 'max_possible_score': max_score}
+                category_stats['dimensions'][dimension_key] = dimension
+            # 整数分值与旧逻辑保持一致（JSON中的整数分数）
+            score = int(score) if float(score).is_integer() else score
+            dimension['score_counts'][score] = count
+        
+        return stats_by_source['ai'], stats_by_source['human']
+    
+    def _build_max_score_index(self, standards_data):
+        """从标准配置构建 (分类, 维度) -> 满分 的索引"""
+        max_score_index = {}
+        for category, dimensions in standards_data.items():
+            for dimension in dimensions:
+                criteria = dimension.get('evaluation_criteria', [])
+                if dimension.get('name') and criteria:
+                    max_score_index.setdefault(
+                        (category, dimension['name']), max(c.get('score', 0) for c in criteria)
+                    )
+        return max_score_index
+    
+    def _resolve_max_score(self, max_score_index, category, dimension_key, fallback_criteria=None):
+        """获取维度满分：标准配置中没有时按评估标准文本/默认值解析，并记入索引"""
+        max_score = max_score_index.get((category, dimension_key))
+        if max_score is None:
+            max_score = self._get_dimension_max_score_from_standards(dimension_key, category, {}, fallback_criteria)
+            max_score_index[(category, dimension_key)] = max_score
+        return max_score
+    
+    def _find_criteria_mentioning(self, category, dimension_key):
+        """查找提到该维度的一条评估标准文本（标准配置中没有该维度时用于解析最大分数）"""
+        return db.session.query(EvaluationCriteriaText.content).join(
+            EvaluationHistory, EvaluationHistory.criteria_hash == EvaluationCriteriaText.criteria_hash
+        ).filter(
+            EvaluationHistory.classification_level2 == category,
+            EvaluationCriteriaText.content.contains(dimension_key)
+        ).order_by(EvaluationHistory.id).limit(1).scalar()
+    
     def _calculate_dimension_stats(self, category_stats, standards_data, evaluation_type):
         """
-        计算维度统计数据的通用方法
+        计算维度统计数据的通用方法（所有分类、维度的得分分布一次性交给统计引擎向量化计算）
         
         Args:
             category_stats: 分类统计数据
@@ -601,40 +1050,71 @@ class EvaluationHistoryService:
             dict: 计算后的统计数据
         """
         result_stats = {}
+        group_keys = []
+        max_scores = []
+        group_ids, values, counts = [], [], []
         
         for category, data in category_stats.items():
             result_stats[category] = {
                 'total_evaluations': data['total_evaluations'],
                 'dimensions': {}
             }
-            
             for dimension_key, dimension_data in data['dimensions'].items():
-                scores = dimension_data['scores']
-                max_score = dimension_data['max_possible_score']
-                
-                if scores and max_score > 0:
-                    # 计算百分比分数
-                    percentages = [(score / max_score) * 100 for score in scores]
-                    
-                    # 从标准配置中获取维度显示名称
-                    dimension_name = self._get_dimension_display_name_from_standards(
-                        dimension_key, category, standards_data
-                    )
-                    
-                    result_stats[category]['dimensions'][dimension_key] = {
-                        'dimension_name': dimension_name,
-                        'total_evaluations': len(scores),
-                        'avg_score': round(sum(scores) / len(scores), 2),
-                        'max_possible_score': max_score,
-                        'avg_percentage': round(sum(percentages) / len(percentages), 2),
-                        'min_percentage': round(min(percentages), 2),
-                        'max_percentage': round(max(percentages), 2),
-                        'score_distribution': self._calculate_score_distribution(percentages),
-                        'evaluation_type': evaluation_type
-                    }
+                group = len(group_keys)
+                group_keys.append((category, dimension_key))
+                max_scores.append(dimension_data['max_possible_score'])
+                for score, times in dimension_data['score_counts'].items():
+                    group_ids.append(group)
+                    values.append(score)
+                    counts.append(times)
+        
+        for (category, dimension_key), max_score, stats in zip(
+            group_keys, max_scores, dimension_stats_engine.compute(group_ids, values, counts, max_scores)
+        ):
+            if stats is None:
+                continue
+            
+            # 从标准配置中获取维度显示名称
+            dimension_name = self._get_dimension_display_name_from_standards(
+                dimension_key, category, standards_data
+            )
+            
+            result_stats[category]['dimensions'][dimension_key] = {
+                'dimension_name': dimension_name,
+                'total_evaluations': stats['count'],
+                'avg_score': round(stats['avg_score'], 2),
+                'std_score': round(stats['std_score'], 2),
+                'percentiles': stats['percentiles'],
+                'max_possible_score': max_score,
+                'avg_percentage': round(stats['avg_percentage'], 2),
+                'min_percentage': round(stats['min_percentage'], 2),
+                'max_percentage': round(stats['max_percentage'], 2),
+                'score_distribution': stats['distribution'],
+                'evaluation_type': evaluation_type
+            }
         
         return result_stats
     
+    @staticmethod
+    def _compare_dimension_stats(ai_stats, human_stats):
+        """AI评估与人工评估在同一分类、同一维度上的差异（人工 - AI）"""
+        comparison = {}
+        for category, human_category in human_stats.items():
+            ai_dimensions = ai_stats.get(category, {}).get('dimensions', {})
+            for dimension_key, human_dimension in human_category['dimensions'].items():
+                ai_dimension = ai_dimensions.get(dimension_key)
+                if ai_dimension is None:
+                    continue
+                comparison.setdefault(category, {})[dimension_key] = {
+                    'ai_avg_score': ai_dimension['avg_score'],
+                    'human_avg_score': human_dimension['avg_score'],
+                    'avg_score_delta': round(human_dimension['avg_score'] - ai_dimension['avg_score'], 2),
+                    'avg_percentage_delta': round(human_dimension['avg_percentage'] - ai_dimension['avg_percentage'], 2),
+                    'ai_evaluations': ai_dimension['total_evaluations'],
+                    'human_evaluations': human_dimension['total_evaluations']
+                }
+        return comparison
+    
     def _get_dimension_max_score(self, dimension_key, evaluation_criteria):
         """从评估标准中解析维度最大分数"""
         if not evaluation_criteria:
@@ -707,7 +1187,9 @@ class EvaluationHistoryService:
                         self.logger.debug(f"从标准配置获取维度 {dimension_key} 最大分数: {max_score}")
                         return max_score
         
-        # 回退：从evaluation_criteria文本中解析最大分数
+        # 回退：从evaluation_criteria文本中解析最大分数（可传入按需获取文本的函数）
+        if callable(fallback_criteria):
+            fallback_criteria = fallback_criteria()
         if fallback_criteria:
             max_score = self._parse_max_score_from_criteria_text(dimension_key, fallback_criteria)
             if max_score > 0:
@@ -751,32 +1233,6 @@ class EvaluationHistoryService:
         # 数据库重构后，所有维度都已使用新维度体系保存，直接返回原始名称
         return dimension_key
 
-    def _calculate_score_distribution(self, percentages):
-        """计算分数分布"""
-        distribution = {
-            'excellent': 0,  # 80-100%
-            'good': 0,       # 60-79%
-            'fair': 0,       # 40-59%
-            'poor': 0        # 0-39%
-        }
-        
-        for percentage in percentages:
-            if percentage >= 80:
-                distribution['excellent'] += 1
-            elif percentage >= 60:
-                distribution['good'] += 1
-            elif percentage >= 40:
-                distribution['fair'] += 1
-            else:
-                distribution['poor'] += 1
-        
-        total = len(percentages)
-        if total > 0:
-            for key in distribution:
-                distribution[key] = round((distribution[key] / total) * 100, 1)
-        
-        return distribution
-    
     def get_badcase_statistics(self):
         """
         获取badcase统计信息
@@ -785,28 +1241,36 @@ class EvaluationHistoryService:
             dict: badcase统计结果
         """
         try:
-            # 总体badcase统计
-            total_records = EvaluationHistory.query.count()
-            total_badcases = EvaluationHistory.query.filter_by(is_badcase=True).count()
-            ai_badcases = EvaluationHistory.query.filter_by(ai_is_badcase=True).count()
-            human_badcases = EvaluationHistory.query.filter_by(human_is_badcase=True).count()
+            # 看板轮询时短时间内直接返回上次结果（本进程内评估历史有变化时立即失效）
+            memo = self._badcase_stats_memo
+            generation = evaluation_stats_rollup.generation
+            if memo and memo[0] > time.monotonic() and memo[1] == generation:
+                return memo[2]
+            
+            if evaluation_stats_rollup.enabled:
+                rows = self._query_badcase_counts_rollup()
+            else:
+                rows = self._query_badcase_counts_history()
             
-            # 按分类统计badcase
+            # 一次遍历分组结果得到总体及各分类的数量
+            total_records = total_badcases = ai_badcases = human_badcases = 0
             category_stats = {}
-            categories = db.session.query(EvaluationHistory.classification_level2).distinct().all()
-            
-            for (category,) in categories:
-                if category:
-                    category_total = EvaluationHistory.query.filter_by(classification_level2=category).count()
-                    category_badcases = EvaluationHistory.query.filter(
-                        EvaluationHistory.classification_level2 == category,
-                        EvaluationHistory.is_badcase == True
-                    ).count()
-                    
+            for category, category_total, category_badcases, category_ai, category_human in rows:
+                category_total = category_total or 0
+                category_badcases = category_badcases or 0
+                category_ai = category_ai or 0
+                category_human = category_human or 0
+                total_records += category_total
+                total_badcases += category_badcases
+                ai_badcases += category_ai
+                human_badcases += category_human
+                if category and category_total:
                     category_stats[category] = {
                         'total_records': category_total,
                         'badcase_count': category_badcases,
-                        'badcase_percentage': round((category_badcases / category_total * 100), 2) if category_total > 0 else 0.0
+                        'ai_badcase_count': category_ai,
+                        'human_badcase_count': category_human,
+                        'badcase_percentage': round((category_badcases / category_total * 100), 2)
                     }
             
             # 计算总体百分比
@@ -831,6 +1295,8 @@ class EvaluationHistoryService:
             }
             
             self.logger.info(f"获取badcase统计成功: 总记录{total_records}条，badcase{total_badcases}条({total_badcase_percentage}%)")
+            if self.badcase_stats_memo_ttl > 0:
+                self._badcase_stats_memo = (time.monotonic() + self.badcase_stats_memo_ttl, generation, result)
             return result
             
         except Exception as e:
@@ -840,7 +1306,29 @@ class EvaluationHistoryService:
                 'message': f'获取badcase统计失败: {str(e)}'
             }
     
-    def get_badcase_records(self, page=1, per_page=20, badcase_type=None, classification_level2=None):
+    def _query_badcase_counts_rollup(self):
+        """从 evaluation_daily_stats 按分类汇总：(分类, 记录数, badcase数, AI badcase数, 人工badcase数)"""
+        return db.session.query(
+            EvaluationDailyStat.category,
+            func.sum(EvaluationDailyStat.evaluation_count),
+            func.sum(EvaluationDailyStat.badcase_count),
+            func.sum(EvaluationDailyStat.ai_badcase_count),
+            func.sum(EvaluationDailyStat.human_badcase_count)
+        ).group_by(EvaluationDailyStat.category).all()
+    
+    def _query_badcase_counts_history(self):
+        """一次扫描 evaluation_history，用条件求和按分类汇总各类badcase数量"""
+        return db.session.query(
+            EvaluationHistory.classification_level2,
+            func.count(EvaluationHistory.id),
+            func.sum(case((EvaluationHistory.is_badcase == True, 1), else_=0)),
+            func.sum(case((EvaluationHistory.ai_is_badcase == True, 1), else_=0)),
+            func.sum(case((EvaluationHistory.human_is_badcase == True, 1), else_=0))
+        ).group_by(EvaluationHistory.classification_level2).all()
+    
+    def get_badcase_records(self, page=1, per_page=20, badcase_type=None, classification_level2=None,
+                            cursor=None, include_total=True, fields=None, preview_length=None,
+                            search_query=None):
         """
         获取badcase记录列表
         
@@ -849,13 +1337,18 @@ class EvaluationHistoryService:
             per_page: 每页记录数
             badcase_type: badcase类型 ('ai', 'human', 'all')
             classification_level2: 二级分类筛选
+            cursor: 游标（不为None时使用游标分页，空字符串表示第一页）
+            include_total: 是否统计总数
+            fields: 只返回指定字段（EvaluationHistory.resolve_fields 的结果），为空时返回完整记录
+            preview_length: 长文本字段的截断长度
+            search_query: 全文检索词，非游标分页时按相关度排序，结果中附带命中摘要 search_snippet
             
         Returns:
             dict: badcase记录列表
         """
         try:
             # 构建查询条件
-            query = EvaluationHistory.query.filter_by(is_badcase=True)
+            query = self._apply_projection(EvaluationHistory.query, fields, 'created_at').filter_by(is_badcase=True)
             
             # 按badcase类型筛选
             if badcase_type == 'ai':
@@ -868,24 +1361,33 @@ class EvaluationHistoryService:
             if classification_level2:
                 query = query.filter_by(classification_level2=classification_level2)
             
-            # 按创建时间降序排列
-            query = query.order_by(EvaluationHistory.created_at.desc())
-            
-            # 分页
-            pagination = query.paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False
-            )
-            
-            # 转换为字典格式
-            records = [record.to_dict() for record in pagination.items]
-            
-            result = {
-                'success': True,
-                'data': {
-                    'items': records,
-                    'pagination': {
+            search = None
+            if search_query is not None:
+                search = evaluation_search.match_cte(search_query)
+                query = query.join(search, search.c.history_id == EvaluationHistory.id)
+            
+            if cursor is not None:
+                # 游标分页：按 (创建时间, id) 降序定位，不使用OFFSET
+                records, pagination_info = self._keyset_page(
+                    query, EvaluationHistory.created_at, True, per_page,
+                    cursor=cursor, include_total=include_total
+                )
+            else:
+                # 检索时按相关度排序，否则按创建时间降序排列
+                if search is not None:
+                    query = query.order_by(asc(search.c.rank), desc(EvaluationHistory.created_at))
+                else:
+                    query = query.order_by(EvaluationHistory.created_at.desc())
+                
+                if include_total:
+                    # 分页
+                    pagination = query.paginate(
+                        page=page,
+                        per_page=per_page,
+                        error_out=False
+                    )
+                    records = pagination.items
+                    pagination_info = {
                         'page': pagination.page,
                         'per_page': pagination.per_page,
                         'total': pagination.total,
@@ -893,12 +1395,33 @@ class EvaluationHistoryService:
                         'has_prev': pagination.has_prev,
                         'has_next': pagination.has_next
                     }
+                else:
+                    records, pagination_info = self._offset_page_without_total(query, page, per_page)
+            
+            # 转换为字典格式
+            items = [record.to_dict(fields, preview_length) for record in records]
+            if search is not None:
+                snippets = evaluation_search.snippets(search_query, [record.id for record in records])
+                for record, item in zip(records, items):
+                    item['search_snippet'] = snippets.get(record.id, '')
+            
+            result = {
+                'success': True,
+                'data': {
+                    'items': items,
+                    'pagination': pagination_info
                 }
             }
             
-            self.logger.info(f"获取badcase记录成功: 第{page}页，每页{per_page}条，共{pagination.total}条")
+            self.logger.info(f"获取badcase记录成功: 第{page if cursor is None else 'cursor'}页，每页{per_page}条，共{pagination_info['total']}条")
             return result
             
+        except ValueError as e:
+            self.logger.warning(f"获取badcase记录参数错误: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e)
+            }
         except Exception as e:
             self.logger.error(f"获取badcase记录失败: {str(e)}")
             return {
@@ -0,0 +1,506 @@
+"""
+评估流水线服务
+将 /api/evaluate 拆分为分类、评估标准查询、LLM评估、加权计分、历史保存等阶段，
+按阶段间的依赖关系并发执行互不依赖的阶段，并记录每个阶段的耗时
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from utils.logger import get_logger
+
+# AI自动判断badcase的分数阈值（百分比），低于该值认为是badcase
+AI_BADCASE_THRESHOLD = 50.0
+
+# 未提供评估标准时使用的默认标准
+DEFAULT_EVALUATION_CRITERIA = '请评估答案的准确性、相关性和有用性'
+
+
+class PipelineStage:
+    """流水线阶段定义"""
+
+    def __init__(self, name, func, depends_on=None):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on or [])
+
+
+class StagedPipeline:
+    """
+    按依赖关系调度的阶段执行器
+
+    每个阶段接收共享的上下文字典 context，返回值以阶段名写入 context；
+    所有依赖都已完成的阶段会立即提交到线程池，因此互不依赖的阶段可以重叠执行
+    """
+
+    def __init__(self, executor, app=None):
+        self.executor = executor
+        self.app = app
+        self.logger = get_logger(__name__)
+
+    def _run_stage(self, stage, context, pipeline_start):
+        """在应用上下文中执行单个阶段并记录耗时"""
+        started = time.time()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    value = stage.func(context)
+            else:
+                value = stage.func(context)
+            return value
+        finally:
+            finished = time.time()
+            context['_timings'][stage.name] = {
+                'started_at_ms': round((started - pipeline_start) * 1000, 1),
+                'latency_ms': round((finished - started) * 1000, 1)
+            }
+
+    def run(self, stages, context):
+        """
+        执行所有阶段
+
+        Args:
+            stages: PipelineStage 列表
+            context: 初始上下文
+
+        Returns:
+            dict: 执行完成后的上下文（各阶段结果以阶段名为key）
+        """
+        pipeline_start = time.time()
+        context.setdefault('_timings', {})
+
+        pending = {stage.name: stage for stage in stages}
+        running = {}
+        completed = set()
+
+        while pending or running:
+            # 提交所有依赖已满足的阶段
+            for name in list(pending.keys()):
+                stage = pending[name]
+                if all(dep in completed for dep in stage.depends_on):
+                    future = self.executor.submit(self._run_stage, stage, context, pipeline_start)
+                    running[future] = name
+                    del pending[name]
+
+            if not running:
+                missing = {name: stage.depends_on for name, stage in pending.items()}
+                raise RuntimeError(f"流水线阶段依赖无法满足: {missing}")
+
+            done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    context[name] = future.result()
+                except Exception:
+                    # 取消尚未开始的阶段，等待已在执行的阶段结束后再抛出
+                    for other in running:
+                        other.cancel()
+                    wait(list(running.keys()))
+                    raise
+                completed.add(name)
+
+        context['_total_ms'] = round((time.time() - pipeline_start) * 1000, 1)
+        return context
+
+
+class EvaluationPipeline:
+    """/api/evaluate 的分阶段执行流水线"""
+
+    def __init__(self, app, classification_service, evaluation_service, evaluation_history_service, max_workers=None):
+        self.logger = get_logger(__name__)
+        self.app = app
+        self.classification_service = classification_service
+        self.evaluation_service = evaluation_service
+        self.evaluation_history_service = evaluation_history_service
+
+        max_workers = max_workers or int(os.getenv('EVALUATION_PIPELINE_WORKERS', '16'))
+        # 默认在响应前保存历史记录（响应中包含history_id），延后保存需显式开启
+        self.defer_history_save = os.getenv('EVALUATION_DEFER_HISTORY_SAVE', 'false').lower() == 'true'
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='eval-pipeline')
+        self.stage_runner = StagedPipeline(self.executor, app=app)
+        # 延后保存使用独立的线程池，避免与请求中的阶段任务互相排队
+        self.history_save_workers = int(os.getenv('EVALUATION_HISTORY_SAVE_WORKERS', '2'))
+        self.history_save_executor = ThreadPoolExecutor(
+            max_workers=self.history_save_workers, thread_name_prefix='eval-history-save'
+        )
+
+        # 批量评估使用独立的线程池，避免与单条评估的阶段任务互相占用
+        self.batch_workers = int(os.getenv('BATCH_EVALUATION_WORKERS', '8'))
+        self.batch_max_items = int(os.getenv('BATCH_EVALUATION_MAX_ITEMS', '1000'))
+        self.batch_executor = ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix='eval-batch')
+
+    # ==================== 阶段实现 ====================
+
+    def _stage_classify(self, context):
+        """阶段：问题分类"""
+        result = self.classification_service.classify_user_input(context['user_input'])
+        self.logger.info(f"分类结果: {result.get('level1', 'N/A')} -> {result.get('level2', 'N/A')} -> {result.get('level3', 'N/A')}")
+        return result
+
+    def _resolve_category(self, context):
+        """确定评估使用的二级分类：优先使用客户端提供的分类，否则使用分类阶段的结果"""
+        if context.get('category'):
+            return context['category']
+        classification_result = context.get('classify') or {}
+        return classification_result.get('level2')
+
+    def _apply_category(self, classification_result, category, snapshot=None):
+        """
+        客户端指定分类时，以该分类作为记录的二级分类，使保存的分类与计算权重、查询评估标准使用的分类一致
+
+        一级、三级分类取自分类标准中该二级分类下的条目（优先保留分类阶段给出的三级分类）
+        """
+        classification_result = classification_result or {}
+        if not category or classification_result.get('level2') == category:
+            return classification_result
+
+        snapshot = snapshot or self.classification_service.get_taxonomy_snapshot()
+        standards = [standard for key, standard in snapshot.index.items() if key[1] == category]
+        standard = next(
+            (item for item in standards if item.get('level3') == classification_result.get('level3')),
+            standards[0] if standards else None
+        )
+
+        result = dict(classification_result, level2=category, category_source='client')
+        if standard:
+            result.update({
+                'level1': standard['level1'],
+                'level1_definition': standard['level1_definition'],
+                'level2_definition': standard['level1_definition'],
+                'level3': standard['level3'],
+                'level3_definition': standard['level3_definition']
+            })
+        else:
+            result['level2_definition'] = category
+        self.logger.info(f"使用客户端指定的二级分类: {classification_result.get('level2')} -> {category}")
+        return result
+
+    def _stage_template(self, context):
+        """阶段：查询分类对应的新维度体系评估标准"""
+        category = self._resolve_category(context)
+        if not category:
+            return None
+        return self.build_category_criteria(category)
+
+    def build_category_criteria(self, category, template_result=None):
+        """
+        根据分类的标准配置构建评估标准文本
+
+        Args:
+            category: 二级分类名称
+            template_result: 已查询好的模板结果（可选，批量评估时复用）
+
+        Returns:
+            str: 评估标准文本，未配置时返回None
+        """
+        try:
+            from utils.database_operations import db_ops
+            if template_result is None:
+                # 评估标准文本由db_ops按配置版本缓存，热路径不再查询和解析
+                criteria = db_ops.get_evaluation_criteria_text(category)
+            elif template_result['success'] and template_result['data']:
+                criteria = db_ops.format_evaluation_criteria(template_result['data'])
+            else:
+                criteria = None
+
+            if criteria:
+                self.logger.info(f"使用新维度体系评估标准，分类: {category}")
+                return criteria
+        except Exception as e:
+            self.logger.warning(f"获取新维度体系评估标准失败，将使用默认标准: {str(e)}")
+        return None
+
+    def _select_prompt_template(self, context):
+        """选择prompt模板：优先使用自定义的scoring_prompt，否则使用分类对应的prompt_template"""
+        if context.get('scoring_prompt'):
+            self.logger.info("使用自定义的scoring_prompt作为评估模板")
+            return context['scoring_prompt']
+
+        self.logger.info("使用分类对应的prompt_template作为评估模板")
+        return self.classification_service.get_prompt_template_by_classification(
+            self._apply_category(context.get('classify'), context.get('category'))
+        )
+
+    @staticmethod
+    def _evaluation_criteria(context):
+        """评估使用的标准：如果有新的评估标准，使用新标准；否则使用原评估标准"""
+        return context.get('template') or context['evaluation_criteria']
+
+    def _stage_evaluate(self, context):
+        """阶段：调用LLM进行质量评估"""
+        # 自定义prompt未引用评估标准时本阶段不等待标准查询，此处的标准只用于填充prompt
+        evaluation_criteria = self._evaluation_criteria(context)
+
+        return self.evaluation_service.evaluate_response(
+            user_query=context['user_input'],
+            model_response=context['model_answer'],
+            reference_answer=context['reference_answer'],
+            scoring_prompt=self._select_prompt_template(context),
+            question_time=context['question_time'],
+            evaluation_criteria=evaluation_criteria,
+            bypass_cache=bool(context.get('bypass_cache'))
+        )
+
+    def _stage_score(self, context):
+        """阶段：计算加权平均总分并判断AI badcase"""
+        # 本阶段在标准查询完成后执行，保存的评估标准不受评估阶段与标准查询阶段完成顺序的影响
+        evaluation_criteria = self._evaluation_criteria(context)
+        context['evaluation_criteria_used'] = evaluation_criteria
+        result = context['evaluate']
+        result['evaluation_criteria_used'] = evaluation_criteria
+        return self.apply_weighted_score(result, self._resolve_category(context))
+
+    def apply_weighted_score(self, result, category):
+        """根据维度分数计算加权平均总分，并写入AI badcase判断"""
+        if result.get('dimensions') and category:
+            try:
+                weighted_score = self.evaluation_service.calculate_weighted_score(result['dimensions'], category)
+                result['score'] = weighted_score / 10.0  # 转换为10分制显示，但内部存储为百分比
+                result['weighted_score'] = weighted_score  # 保存百分比形式的分数
+                self.logger.info(f"计算加权平均分数: {weighted_score:.2f}% -> 显示分数: {result['score']:.2f}/10")
+            except Exception as e:
+                self.logger.error(f"计算加权平均分数失败: {str(e)}")
+                # 使用原有分数作为备用
+
+        # AI自动判断是否为badcase（基于分数阈值）
+        result['ai_is_badcase'] = (result.get('weighted_score', 100.0) < AI_BADCASE_THRESHOLD)
+        return result
+
+    # ==================== 历史保存 ====================
+
+    def build_save_data(self, request_data, result, evaluation_criteria):
+        """构建保存到评估历史的数据"""
+        return {
+            'user_input': request_data['user_input'],
+            'model_answer': request_data['model_answer'],
+            'reference_answer': request_data['reference_answer'],
+            'question_time': request_data['question_time'],
+            'evaluation_criteria_used': evaluation_criteria,
+            'score': result.get('weighted_score', result.get('score', 0)) / 10.0,  # 保存为10分制
+            'dimensions': result.get('dimensions', {}),
+            'reasoning': result.get('reasoning'),
+            'evaluation_time_seconds': result.get('evaluation_time_seconds'),
+            'model_used': result.get('model_used'),
+            'raw_response': result.get('raw_response'),
+            'uploaded_images': request_data.get('uploaded_images', []),  # 添加图片信息
+            'ai_is_badcase': result.get('ai_is_badcase', False),  # AI判断的badcase
+            'is_badcase': result.get('ai_is_badcase', False)  # 初始设置为AI判断结果
+        }
+
+    def _save_history(self, save_data, classification_result):
+        """保存评估结果到历史记录，返回保存结果（不抛出异常）"""
+        try:
+            save_result = self.evaluation_history_service.save_evaluation_result(save_data, classification_result)
+            if save_result['success']:
+                self.logger.info(f"评估结果已保存到历史记录，ID: {save_result['history_id']}")
+            else:
+                self.logger.warning(f"保存评估历史失败: {save_result['message']}")
+            return save_result
+        except Exception as save_error:
+            self.logger.error(f"保存评估历史时发生错误: {str(save_error)}")
+            return {'success': False, 'message': str(save_error)}
+
+    def _save_history_in_background(self, save_data, classification_result):
+        """响应返回后在后台线程中保存评估历史"""
+        def task():
+            started = time.time()
+            with self.app.app_context():
+                self._save_history(save_data, classification_result)
+            self.logger.info(f"后台保存评估历史完成，耗时: {(time.time() - started) * 1000:.1f}ms")
+
+        self.history_save_executor.submit(task)
+
+    # ==================== 入口 ====================
+
+    def _prompt_needs_criteria(self, scoring_prompt):
+        """判断自定义prompt是否引用了评估标准变量"""
+        for variant in self.evaluation_service.variable_mapping['evaluation_criteria']:
+            if '{' + variant + '}' in scoring_prompt:
+                return True
+        return False
+
+    def run(self, request_data):
+        """
+        执行评估流水线
+
+        Args:
+            request_data: 已校验的请求数据，除 /api/evaluate 的原有字段外还支持：
+                category: 客户端已知的二级分类（如已调用 /api/classify），评估标准查询无需等待分类
+                defer_history_save: 是否在响应返回后再保存历史记录（响应中不含history_id），
+                    未指定时使用环境变量 EVALUATION_DEFER_HISTORY_SAVE（默认false）
+                bypass_cache: 为True时跳过LLM响应缓存，强制重新评估
+
+        Returns:
+            dict: 评估结果，pipeline 字段包含各阶段耗时
+        """
+        context = dict(request_data)
+        known_category = bool(context.get('category'))
+        scoring_prompt = context.get('scoring_prompt')
+
+        # 评估标准查询：已知分类时立即开始，否则等待分类结果
+        template_deps = [] if known_category else ['classify']
+
+        # LLM评估：自定义prompt不需要分类选择模板；只有引用了评估标准变量时才需要等待标准查询
+        if scoring_prompt:
+            evaluate_deps = ['template'] if self._prompt_needs_criteria(scoring_prompt) else []
+        else:
+            evaluate_deps = ['classify', 'template']
+
+        stages = [
+            PipelineStage('classify', self._stage_classify),
+            PipelineStage('template', self._stage_template, depends_on=template_deps),
+            PipelineStage('evaluate', self._stage_evaluate, depends_on=evaluate_deps),
+            PipelineStage('score', self._stage_score, depends_on=['evaluate', 'template']),
+        ]
+
+        context = self.stage_runner.run(stages, context)
+
+        result = context['score']
+        classification_result = self._apply_category(context.get('classify'), context.get('category'))
+
+        # 添加分类信息到评估结果
+        if classification_result:
+            result['classification'] = classification_result
+
+        # 添加模型使用信息
+        result['model_used'] = 'deepseek-chat'  # 记录使用的模型
+
+        save_data = self.build_save_data(context, result, context.get('evaluation_criteria_used'))
+        timings = context['_timings']
+
+        defer_save = context.get('defer_history_save')
+        if defer_save is None:
+            defer_save = self.defer_history_save
+
+        if defer_save:
+            self._save_history_in_background(save_data, classification_result)
+            result['history_pending'] = True
+        else:
+            save_started = time.time()
+            save_result = self._save_history(save_data, classification_result)
+            timings['save'] = {
+                'started_at_ms': context['_total_ms'],
+                'latency_ms': round((time.time() - save_started) * 1000, 1)
+            }
+            if save_result.get('success'):
+                result['history_id'] = save_result['history_id']
+
+        result['pipeline'] = {
+            'stages': timings,
+            'total_ms': context['_total_ms'],
+            'history_save': 'deferred' if defer_save else 'inline',
+            'completed_at': datetime.now().isoformat()
+        }
+        return result
+
+    # ==================== 批量评估 ====================
+
+    def _evaluate_batch_item(self, item, snapshot, get_category_criteria):
+        """评估批量请求中的单条数据（在批量线程池中执行）"""
+        with self.app.app_context():
+            classification_result = self.classification_service.classify_user_input(item['user_input'], snapshot)
+            # 指定了分类时保存的二级分类与计算权重、查询评估标准使用的分类一致
+            classification_result = self._apply_category(classification_result, item.get('category'), snapshot)
+            category = classification_result.get('level2')
+
+            category_criteria = get_category_criteria(category) if category else None
+            evaluation_criteria = category_criteria or item['evaluation_criteria']
+
+            context = dict(item)
+            context['classify'] = classification_result
+            result = self.evaluation_service.evaluate_response(
+                user_query=item['user_input'],
+                model_response=item['model_answer'],
+                reference_answer=item['reference_answer'],
+                scoring_prompt=self._select_prompt_template(context),
+                question_time=item['question_time'],
+                evaluation_criteria=evaluation_criteria,
+                bypass_cache=bool(item.get('bypass_cache'))
+            )
+
+            result = self.apply_weighted_score(result, category)
+            result['classification'] = classification_result
+            result['model_used'] = 'deepseek-chat'  # 记录使用的模型
+
+            save_data = self.build_save_data(item, result, evaluation_criteria)
+            return result, save_data, classification_result
+
+    def run_batch(self, items):
+        """
+        批量评估
+
+        整个批次共享一份分类标准快照，每个分类只查询一次评估标准模板，
+        各条数据在有界线程池中并发评估，全部完成后一次性批量写入评估历史
+
+        Args:
+            items: 已补全默认值的评估数据列表（字段与 /api/evaluate 相同）
+
+        Returns:
+            dict: 每条数据的评估结果或错误信息，以及汇总统计
+        """
+        batch_start = time.time()
+
+        # 整个批次共享一份分类标准快照
+        with self.app.app_context():
+            snapshot = self.classification_service.get_taxonomy_snapshot()
+
+        # 每个分类只查询一次评估标准模板
+        criteria_cache = {}
+        criteria_locks = {}
+        cache_lock = threading.Lock()
+
+        def get_category_criteria(category):
+            with cache_lock:
+                category_lock = criteria_locks.setdefault(category, threading.Lock())
+            with category_lock:
+                if category not in criteria_cache:
+                    criteria_cache[category] = self.build_category_criteria(category)
+                return criteria_cache[category]
+
+        futures = [
+            self.batch_executor.submit(self._evaluate_batch_item, item, snapshot, get_category_criteria)
+            for item in items
+        ]
+
+        results = []
+        save_entries = []
+        save_indexes = []
+        for index, future in enumerate(futures):
+            try:
+                result, save_data, classification_result = future.result()
+                results.append({'index': index, 'success': True, 'result': result})
+                save_entries.append((save_data, classification_result))
+                save_indexes.append(index)
+            except Exception as e:
+                self.logger.error(f"批量评估第 {index} 条数据失败: {str(e)}")
+                results.append({'index': index, 'success': False, 'error': str(e)})
+
+        # 所有评估历史一次性批量写入
+        save_started = time.time()
+        with self.app.app_context():
+            save_result = self.evaluation_history_service.save_evaluation_results_bulk(save_entries)
+        for index, history_id in zip(save_indexes, save_result.get('history_ids', [])):
+            if history_id is not None:
+                results[index]['result']['history_id'] = history_id
+
+        succeeded = len(save_indexes)
+        total_seconds = time.time() - batch_start
+        self.logger.info(f"批量评估完成，共 {len(items)} 条，成功 {succeeded} 条，失败 {len(items) - succeeded} 条，耗时: {total_seconds:.2f}秒")
+
+        return {
+            'success': True,
+            'total': len(items),
+            'succeeded': succeeded,
+            'failed': len(items) - succeeded,
+            'results': results,
+            'history_saved': save_result.get('success', False),
+            'history_message': save_result.get('message'),
+            'categories_loaded': len(criteria_cache),
+            'timing': {
+                'total_seconds': round(total_seconds, 3),
+                'save_seconds': round(time.time() - save_started, 3),
+                'workers': self.batch_workers
+            }
+        }
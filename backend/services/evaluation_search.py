@@ -0,0 +1,188 @@
+"""
+评估历史全文检索
+基于 SQLite FTS5 的外部内容表 evaluation_history_fts 索引问题、回答、评估理由、人工评估理由和badcase原因，
+由 evaluation_history 上的触发器保持同步（包括绕过ORM的SQL修改）；
+使用 trigram 分词器，中文按任意3个字以上的子串检索，更短的检索词退化为 LIKE 匹配
+"""
+import html
+import re
+
+from sqlalchemy import select, table, column, literal, literal_column, and_, or_
+
+from models.classification import db
+from utils.logger import get_logger
+
+
+class EvaluationSearch:
+    """evaluation_history 的全文索引维护和检索"""
+
+    FTS_TABLE = 'evaluation_history_fts'
+    # 被索引的列及其在相关度排序（bm25）中的权重
+    COLUMN_WEIGHTS = (
+        ('user_input', 3.0),
+        ('model_answer', 1.0),
+        ('reasoning', 1.0),
+        ('human_reasoning', 1.0),
+        ('badcase_reason', 2.0),
+    )
+    # trigram 分词器只能用 MATCH 检索不少于3个字符的检索词
+    MIN_MATCH_TERM_LENGTH = 3
+    MAX_QUERY_LENGTH = 200
+    MAX_TERMS = 10
+    SNIPPET_TOKENS = 32
+    SNIPPET_CONTEXT = 24
+    # 摘要中命中部分的标记：先用控制字符占位，HTML转义后再替换为 <mark>
+    _HIGHLIGHT_START = '\x02'
+    _HIGHLIGHT_END = '\x03'
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self.columns = [name for name, _ in self.COLUMN_WEIGHTS]
+        self.fts = table(self.FTS_TABLE, column('rowid'), column('rank'), *[column(name) for name in self.columns])
+
+    # ==================== 索引维护 ====================
+
+    def create_index(self, conn):
+        """创建全文索引表和同步触发器，并从 evaluation_history 全量建立索引（在调用方的事务中执行，不提交）"""
+        columns = ', '.join(self.columns)
+        new_values = ', '.join(f'new.{name}' for name in self.columns)
+        old_values = ', '.join(f'old.{name}' for name in self.columns)
+        delete_old = (
+            f"INSERT INTO {self.FTS_TABLE}({self.FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        insert_new = f"INSERT INTO {self.FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.FTS_TABLE} USING fts5("
+            f"{columns}, content='evaluation_history', content_rowid='id', tokenize='trigram')"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.FTS_TABLE}_ai AFTER INSERT ON evaluation_history BEGIN "
+            f"{insert_new} END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.FTS_TABLE}_ad AFTER DELETE ON evaluation_history BEGIN "
+            f"{delete_old} END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {self.FTS_TABLE}_au AFTER UPDATE OF {columns} ON evaluation_history BEGIN "
+            f"{delete_old} {insert_new} END"
+        )
+        weights = ', '.join(str(weight) for _, weight in self.COLUMN_WEIGHTS)
+        conn.exec_driver_sql(
+            f"INSERT INTO {self.FTS_TABLE}({self.FTS_TABLE}, rank) VALUES ('rank', 'bm25({weights})')"
+        )
+        self.rebuild(conn)
+
+    def rebuild(self, conn):
+        """从 evaluation_history 重建全文索引（在调用方的事务中执行，不提交）"""
+        conn.exec_driver_sql(f"INSERT INTO {self.FTS_TABLE}({self.FTS_TABLE}) VALUES ('rebuild')")
+        self.logger.info("评估历史全文索引已重建")
+
+    # ==================== 检索 ====================
+
+    def parse_terms(self, search_query):
+        """按空白拆分检索词（去重，最多 MAX_TERMS 个）"""
+        terms = []
+        for term in (search_query or '').strip()[:self.MAX_QUERY_LENGTH].split():
+            if term not in terms:
+                terms.append(term)
+        return terms[:self.MAX_TERMS]
+
+    def _split_terms(self, terms):
+        match_terms = [term for term in terms if len(term) >= self.MIN_MATCH_TERM_LENGTH]
+        like_terms = [term for term in terms if len(term) < self.MIN_MATCH_TERM_LENGTH]
+        return match_terms, like_terms
+
+    @staticmethod
+    def _match_expression(match_terms):
+        """每个检索词作为短语检索，多个检索词之间为AND"""
+        return ' '.join('"' + term.replace('"', '""') + '"' for term in match_terms)
+
+    def _like_condition(self, term):
+        pattern = '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+        return or_(*[self.fts.c[name].like(pattern, escape='\\') for name in self.columns])
+
+    def match_cte(self, search_query):
+        """
+        构建检索结果的CTE
+
+        Returns:
+            CTE (history_id, rank)，rank 越小越相关
+
+        Raises:
+            ValueError: 检索词为空
+        """
+        terms = self.parse_terms(search_query)
+        if not terms:
+            raise ValueError('检索词不能为空')
+
+        match_terms, like_terms = self._split_terms(terms)
+        conditions = [self._like_condition(term) for term in like_terms]
+        if match_terms:
+            conditions.append(literal_column(self.FTS_TABLE).op('MATCH')(self._match_expression(match_terms)))
+            rank = self.fts.c.rank
+        else:
+            # 没有可用MATCH的检索词时无法计算相关度
+            rank = literal(0.0)
+
+        # 物化后 MATCH 只执行一次；否则与其它筛选条件组合时规划器可能对每条候选记录各执行一次 MATCH
+        return select(
+            self.fts.c.rowid.label('history_id'), rank.label('rank')
+        ).where(and_(*conditions)).cte('search_matches').prefix_with('MATERIALIZED')
+
+    def snippets(self, search_query, history_ids):
+        """
+        获取命中记录的摘要，命中部分用 <mark></mark> 标出（其余内容已做HTML转义）
+
+        Returns:
+            dict: {记录ID: 摘要}
+        """
+        terms = self.parse_terms(search_query)
+        if not terms or not history_ids:
+            return {}
+        match_terms, like_terms = self._split_terms(terms)
+        conn = db.session.connection()
+
+        if match_terms:
+            rows = conn.exec_driver_sql(
+                f"SELECT rowid, snippet({self.FTS_TABLE}, -1, ?, ?, '...', ?) FROM {self.FTS_TABLE} "
+                f"WHERE {self.FTS_TABLE} MATCH ? AND rowid IN ({', '.join('?' * len(history_ids))})",
+                (self._HIGHLIGHT_START, self._HIGHLIGHT_END, self.SNIPPET_TOKENS,
+                 self._match_expression(match_terms), *history_ids)
+            ).fetchall()
+            return {history_id: self._render_snippet(snippet) for history_id, snippet in rows}
+
+        rows = conn.exec_driver_sql(
+            f"SELECT rowid, {', '.join(self.columns)} FROM {self.FTS_TABLE} "
+            f"WHERE rowid IN ({', '.join('?' * len(history_ids))})", tuple(history_ids)
+        ).fetchall()
+        return {row[0]: self._like_snippet(row[1:], like_terms) for row in rows}
+
+    def _like_snippet(self, values, terms):
+        """在第一个命中的字段中截取检索词附近的文本作为摘要（MATCH不可用时）"""
+        for value in values:
+            if not value:
+                continue
+            lowered = value.lower()
+            positions = [(lowered.find(term.lower()), term) for term in terms]
+            positions = [(position, term) for position, term in positions if position >= 0]
+            if not positions:
+                continue
+            position, term = min(positions)
+            start = max(position - self.SNIPPET_CONTEXT, 0)
+            end = position + len(term) + self.SNIPPET_CONTEXT
+            snippet = (
+                value[start:position] + self._HIGHLIGHT_START + value[position:position + len(term)]
+                + self._HIGHLIGHT_END + value[position + len(term):end]
+            )
+            return self._render_snippet(('...' if start > 0 else '') + snippet + ('...' if end < len(value) else ''))
+        return ''
+
+    def _render_snippet(self, snippet):
+        return html.escape(snippet or '').replace(self._HIGHLIGHT_START, '<mark>').replace(self._HIGHLIGHT_END, '</mark>')
+
+
+# 创建全局实例
+evaluation_search = EvaluationSearch()
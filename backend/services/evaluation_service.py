@@ -1,8 +1,12 @@
+import asyncio
 import re
 import time
 from datetime import datetime
 from .llm_client import LLMClient
+from .async_llm_client import async_llm_client
 from utils.logger import get_logger
+from utils.llm_response_cache import llm_response_cache
+from .dimension_weight_registry import dimension_weight_registry
 
 class EvaluationService:
     """问答质量评估服务类"""
@@ -10,6 +14,9 @@ class EvaluationService:
     def __init__(self):
         self.logger = get_logger(__name__)
         self.llm_client = LLMClient()
+        self.async_llm_client = async_llm_client
+        self.response_cache = llm_response_cache
+        self.weight_registry = dimension_weight_registry
         
         # 定义变量名映射，支持多种变体
         self.variable_mapping = {
@@ -25,7 +32,7 @@ class EvaluationService:
             'evaluation_criteria': ['evaluation_criteria', 'criteria', 'standards', 'scoring_criteria', 'eval_standards']
         }
         
-    def evaluate_response(self, user_query, model_response, reference_answer, scoring_prompt, question_time=None, evaluation_criteria=None):
+    def evaluate_response(self, user_query, model_response, reference_answer, scoring_prompt, question_time=None, evaluation_criteria=None, bypass_cache=False):
         """
         评估模型回答质量
         
@@ -36,6 +43,7 @@ class EvaluationService:
             scoring_prompt: 评分规则模板
             question_time: 问题提出时间 (可选)
             evaluation_criteria: 详细的评估标准 (可选)
+            bypass_cache: 为True时跳过LLM响应缓存，强制重新调用LLM (可选)
             
         Returns:
             dict: 包含评分结果的字典
@@ -52,29 +60,103 @@ class EvaluationService:
             
             self.logger.info("发送请求到LLM API进行质量评估")
             
-            # 调用LLM API进行评估，指定使用evaluation任务类型
-            evaluation_response = self.llm_client.get_evaluation(full_prompt, task_type='evaluation')
+            # 相同模型、温度和prompt的评估直接使用缓存的响应
+            model_name, temperature = self._get_evaluation_model_params()
+            evaluation_response = self._get_cached_response(model_name, temperature, full_prompt, bypass_cache)
+            cache_hit = evaluation_response is not None
             
-            self.logger.info("开始解析评估结果")
+            if not cache_hit:
+                # 调用LLM API进行评估，指定使用evaluation任务类型
+                evaluation_response = self.llm_client.get_evaluation(full_prompt, task_type='evaluation')
             
-            # 解析评估结果
-            parsed_result = self._parse_evaluation_result(evaluation_response)
+            result = self._finalize_evaluation(evaluation_response, start_time, question_time, evaluation_criteria)
+            if self._should_cache(result, cache_hit):
+                self.response_cache.set(model_name, temperature, full_prompt, evaluation_response)
+            result['cache_hit'] = cache_hit
+            return result
             
-            # 添加元数据
-            parsed_result.update({
-                'timestamp': datetime.now().isoformat(),
-                'evaluation_time_seconds': round(time.time() - start_time, 2),
-                'question_time': question_time,  # 保存问题时间
-                'evaluation_criteria_used': evaluation_criteria  # 保存评估标准
-            })
+        except Exception as e:
+            self.logger.error(f"评估过程中发生错误: {str(e)}")
+            raise e
+    
+    async def evaluate_response_async(self, user_query, model_response, reference_answer, scoring_prompt, question_time=None, evaluation_criteria=None, bypass_cache=False):
+        """
+        评估模型回答质量（异步版本，参数和返回值与 evaluate_response 相同）
+        
+        LLM调用在共享的后台事件循环中执行，受全局及按模型的并发上限约束，
+        可通过 async_llm_client.submit/run_all 在同一进程内并发发起大量评估；
+        LLM响应缓存的读写（SQLite）在线程池中执行，不阻塞事件循环上的其它调用
+        """
+        start_time = time.time()
+        
+        try:
+            full_prompt = self._build_evaluation_prompt(
+                user_query, model_response, reference_answer, scoring_prompt, question_time, evaluation_criteria
+            )
             
-            self.logger.info(f"评估完成，耗时: {parsed_result['evaluation_time_seconds']}秒")
-            return parsed_result
+            model_name, temperature = self._get_evaluation_model_params()
+            evaluation_response = await asyncio.to_thread(
+                self._get_cached_response, model_name, temperature, full_prompt, bypass_cache
+            )
+            cache_hit = evaluation_response is not None
+            
+            if not cache_hit:
+                self.logger.info("发送异步请求到LLM API进行质量评估")
+                evaluation_response = await self.async_llm_client.get_evaluation_async(full_prompt, task_type='evaluation')
+            
+            result = self._finalize_evaluation(evaluation_response, start_time, question_time, evaluation_criteria)
+            if self._should_cache(result, cache_hit):
+                await asyncio.to_thread(self.response_cache.set, model_name, temperature, full_prompt, evaluation_response)
+            result['cache_hit'] = cache_hit
+            return result
             
         except Exception as e:
-            self.logger.error(f"评估过程中发生错误: {str(e)}")
+            self.logger.error(f"异步评估过程中发生错误: {str(e)}")
             raise e
     
+    def _get_evaluation_model_params(self):
+        """获取评估调用使用的模型和温度（缓存key的组成部分）"""
+        model_name = self.llm_client.models.get('evaluation', self.llm_client.default_model)
+        return model_name, self.llm_client.temperature
+    
+    def _get_cached_response(self, model_name, temperature, full_prompt, bypass_cache):
+        """查询LLM响应缓存，未命中或跳过缓存时返回None"""
+        if bypass_cache:
+            self.response_cache.record_bypass()
+            return None
+        
+        cached_response = self.response_cache.get(model_name, temperature, full_prompt)
+        if cached_response is not None:
+            self.logger.info(f"命中LLM响应缓存，模型: {model_name}, 温度: {temperature}")
+        return cached_response
+    
+    def _should_cache(self, result, cache_hit):
+        """只缓存成功解析出维度分数的新响应（截断或无法解析的响应不缓存，下次重新调用LLM）"""
+        if cache_hit:
+            return False
+        if not result.get('dimensions'):
+            self.logger.warning("评估响应未解析出维度分数，不写入LLM响应缓存")
+            return False
+        return True
+    
+    def _finalize_evaluation(self, evaluation_response, start_time, question_time, evaluation_criteria):
+        """解析LLM评估响应并添加元数据"""
+        self.logger.info("开始解析评估结果")
+        
+        # 解析评估结果
+        parsed_result = self._parse_evaluation_result(evaluation_response)
+        
+        # 添加元数据
+        parsed_result.update({
+            'timestamp': datetime.now().isoformat(),
+            'evaluation_time_seconds': round(time.time() - start_time, 2),
+            'question_time': question_time,  # 保存问题时间
+            'evaluation_criteria_used': evaluation_criteria  # 保存评估标准
+        })
+        
+        self.logger.info(f"评估完成，耗时: {parsed_result['evaluation_time_seconds']}秒")
+        return parsed_result
+    
     def _build_evaluation_prompt(self, user_query, model_response, reference_answer, scoring_prompt, question_time=None, evaluation_criteria=None):
         """构建完整的评估prompt，支持多种变量名变体"""
         
@@ -317,7 +399,7 @@ class EvaluationService:
         Args:
             dimensions: 各维度的评分字典
             level2_category: 二级分类名称
-            db_connection: 数据库连接
+            db_connection: 数据库连接（可选，不指定时使用内存中的维度权重注册表）
             
         Returns:
             float: 加权平均总分（百分比形式，0-100）
@@ -326,33 +408,25 @@ class EvaluationService:
             return 100.0  # 默认100%
             
         try:
-            # 从数据库获取该分类下各维度的权重和最大分数
-            if db_connection is None:
-                import sqlite3
-                db_connection = sqlite3.connect('database/qa_evaluation.db')
-                should_close = True
-            else:
-                should_close = False
+            if db_connection is not None:
+                # 指定了数据库连接时直接从该连接读取
+                cursor = db_connection.cursor()
+                cursor.execute("""
+                    SELECT dimension, weight, max_score 
+                    FROM evaluation_standards 
+                    WHERE level2_category = ?
+                """, (level2_category,))
                 
-            cursor = db_connection.cursor()
-            
-            # 查询该分类下的维度权重和最大分数
-            cursor.execute("""
-                SELECT dimension, weight, max_score 
-                FROM evaluation_standards 
-                WHERE level2_category = ?
-            """, (level2_category,))
-            
-            dimension_configs = {}
-            for row in cursor.fetchall():
-                dimension_name, weight, max_score = row
-                dimension_configs[dimension_name] = {
-                    'weight': weight or 1.0,
-                    'max_score': max_score or 2
-                }
-            
-            if should_close:
-                db_connection.close()
+                dimension_configs = {}
+                for row in cursor.fetchall():
+                    dimension_name, weight, max_score = row
+                    dimension_configs[dimension_name] = {
+                        'weight': weight or 1.0,
+                        'max_score': max_score or 2
+                    }
+            else:
+                # 从内存中的维度权重注册表获取该分类下各维度的权重和最大分数
+                dimension_configs = self.weight_registry.get_category_weights(level2_category)
             
             if not dimension_configs:
                 self.logger.warning(f"未找到分类 {level2_category} 的维度配置，使用等权重")
@@ -6,6 +6,7 @@
 import json
 from models.classification import db
 from models.evaluation_dimension import EvaluationDimension, CategoryDimensionMapping
+from utils.database_operations import category_template_cache
 from datetime import datetime
 
 class EvaluationStandardConfigService:
@@ -42,6 +43,7 @@ class EvaluationStandardConfigService:
                 db.session.add(mapping)
             
             db.session.commit()
+            category_template_cache.bump()
             
             return {
                 'success': True,
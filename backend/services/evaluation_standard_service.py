@@ -6,6 +6,7 @@ from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 from models.classification import db, EvaluationStandard
 from utils.logger import get_logger
+from .dimension_weight_registry import dimension_weight_registry
 
 class EvaluationStandardService:
     """评估标准管理服务类"""
@@ -79,6 +80,7 @@ class EvaluationStandardService:
             new_standard = EvaluationStandard.from_dict(standard_data)
             db.session.add(new_standard)
             db.session.commit()
+            dimension_weight_registry.invalidate()
             
             self.logger.info(f"成功创建评估标准: {new_standard.level2_category}-{new_standard.dimension}")
             return new_standard.to_dict()
@@ -116,6 +118,7 @@ class EvaluationStandardService:
             
             standard.updated_at = datetime.utcnow()
             db.session.commit()
+            dimension_weight_registry.invalidate()
             
             self.logger.info(f"成功更新评估标准: {standard.level2_category}-{standard.dimension}")
             return standard.to_dict()
@@ -141,6 +144,7 @@ class EvaluationStandardService:
             
             db.session.delete(standard)
             db.session.commit()
+            dimension_weight_registry.invalidate()
             
             self.logger.info(f"成功删除评估标准: {standard.level2_category}-{standard.dimension}")
             return True
@@ -207,6 +211,7 @@ class EvaluationStandardService:
                     updated_count += 1
             
             db.session.commit()
+            dimension_weight_registry.invalidate()
             
             self.logger.info(f"成功更新分类 {level2_category} 下 {updated_count} 个维度的权重")
             return {
@@ -545,6 +550,7 @@ class EvaluationStandardService:
                 db.session.add(standard)
             
             db.session.commit()
+            dimension_weight_registry.invalidate()
             self.logger.info(f"默认评估标准初始化完成，共创建 {len(default_standards)} 条记录")
             return True
             
@@ -0,0 +1,263 @@
+"""
+评估统计汇总表维护
+evaluation_history 的新增、人工评估更新和删除在 flush 时同步更新（同一事务）
+evaluation_daily_stats 和 evaluation_dimension_daily_stats，统计接口只读取汇总表；
+绕过ORM修改过历史数据时，可用 rebuild() 从 evaluation_history 全量重建
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect, select, update, delete, func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.classification import (
+    db, EvaluationHistory, EvaluationDailyStat, EvaluationDimensionDailyStat, EvaluationDimensionScore
+)
+from utils.logger import get_logger
+
+
+class EvaluationStatsRollup:
+    """按 分类 + 日期 增量维护评估统计"""
+
+    # 影响汇总结果的字段，只修改其它字段时不更新汇总表
+    TRACKED_FIELDS = (
+        'classification_level2', 'created_at', 'total_score', 'is_badcase', 'ai_is_badcase',
+        'human_is_badcase', 'dimensions_json', 'human_dimensions_json'
+    )
+    # evaluation_daily_stats 中按增量累加的列
+    COUNTER_COLUMNS = (
+        'evaluation_count', 'score_sum', 'badcase_count', 'ai_badcase_count', 'human_badcase_count',
+        'ai_dimension_evaluations', 'human_dimension_evaluations'
+    )
+    # 单条 IN 查询的最大ID数
+    ID_CHUNK_SIZE = 500
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self.enabled = os.getenv('STATS_ROLLUP_ENABLED', 'true').lower() == 'true'
+        self._stats_lock = threading.Lock()
+        self._stats = {'flushes': 0, 'records_applied': 0, 'min_max_recomputes': 0, 'rebuilds': 0}
+        # 每次评估历史变化（flush）或重建后递增，供统计结果缓存判断是否过期
+        self.generation = 0
+
+    # ==================== 单条记录的贡献 ====================
+
+    def _add_contribution(self, deltas, row, sign):
+        """将一条评估记录的统计贡献（sign=1 加入，-1 移除）累加到 deltas"""
+        daily, dimensions = deltas
+        created_at = row['created_at'] or datetime.utcnow()
+        category = row['classification_level2'] or ''
+        stat_date = created_at.strftime('%Y-%m-%d')
+        score = float(row['total_score'] or 0.0)
+
+        delta = daily.get((category, stat_date))
+        if delta is None:
+            delta = dict.fromkeys(self.COUNTER_COLUMNS, 0)
+            delta.update({'score_min': None, 'score_max': None, 'removed': False})
+            daily[(category, stat_date)] = delta
+
+        delta['evaluation_count'] += sign
+        delta['score_sum'] += sign * score
+        delta['badcase_count'] += sign * bool(row['is_badcase'])
+        delta['ai_badcase_count'] += sign * bool(row['ai_is_badcase'])
+        delta['human_badcase_count'] += sign * bool(row['human_is_badcase'])
+        delta['ai_dimension_evaluations'] += sign * bool(row['dimensions_json'])
+        delta['human_dimension_evaluations'] += sign * bool(row['human_dimensions_json'])
+        if sign > 0:
+            delta['score_min'] = score if delta['score_min'] is None else min(delta['score_min'], score)
+            delta['score_max'] = score if delta['score_max'] is None else max(delta['score_max'], score)
+        else:
+            # 移除记录后最低/最高分需要重新计算
+            delta['removed'] = True
+
+        for source, column in (('ai', 'dimensions_json'), ('human', 'human_dimensions_json')):
+            for dimension, dimension_score in EvaluationDimensionScore.parse_scores(row[column]).items():
+                key = (category, stat_date, source, dimension, dimension_score)
+                dimensions[key] = dimensions.get(key, 0) + sign
+
+    # ==================== 写入汇总表 ====================
+
+    def _apply_deltas(self, conn, deltas):
+        daily, dimensions = deltas
+        daily_table = EvaluationDailyStat.__table__
+        dimension_table = EvaluationDimensionDailyStat.__table__
+
+        for (category, stat_date), delta in daily.items():
+            stmt = sqlite_insert(daily_table).values(
+                category=category,
+                stat_date=stat_date,
+                score_min=delta['score_min'],
+                score_max=delta['score_max'],
+                **{name: delta[name] for name in self.COUNTER_COLUMNS}
+            )
+            set_ = {name: daily_table.c[name] + stmt.excluded[name] for name in self.COUNTER_COLUMNS}
+            # SQLite的多参数min/max遇到NULL返回NULL，需要先coalesce
+            set_['score_min'] = func.min(
+                func.coalesce(daily_table.c.score_min, stmt.excluded.score_min),
+                func.coalesce(stmt.excluded.score_min, daily_table.c.score_min)
+            )
+            set_['score_max'] = func.max(
+                func.coalesce(daily_table.c.score_max, stmt.excluded.score_max),
+                func.coalesce(stmt.excluded.score_max, daily_table.c.score_max)
+            )
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[daily_table.c.category, daily_table.c.stat_date], set_=set_
+            ))
+            if delta['removed']:
+                self._recompute_min_max(conn, category, stat_date)
+
+        for (category, stat_date, source, dimension, score), count in dimensions.items():
+            if count == 0:
+                continue
+            stmt = sqlite_insert(dimension_table).values(
+                category=category, stat_date=stat_date, source=source,
+                dimension=dimension, score=score, score_count=count
+            )
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[
+                    dimension_table.c.category, dimension_table.c.stat_date, dimension_table.c.source,
+                    dimension_table.c.dimension, dimension_table.c.score
+                ],
+                set_={'score_count': dimension_table.c.score_count + stmt.excluded.score_count}
+            ))
+
+        if any(delta['removed'] for delta in daily.values()):
+            conn.execute(delete(daily_table).where(daily_table.c.evaluation_count <= 0))
+            conn.execute(delete(dimension_table).where(dimension_table.c.score_count <= 0))
+
+    def _recompute_min_max(self, conn, category, stat_date):
+        """从 evaluation_history 重新计算某个 分类 + 日期 的最低/最高分（走分类+创建时间索引）"""
+        history = EvaluationHistory.__table__
+        day_start = datetime.strptime(stat_date, '%Y-%m-%d')
+        if category:
+            category_condition = history.c.classification_level2 == category
+        else:
+            category_condition = or_(history.c.classification_level2.is_(None), history.c.classification_level2 == '')
+
+        score_min, score_max = conn.execute(
+            select(func.min(history.c.total_score), func.max(history.c.total_score)).where(
+                category_condition,
+                history.c.created_at >= day_start,
+                history.c.created_at < day_start + timedelta(days=1)
+            )
+        ).one()
+
+        daily_table = EvaluationDailyStat.__table__
+        conn.execute(update(daily_table).where(
+            daily_table.c.category == category, daily_table.c.stat_date == stat_date
+        ).values(score_min=score_min, score_max=score_max))
+        with self._stats_lock:
+            self._stats['min_max_recomputes'] += 1
+
+    def _load_rows(self, conn, ids):
+        """按ID读取记录中影响统计的字段"""
+        history = EvaluationHistory.__table__
+        columns = [history.c[name] for name in self.TRACKED_FIELDS]
+        ids = list(ids)
+        rows = []
+        for start in range(0, len(ids), self.ID_CHUNK_SIZE):
+            chunk = ids[start:start + self.ID_CHUNK_SIZE]
+            rows.extend(row._mapping for row in conn.execute(select(*columns).where(history.c.id.in_(chunk))))
+        return rows
+
+    # ==================== Session 事件 ====================
+
+    def _before_flush(self, session, flush_context, instances):
+        """flush 前记录将被修改/删除的记录的旧值（此时数据库中仍是旧数据）"""
+        # 上一次flush失败时遗留的记录不能带入本次
+        session.info.pop('stats_rollup_pending', None)
+
+        changed_ids = set()
+        for obj in session.dirty:
+            if isinstance(obj, EvaluationHistory) and obj.id is not None and self._tracked_fields_changed(obj):
+                changed_ids.add(obj.id)
+        for obj in session.deleted:
+            if isinstance(obj, EvaluationHistory) and obj.id is not None:
+                changed_ids.add(obj.id)
+        new_records = [obj for obj in session.new if isinstance(obj, EvaluationHistory)]
+        if not changed_ids and not new_records:
+            return
+        if not self.enabled:
+            with self._stats_lock:
+                self.generation += 1
+            return
+
+        old_rows = self._load_rows(session.connection(), changed_ids) if changed_ids else []
+        session.info['stats_rollup_pending'] = (old_rows, changed_ids, new_records)
+
+    def _after_flush(self, session, flush_context):
+        """flush 后按新旧值的差异更新汇总表（与记录写入在同一事务中）"""
+        pending = session.info.pop('stats_rollup_pending', None)
+        if pending is None:
+            return
+
+        old_rows, changed_ids, new_records = pending
+        deltas = ({}, {})
+        for row in old_rows:
+            self._add_contribution(deltas, row, -1)
+
+        # 被删除的记录读不到，只会读到修改后的记录和新增的记录
+        current_ids = set(changed_ids)
+        current_ids.update(obj.id for obj in new_records if obj.id is not None)
+        conn = session.connection()
+        new_rows = self._load_rows(conn, current_ids) if current_ids else []
+        for row in new_rows:
+            self._add_contribution(deltas, row, 1)
+
+        self._apply_deltas(conn, deltas)
+        with self._stats_lock:
+            self._stats['flushes'] += 1
+            self._stats['records_applied'] += len(old_rows) + len(new_rows)
+            self.generation += 1
+
+    @classmethod
+    def _tracked_fields_changed(cls, obj):
+        attrs = inspect(obj).attrs
+        return any(attrs[name].history.has_changes() for name in cls.TRACKED_FIELDS)
+
+    def register(self, session):
+        """在Session上注册flush事件"""
+        event.listen(session, 'before_flush', self._before_flush)
+        event.listen(session, 'after_flush', self._after_flush)
+
+    # ==================== 全量重建 ====================
+
+    def rebuild(self, conn, batch_size=1000):
+        """
+        从 evaluation_history 全量重建汇总表（在调用方的事务中执行，不提交）
+
+        Returns:
+            int: 汇总的记录数
+        """
+        history = EvaluationHistory.__table__
+        columns = [history.c[name] for name in self.TRACKED_FIELDS]
+        deltas = ({}, {})
+        total = 0
+        result = conn.execution_options(yield_per=batch_size).execute(select(*columns))
+        for row in result:
+            self._add_contribution(deltas, row._mapping, 1)
+            total += 1
+
+        conn.execute(delete(EvaluationDailyStat.__table__))
+        conn.execute(delete(EvaluationDimensionDailyStat.__table__))
+        self._apply_deltas(conn, deltas)
+
+        with self._stats_lock:
+            self._stats['rebuilds'] += 1
+            self.generation += 1
+        self.logger.info(f"评估统计汇总表已重建，记录数: {total}，分类日期数: {len(deltas[0])}")
+        return total
+
+    def get_stats(self):
+        """获取汇总表维护统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['generation'] = self.generation
+        return stats
+
+
+# 创建全局实例，并在应用使用的Session上注册
+evaluation_stats_rollup = EvaluationStatsRollup()
+evaluation_stats_rollup.register(db.session)
@@ -0,0 +1,324 @@
+"""
+持久化后台任务队列服务
+任务保存在SQLite的jobs表中，由本地worker线程池领取执行；
+提交接口立即返回任务ID，客户端通过状态/结果接口轮询，长时间的LLM调用不再占用Web请求
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.classification import db
+from models.job import Job
+from utils.logger import get_logger
+
+
+class NonRetryableJobError(Exception):
+    """任务处理失败且不应重试（例如参数错误、数据不足）"""
+    pass
+
+
+class JobQueueService:
+    """基于SQLite任务表的后台任务队列"""
+
+    def __init__(self, app=None):
+        self.logger = get_logger(__name__)
+        self.handlers = {}
+
+        self.num_workers = int(os.getenv('JOB_WORKERS', '2'))
+        self.default_max_attempts = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+        self.poll_interval = float(os.getenv('JOB_POLL_INTERVAL', '1.0'))
+        self.retry_backoff = float(os.getenv('JOB_RETRY_BACKOFF_SECONDS', '10'))
+        # 租约时长应大于单个任务的最长执行时间（AI总结的读超时为300秒）
+        self.lease_seconds = int(os.getenv('JOB_LEASE_SECONDS', '900'))
+
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._workers = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'retried': 0, 'recovered': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """初始化Flask应用"""
+        self.app = app
+
+    def register_handler(self, job_type, handler):
+        """
+        注册任务处理函数
+
+        Args:
+            job_type: 任务类型
+            handler: 处理函数，接收payload字典并返回可JSON序列化的结果；
+                     抛出 NonRetryableJobError 时直接失败，抛出其他异常时按退避策略重试
+        """
+        self.handlers[job_type] = handler
+
+    def _update_stats(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+
+    # ==================== 提交与查询 ====================
+
+    def submit(self, job_type, payload, max_attempts=None):
+        """
+        提交任务
+
+        Returns:
+            dict: 提交结果，data 为任务信息
+        """
+        if job_type not in self.handlers:
+            return {'success': False, 'message': f'不支持的任务类型: {job_type}'}
+
+        try:
+            job = Job(
+                id=str(uuid.uuid4()),
+                job_type=job_type,
+                status=Job.STATUS_PENDING,
+                payload=json.dumps(payload, ensure_ascii=False),
+                attempts=0,
+                max_attempts=max_attempts or self.default_max_attempts,
+                available_at=datetime.utcnow()
+            )
+            db.session.add(job)
+            db.session.commit()
+
+            self._update_stats(submitted=1)
+            self._wakeup.set()
+            self.logger.info(f"任务已提交: {job.id}, 类型: {job_type}")
+
+            return {
+                'success': True,
+                'message': '任务已提交',
+                'data': job.to_dict(include_result=False)
+            }
+
+        except SQLAlchemyError as e:
+            self.logger.error(f"提交任务失败: {str(e)}")
+            db.session.rollback()
+            return {'success': False, 'message': f'提交任务失败: {str(e)}'}
+
+    def get_job(self, job_id, include_result=True):
+        """获取任务信息"""
+        try:
+            job = db.session.get(Job, job_id)
+            if not job:
+                return {'success': False, 'message': '任务不存在'}
+            return {'success': True, 'data': job.to_dict(include_result=include_result)}
+        except SQLAlchemyError as e:
+            self.logger.error(f"获取任务失败: {str(e)}")
+            return {'success': False, 'message': f'获取任务失败: {str(e)}'}
+
+    def list_jobs(self, status=None, job_type=None, limit=50):
+        """获取最近的任务列表"""
+        try:
+            query = Job.query
+            if status:
+                query = query.filter(Job.status == status)
+            if job_type:
+                query = query.filter(Job.job_type == job_type)
+            jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+            return {'success': True, 'data': [job.to_dict(include_result=False) for job in jobs]}
+        except SQLAlchemyError as e:
+            self.logger.error(f"获取任务列表失败: {str(e)}")
+            return {'success': False, 'message': f'获取任务列表失败: {str(e)}'}
+
+    # ==================== Worker ====================
+
+    def start(self, num_workers=None):
+        """恢复中断的任务并启动worker线程"""
+        if self._workers:
+            return
+
+        with self.app.app_context():
+            self.recover_interrupted_jobs()
+
+        num_workers = num_workers or self.num_workers
+        for index in range(num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                args=(f"{self.worker_prefix}:{index}",),
+                name=f'job-worker-{index}',
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        self.logger.info(f"后台任务worker已启动，数量: {num_workers}, 已注册任务类型: {list(self.handlers.keys())}")
+
+    def stop(self, timeout=5):
+        """停止worker线程（正在执行的任务会在下次启动时恢复）"""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self._workers = []
+
+    def _is_local_dead_worker(self, locked_by):
+        """判断任务是否由本机上已退出的进程领取（服务重启前正在执行的任务）"""
+        if not locked_by:
+            return True
+        parts = locked_by.split(':')
+        if len(parts) < 2 or parts[0] != socket.gethostname():
+            return False
+        try:
+            pid = int(parts[1])
+        except ValueError:
+            return False
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+            return False
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+
+    def recover_interrupted_jobs(self):
+        """
+        将中断的任务重新放回队列：租约已过期的任务，以及本机已退出进程领取的任务
+
+        Returns:
+            int: 恢复的任务数
+        """
+        try:
+            now = datetime.utcnow()
+            running_jobs = Job.query.filter(Job.status == Job.STATUS_RUNNING).all()
+            recovered = 0
+            for job in running_jobs:
+                lease_expired = job.lease_expires_at is None or job.lease_expires_at <= now
+                if lease_expired or self._is_local_dead_worker(job.locked_by):
+                    job.status = Job.STATUS_PENDING
+                    job.locked_by = None
+                    job.lease_expires_at = None
+                    job.available_at = now
+                    recovered += 1
+
+            if recovered:
+                db.session.commit()
+                self._update_stats(recovered=recovered)
+                self.logger.warning(f"已恢复 {recovered} 个中断的后台任务")
+            return recovered
+
+        except SQLAlchemyError as e:
+            self.logger.error(f"恢复中断任务失败: {str(e)}")
+            db.session.rollback()
+            return 0
+
+    def _claim_next(self, worker_id):
+        """原子地领取一个可执行的任务，没有任务时返回None"""
+        now = datetime.utcnow()
+        candidates = db.session.query(Job.id).filter(
+            Job.status == Job.STATUS_PENDING,
+            or_(Job.available_at.is_(None), Job.available_at <= now)
+        ).order_by(Job.created_at).limit(5).all()
+
+        for (job_id,) in candidates:
+            # 仅当任务仍为pending时才更新，多个worker并发领取时只有一个能成功
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == Job.STATUS_PENDING)
+                .values(
+                    status=Job.STATUS_RUNNING,
+                    locked_by=worker_id,
+                    attempts=Job.attempts + 1,
+                    started_at=now,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    updated_at=now
+                )
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(Job, job_id, populate_existing=True)
+        return None
+
+    def _process(self, job):
+        """执行任务并记录结果，失败时按指数退避重新排队"""
+        handler = self.handlers.get(job.job_type)
+        start_time = time.time()
+        try:
+            if handler is None:
+                raise NonRetryableJobError(f'不支持的任务类型: {job.job_type}')
+
+            payload = json.loads(job.payload) if job.payload else {}
+            result = handler(payload)
+
+            job.status = Job.STATUS_SUCCEEDED
+            job.result = json.dumps(result, ensure_ascii=False)
+            job.error = None
+            job.finished_at = datetime.utcnow()
+            self._update_stats(succeeded=1)
+            self.logger.info(f"任务执行成功: {job.id}, 类型: {job.job_type}, 耗时: {time.time() - start_time:.2f}秒")
+
+        except Exception as e:
+            db.session.rollback()
+            retryable = not isinstance(e, NonRetryableJobError)
+            job.error = str(e)
+
+            if retryable and job.attempts < job.max_attempts:
+                delay = self.retry_backoff * (2 ** (job.attempts - 1))
+                job.status = Job.STATUS_PENDING
+                job.available_at = datetime.utcnow() + timedelta(seconds=delay)
+                self._update_stats(retried=1)
+                self.logger.warning(f"任务执行失败，将在 {delay:.0f} 秒后重试 ({job.attempts}/{job.max_attempts}): {job.id}, 错误: {str(e)}")
+            else:
+                job.status = Job.STATUS_FAILED
+                job.finished_at = datetime.utcnow()
+                self._update_stats(failed=1)
+                self.logger.error(f"任务执行失败: {job.id}, 类型: {job.job_type}, 错误: {str(e)}")
+
+        job.locked_by = None
+        job.lease_expires_at = None
+        db.session.commit()
+
+    def _worker_loop(self, worker_id):
+        """worker主循环"""
+        last_recovery = time.time()
+        while not self._stopping.is_set():
+            job = None
+            try:
+                with self.app.app_context():
+                    # 定期回收租约过期的任务（例如其他进程崩溃后遗留的任务）
+                    if time.time() - last_recovery > self.lease_seconds:
+                        self.recover_interrupted_jobs()
+                        last_recovery = time.time()
+
+                    job = self._claim_next(worker_id)
+                    if job is not None:
+                        self._process(job)
+            except Exception as e:
+                self.logger.error(f"后台任务worker异常: {str(e)}")
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def get_stats(self):
+        """获取任务队列统计信息"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['workers'] = len(self._workers)
+        stats['handlers'] = list(self.handlers.keys())
+        try:
+            with self.app.app_context():
+                counts = db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+            stats['jobs_by_status'] = {status: count for status, count in counts}
+        except SQLAlchemyError as e:
+            stats['jobs_by_status'] = {}
+            stats['error'] = str(e)
+        return stats
+
+
+# 创建全局实例，由 app.py 注册任务处理函数并启动worker
+job_queue_service = JobQueueService()
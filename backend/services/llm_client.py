@@ -2,6 +2,7 @@ import json
 import os
 import requests
 from utils.logger import get_logger
+from utils.http_session_pool import http_session_pool
 
 class LLMClient:
     """基于用户现有API的LLM客户端封装类"""
@@ -15,7 +16,9 @@ class LLMClient:
         self.default_model = os.getenv('LLM_MODEL', "deepseek-v3-local-II")
         self.max_tokens = int(os.getenv('LLM_MAX_TOKENS', '10000'))
         self.temperature = float(os.getenv('LLM_TEMPERATURE', '0.1'))
-        self.timeout = int(os.getenv('LLM_TIMEOUT', '300'))  # 增加到5分钟超时，确保AI总结等复杂任务不会超时
+        
+        # 共享的keep-alive连接池，避免每次调用重新握手；读超时按任务类型由连接池决定（LLM_TIMEOUT / LLM_TIMEOUT_<任务类型>）
+        self.http_pool = http_session_pool
         
         # 预定义不同任务使用的模型
         self.models = {
@@ -39,8 +42,9 @@ class LLMClient:
         Returns:
             str: LLM的响应内容
         """
-        # 根据任务类型选择模型
+        # 根据任务类型选择模型和超时时间
         model_name = self.models.get(task_type, self.default_model)
+        timeout = self.http_pool.get_timeout(task_type)
         
         try:
             self.logger.info(f"发送请求到LLM API - 任务类型: {task_type}, 模型: {model_name}")
@@ -59,12 +63,12 @@ class LLMClient:
                 'Content-Type': 'application/json'
             }
             
-            # 使用requests发送POST请求
-            response = requests.post(
+            # 通过共享连接池发送POST请求
+            response = self.http_pool.post(
                 f"{self.api_base}/chat/completions",
+                task_type=task_type,
                 json=data,
-                headers=headers,
-                timeout=self.timeout
+                headers=headers
             )
             
             if response.status_code == 200:
@@ -86,7 +90,7 @@ class LLMClient:
                 raise Exception(f"API请求失败，状态码: {response.status_code}, 响应: {response.text}")
                         
         except requests.exceptions.Timeout:
-            self.logger.error(f"LLM API调用超时，超时时间: {self.timeout}秒")
+            self.logger.error(f"LLM API调用超时，超时时间: {timeout}秒")
             raise Exception("LLM API调用超时")
         except requests.exceptions.RequestException as e:
             self.logger.error(f"LLM API请求异常: {str(e)}")
@@ -0,0 +1,249 @@
+"""
+本地快速分类器
+在调用LLM之前，对可以确定性判断的输入（纯股票代码、与分类示例完全一致的问题、
+与示例/定义高度重合的问题）直接给出分类结果，置信度不足时交给LLM分类
+"""
+import math
+import os
+import re
+import threading
+import time
+
+from utils.classification_cache import ClassificationCache
+from utils.logger import get_logger
+
+
+class LocalClassifier:
+    """基于规则和字符n-gram索引的本地分类器"""
+
+    # 纯股票代码：6位数字，可带交易所前缀/后缀，如 600519、sh600519、000001.SZ
+    STOCK_CODE_PATTERN = re.compile(r'^(?:(?:sh|sz|bj)\.?)?\d{6}(?:\.(?:sh|sz|bj))?$', re.IGNORECASE)
+    # 纯股票代码对应的分类
+    STOCK_CODE_CATEGORY = ('个股分析', '综合分析')
+
+    # 示例文本的分隔符
+    EXAMPLE_SEPARATOR_PATTERN = re.compile(r'[，,、；;。？?！!\n|/]|或者')
+    # 示例前缀，如 "纯标的输入：000001"
+    EXAMPLE_PREFIX_PATTERN = re.compile(r'^[^：:]{1,10}[：:]')
+
+    NGRAM_SIZE = 2
+    EXAMPLE_WEIGHT = 1.0
+    DEFINITION_WEIGHT = 0.5
+
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self.enabled = os.getenv('LOCAL_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+        # n-gram匹配的置信度阈值，以及与第二名的最小差距
+        self.threshold = float(os.getenv('LOCAL_CLASSIFIER_THRESHOLD', '0.85'))
+        self.min_margin = float(os.getenv('LOCAL_CLASSIFIER_MARGIN', '0.2'))
+
+        self._index = None
+        self._build_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'short_circuited': 0,
+            'fallback_to_llm': 0,
+            'by_match_type': {'stock_code': 0, 'exact_example': 0, 'ngram': 0},
+            'total_latency_us': 0.0,
+            'index_builds': 0
+        }
+
+    # ==================== 索引构建 ====================
+
+    def _ngrams(self, text):
+        """提取字符n-gram（文本短于n时使用整个文本）"""
+        text = text.replace(' ', '')
+        if len(text) < self.NGRAM_SIZE:
+            return {text} if text else set()
+        return {text[i:i + self.NGRAM_SIZE] for i in range(len(text) - self.NGRAM_SIZE + 1)}
+
+    def _split_examples(self, examples):
+        """将示例文本拆分为独立的示例短语"""
+        phrases = []
+        for piece in self.EXAMPLE_SEPARATOR_PATTERN.split(examples or ''):
+            piece = self.EXAMPLE_PREFIX_PATTERN.sub('', piece.strip())
+            phrase = ClassificationCache.normalize_input(piece)
+            if len(phrase) >= 2:
+                phrases.append(phrase)
+        return phrases
+
+    def build_index(self, standards, version=None):
+        """
+        根据分类标准构建索引
+
+        Args:
+            standards: 分类标准字典列表（ClassificationStandard.to_dict() 的结果）
+            version: 分类标准版本标识
+        """
+        entries = []
+        exact_examples = {}
+        ngram_weights = []
+        document_frequency = {}
+        stock_code_entry = None
+
+        for standard in standards:
+            entry = {
+                'level1': standard.get('level1'),
+                'level1_definition': standard.get('level1_definition'),
+                'level2': standard.get('level2'),
+                # 与LLM分类结果一致（ClassificationService._fill_missing_fields 同样取一级分类定义）
+                'level2_definition': standard.get('level1_definition'),
+                'level3': standard.get('level3'),
+                'level3_definition': standard.get('level3_definition')
+            }
+            index = len(entries)
+            entries.append(entry)
+
+            if (entry['level2'], entry['level3']) == self.STOCK_CODE_CATEGORY:
+                stock_code_entry = index
+
+            weights = {}
+            for phrase in self._split_examples(standard.get('examples')):
+                # 同一示例出现在多个分类下时不作为精确匹配依据
+                if phrase in exact_examples and exact_examples[phrase] != index:
+                    exact_examples[phrase] = None
+                else:
+                    exact_examples[phrase] = index
+                for gram in self._ngrams(phrase):
+                    weights[gram] = max(weights.get(gram, 0.0), self.EXAMPLE_WEIGHT)
+
+            definition = ClassificationCache.normalize_input(standard.get('level3_definition') or '')
+            for gram in self._ngrams(definition):
+                weights[gram] = max(weights.get(gram, 0.0), self.DEFINITION_WEIGHT)
+
+            for gram in weights:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+            ngram_weights.append(weights)
+
+        # 倒排索引：gram -> [(分类序号, 权重 * idf)]
+        total = max(len(entries), 1)
+        inverted = {}
+        for index, weights in enumerate(ngram_weights):
+            for gram, weight in weights.items():
+                idf = math.log(1 + total / document_frequency[gram]) / math.log(1 + total)
+                inverted.setdefault(gram, []).append((index, weight * idf))
+
+        self._index = {
+            'version': version,
+            'entries': entries,
+            'exact_examples': {phrase: idx for phrase, idx in exact_examples.items() if idx is not None},
+            'inverted': inverted,
+            'stock_code_entry': stock_code_entry
+        }
+        with self._stats_lock:
+            self._stats['index_builds'] += 1
+        self.logger.info(f"本地分类器索引已构建，分类数: {len(entries)}, 示例数: {len(self._index['exact_examples'])}, n-gram数: {len(inverted)}")
+
+    def ensure_index(self, version, standards_loader):
+        """分类标准版本变化时重建索引"""
+        index = self._index
+        if index is not None and index['version'] == version:
+            return index
+
+        with self._build_lock:
+            if self._index is None or self._index['version'] != version:
+                standards = standards_loader()
+                self.build_index(standards.get('standards', []), version)
+        return self._index
+
+    # ==================== 分类 ====================
+
+    def _build_result(self, entry, confidence, match_type, reasoning):
+        result = dict(entry)
+        result.update({
+            'confidence': round(confidence, 4),
+            'reasoning': reasoning,
+            'classifier': 'local',
+            'match_type': match_type
+        })
+        return result
+
+    def _match(self, index, normalized):
+        """依次尝试股票代码、精确示例和n-gram匹配"""
+        compact = normalized.replace(' ', '')
+        if index['stock_code_entry'] is not None and self.STOCK_CODE_PATTERN.match(compact):
+            return self._build_result(
+                index['entries'][index['stock_code_entry']], 0.99, 'stock_code',
+                '输入为纯股票代码，属于个股综合分析'
+            )
+
+        # 示例拆分时去掉了标点，精确匹配时同样忽略结尾的标点
+        exact_index = index['exact_examples'].get(normalized.rstrip('?!。.,，~ '))
+        if exact_index is not None:
+            return self._build_result(
+                index['entries'][exact_index], 0.98, 'exact_example',
+                '输入与分类标准中的示例完全一致'
+            )
+
+        grams = self._ngrams(normalized)
+        if not grams:
+            return None
+
+        scores = {}
+        for gram in grams:
+            for entry_index, weight in index['inverted'].get(gram, ()):
+                scores[entry_index] = scores.get(entry_index, 0.0) + weight
+        if not scores:
+            return None
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best_index, best_score = ranked[0]
+        confidence = best_score / len(grams)
+        second = ranked[1][1] / len(grams) if len(ranked) > 1 else 0.0
+
+        if confidence >= self.threshold and confidence - second >= self.min_margin:
+            return self._build_result(
+                index['entries'][best_index], confidence, 'ngram',
+                f'输入与分类示例/定义高度重合（匹配度 {confidence:.2f}）'
+            )
+        return None
+
+    def classify(self, user_input, version, standards_loader):
+        """
+        本地分类
+
+        Args:
+            user_input: 用户输入
+            version: 分类标准版本标识
+            standards_loader: 版本变化时用于加载分类标准的函数
+
+        Returns:
+            dict: 分类结果，无法确定时返回None（由LLM分类）
+        """
+        if not self.enabled:
+            return None
+
+        start = time.perf_counter()
+        result = None
+        try:
+            index = self.ensure_index(version, standards_loader)
+            result = self._match(index, ClassificationCache.normalize_input(user_input))
+        except Exception as e:
+            self.logger.warning(f"本地分类失败，交给LLM分类: {str(e)}")
+
+        latency_us = (time.perf_counter() - start) * 1_000_000
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['total_latency_us'] += latency_us
+            if result is not None:
+                self._stats['short_circuited'] += 1
+                self._stats['by_match_type'][result['match_type']] += 1
+            else:
+                self._stats['fallback_to_llm'] += 1
+
+        if result is not None:
+            result['classification_time_seconds'] = round(latency_us / 1_000_000, 6)
+        return result
+
+    def get_stats(self):
+        """获取短路统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['by_match_type'] = dict(self._stats['by_match_type'])
+        requests = stats['requests']
+        stats['short_circuit_rate'] = round(stats['short_circuited'] / requests, 4) if requests else 0.0
+        stats['avg_latency_us'] = round(stats.pop('total_latency_us') / requests, 1) if requests else 0.0
+        stats['enabled'] = self.enabled
+        stats['threshold'] = self.threshold
+        return stats
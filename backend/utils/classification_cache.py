@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+分类结果缓存工具
+按规范化后的用户输入和分类标准版本缓存分类结果，
+重复出现的输入（如裸股票代码、公司名称）无需再次调用LLM
+"""
+
+import copy
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from utils.logger import get_logger
+
+
+class ClassificationCache:
+    """内存中的分类结果LRU缓存（条数有上限）"""
+
+    _whitespace_pattern = re.compile(r'\s+')
+    # 中文字符之间的空白没有语义，规范化时去掉
+    _cjk_gap_pattern = re.compile(r'(?<=[^\x00-\x7f]) (?=[^\x00-\x7f])')
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self.logger = get_logger(__name__)
+        self.enabled = os.getenv('CLASSIFICATION_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_entries = int(max_entries or os.getenv('CLASSIFICATION_CACHE_MAX_ENTRIES', '5000'))
+        self.ttl_seconds = int(ttl_seconds or os.getenv('CLASSIFICATION_CACHE_TTL_SECONDS', '86400'))
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'saved_llm_seconds': 0.0}
+
+    @classmethod
+    def normalize_input(cls, user_input):
+        """规范化用户输入：全角转半角(NFKC)、合并空白（去掉中文之间的空白）、转小写"""
+        text = unicodedata.normalize('NFKC', user_input or '')
+        text = cls._whitespace_pattern.sub(' ', text).strip()
+        text = cls._cjk_gap_pattern.sub('', text)
+        return text.lower()
+
+    def get(self, user_input, standards_version):
+        """
+        查询缓存
+
+        Returns:
+            dict: 缓存的分类结果副本，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+
+        key = (self.normalize_input(user_input), standards_version)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl_seconds > 0 and now - entry['cached_at'] > self.ttl_seconds):
+                if entry is not None:
+                    del self._entries[key]
+                self._stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            self._stats['saved_llm_seconds'] += entry['llm_seconds']
+            return copy.deepcopy(entry['result'])
+
+    def set(self, user_input, standards_version, result, llm_seconds=0.0):
+        """写入缓存，超过条数上限时淘汰最久未使用的条目"""
+        if not self.enabled:
+            return
+
+        key = (self.normalize_input(user_input), standards_version)
+        with self._lock:
+            self._entries[key] = {
+                'result': copy.deepcopy(result),
+                'llm_seconds': llm_seconds or 0.0,
+                'cached_at': time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self):
+        """清空缓存（分类标准变更时调用）"""
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            self._stats['invalidations'] += 1
+        self.logger.info(f"分类结果缓存已失效，清除 {cleared} 条")
+
+    def get_stats(self):
+        """获取命中率及节省的LLM耗时"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['saved_llm_seconds'] = round(stats['saved_llm_seconds'], 3)
+        stats['enabled'] = self.enabled
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
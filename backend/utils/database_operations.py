@@ -3,15 +3,87 @@
 数据库操作工具
 """
 
-import sqlite3
 import json
+import os
+import threading
+import time
 from datetime import datetime
 
+from utils.sqlite_pool import SQLitePool, sqlite_pool
+
+
+class CategoryTemplateCache:
+    """
+    分类标准配置与评估模板缓存
+    缓存以代数(generation)为版本：任何分类/维度配置的写入都会调用 bump() 使所有缓存失效，
+    另有兜底的过期时间用于感知其他进程的修改
+    """
+
+    def __init__(self):
+        self.ttl_seconds = float(os.getenv('CATEGORY_TEMPLATE_CACHE_TTL', '300'))
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._entries = {}
+        self._stats = {'hits': 0, 'misses': 0, 'bumps': 0}
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get_or_build(self, key, builder):
+        """
+        获取缓存值，不存在或已过期时调用 builder 构建
+
+        返回的对象被所有调用方共享，调用方不应修改
+        """
+        generation = self._generation
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation and time.time() - entry[1] < self.ttl_seconds:
+            self._stats['hits'] += 1
+            return entry[2]
+
+        value = builder()
+        with self._lock:
+            self._stats['misses'] += 1
+            # 构建期间配置发生了变更则不写入缓存
+            if generation == self._generation:
+                self._entries[key] = (generation, time.time(), value)
+        return value
+
+    def bump(self):
+        """分类/维度配置变更后调用，使所有缓存失效"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._stats['bumps'] += 1
+
+    def get_stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['generation'] = self._generation
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
+
+
+# 全局缓存实例（分类/维度配置的写入方调用 category_template_cache.bump()）
+category_template_cache = CategoryTemplateCache()
+
+
 class DatabaseOperations:
     """数据库操作类"""
     
-    def __init__(self, db_path="/data/macxin/intelligent-qa-evaluator/backend/database/qa_evaluation.db"):
-        self.db_path = db_path
+    def __init__(self, db_path=None):
+        # 默认使用共享连接池（与Flask-SQLAlchemy使用同一个数据库文件）
+        self.pool = SQLitePool(db_path) if db_path else sqlite_pool
+        self.template_cache = category_template_cache
+    
+    @property
+    def db_path(self):
+        return self.pool.db_path
     
     def save_category_standards(self, category, dimension_ids):
         """
@@ -25,22 +97,18 @@ class DatabaseOperations:
             dict: 操作结果
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 删除该分类下的现有配置
-            cursor.execute("DELETE FROM category_dimension_mappings WHERE level2_category = ?", (category,))
-            
-            # 添加新的配置
-            for dimension_id in dimension_ids:
-                cursor.execute("""
+            with self.pool.transaction() as conn:
+                # 删除该分类下的现有配置
+                conn.execute("DELETE FROM category_dimension_mappings WHERE level2_category = ?", (category,))
+                
+                # 添加新的配置
+                created_at = datetime.now().isoformat()
+                conn.executemany("""
                     INSERT INTO category_dimension_mappings 
                     (level2_category, dimension_id, weight, created_at) 
                     VALUES (?, ?, 1.0, ?)
-                """, (category, dimension_id, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
+                """, [(category, dimension_id, created_at) for dimension_id in dimension_ids])
+            self.template_cache.bump()
             
             return {
                 'success': True,
@@ -57,6 +125,50 @@ class DatabaseOperations:
                 'message': f'保存失败: {str(e)}'
             }
     
+    def _load_all_category_standards(self):
+        """查询所有分类的标准配置（按分类分组，已解析评测标准JSON）"""
+        rows = self.pool.execute("""
+            SELECT m.id, m.level2_category, m.dimension_id, m.weight, m.created_at,
+                   d.name, d.layer, d.definition, d.evaluation_criteria_json, 
+                   d.examples, d.category, d.sort_order, d.is_active, 
+                   d.created_at as dim_created_at, d.updated_at as dim_updated_at
+            FROM category_dimension_mappings m
+            LEFT JOIN evaluation_dimensions d ON m.dimension_id = d.id
+            ORDER BY m.level2_category, d.sort_order, d.id
+        """)
+        
+        category_standards = {}
+        for row in rows:
+            if row[5]:  # 如果维度存在
+                # 解析评测标准JSON
+                evaluation_criteria = []
+                if row[8]:  # evaluation_criteria_json
+                    try:
+                        evaluation_criteria = json.loads(row[8])
+                    except (json.JSONDecodeError, TypeError):
+                        evaluation_criteria = []
+                
+                standard_data = {
+                    'id': row[2],  # dimension_id
+                    'name': row[5],
+                    'layer': row[6],
+                    'definition': row[7],
+                    'evaluation_criteria': evaluation_criteria,
+                    'examples': row[9],
+                    'category': row[10],
+                    'sort_order': row[11],
+                    'is_active': row[12],
+                    'created_at': row[13],
+                    'updated_at': row[14],
+                    'weight': row[3]
+                }
+                category_standards.setdefault(row[1], []).append(standard_data)
+        
+        return category_standards
+    
+    def _get_all_category_standards_cached(self):
+        return self.template_cache.get_or_build(('standards',), self._load_all_category_standards)
+    
     def get_category_standards(self, category):
         """
         获取分类的标准配置
@@ -68,50 +180,7 @@ class DatabaseOperations:
             dict: 查询结果
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 获取映射关系和维度信息
-            cursor.execute("""
-                SELECT m.id, m.level2_category, m.dimension_id, m.weight, m.created_at,
-                       d.name, d.layer, d.definition, d.evaluation_criteria_json, 
-                       d.examples, d.category, d.sort_order, d.is_active, 
-                       d.created_at as dim_created_at, d.updated_at as dim_updated_at
-                FROM category_dimension_mappings m
-                LEFT JOIN evaluation_dimensions d ON m.dimension_id = d.id
-                WHERE m.level2_category = ?
-                ORDER BY d.sort_order, d.id
-            """, (category,))
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            standards = []
-            for row in rows:
-                if row[5]:  # 如果维度存在
-                    # 解析评测标准JSON
-                    evaluation_criteria = []
-                    if row[8]:  # evaluation_criteria_json
-                        try:
-                            evaluation_criteria = json.loads(row[8])
-                        except (json.JSONDecodeError, TypeError):
-                            evaluation_criteria = []
-                    
-                    standard_data = {
-                        'id': row[2],  # dimension_id
-                        'name': row[5],
-                        'layer': row[6],
-                        'definition': row[7],
-                        'evaluation_criteria': evaluation_criteria,
-                        'examples': row[9],
-                        'category': row[10],
-                        'sort_order': row[11],
-                        'is_active': row[12],
-                        'created_at': row[13],
-                        'updated_at': row[14],
-                        'weight': row[3]
-                    }
-                    standards.append(standard_data)
+            standards = self._get_all_category_standards_cached().get(category, [])
             
             return {
                 'success': True,
@@ -134,58 +203,9 @@ class DatabaseOperations:
             dict: 查询结果
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 获取所有映射关系和维度信息
-            cursor.execute("""
-                SELECT m.id, m.level2_category, m.dimension_id, m.weight, m.created_at,
-                       d.name, d.layer, d.definition, d.evaluation_criteria_json, 
-                       d.examples, d.category, d.sort_order, d.is_active, 
-                       d.created_at as dim_created_at, d.updated_at as dim_updated_at
-                FROM category_dimension_mappings m
-                LEFT JOIN evaluation_dimensions d ON m.dimension_id = d.id
-                ORDER BY m.level2_category, d.sort_order, d.id
-            """)
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 按分类分组
-            category_standards = {}
-            for row in rows:
-                if row[5]:  # 如果维度存在
-                    category = row[1]  # level2_category
-                    if category not in category_standards:
-                        category_standards[category] = []
-                    
-                    # 解析评测标准JSON
-                    evaluation_criteria = []
-                    if row[8]:  # evaluation_criteria_json
-                        try:
-                            evaluation_criteria = json.loads(row[8])
-                        except (json.JSONDecodeError, TypeError):
-                            evaluation_criteria = []
-                    
-                    standard_data = {
-                        'id': row[2],  # dimension_id
-                        'name': row[5],
-                        'layer': row[6],
-                        'definition': row[7],
-                        'evaluation_criteria': evaluation_criteria,
-                        'examples': row[9],
-                        'category': row[10],
-                        'sort_order': row[11],
-                        'is_active': row[12],
-                        'created_at': row[13],
-                        'updated_at': row[14],
-                        'weight': row[3]
-                    }
-                    category_standards[category].append(standard_data)
-            
             return {
                 'success': True,
-                'data': category_standards
+                'data': self._get_all_category_standards_cached()
             }
             
         except Exception as e:
@@ -195,6 +215,52 @@ class DatabaseOperations:
                 'data': {}
             }
 
+    def _build_evaluation_template(self, category):
+        """根据分类的标准配置构建评估模板，未配置时返回None"""
+        standards = self._get_all_category_standards_cached().get(category)
+        if not standards:
+            return None
+        
+        # 格式化为评估模板格式
+        dimensions = []
+        total_max_score = 0
+        
+        for standard in standards:
+            # 计算该维度的最大分数
+            max_score = 0
+            if standard.get('evaluation_criteria'):
+                for criteria in standard['evaluation_criteria']:
+                    score = criteria.get('score', 0)
+                    if isinstance(score, (int, float)) and score > max_score:
+                        max_score = score
+            
+            # 格式化为评估模板维度
+            dimension = {
+                'name': standard['name'],
+                'reference_standard': standard['definition'] or '',
+                'scoring_principle': self._format_scoring_principle(
+                    standard.get('evaluation_criteria', [])
+                ),
+                'max_score': max_score,
+                'layer': standard.get('layer', ''),
+                'examples': standard.get('examples', '')
+            }
+            
+            dimensions.append(dimension)
+            total_max_score += max_score
+        
+        return {
+            'category': category,
+            'dimensions': dimensions,
+            'total_max_score': total_max_score,
+            'dimension_count': len(dimensions)
+        }
+
+    def _get_evaluation_template_cached(self, category):
+        return self.template_cache.get_or_build(
+            ('template', category), lambda: self._build_evaluation_template(category)
+        )
+
     def format_for_evaluation_template(self, category):
         """
         为评估模板格式化标准配置
@@ -206,52 +272,13 @@ class DatabaseOperations:
             dict: 格式化后的评估模板
         """
         try:
-            result = self.get_category_standards(category)
-            if not result['success']:
-                return result
-            
-            standards = result['data']
-            if not standards:
+            template = self._get_evaluation_template_cached(category)
+            if template is None:
                 return {
                     'success': False,
                     'message': f'分类"{category}"未配置评估标准'
                 }
             
-            # 格式化为评估模板格式
-            dimensions = []
-            total_max_score = 0
-            
-            for standard in standards:
-                # 计算该维度的最大分数
-                max_score = 0
-                if standard.get('evaluation_criteria'):
-                    for criteria in standard['evaluation_criteria']:
-                        score = criteria.get('score', 0)
-                        if isinstance(score, (int, float)) and score > max_score:
-                            max_score = score
-                
-                # 格式化为评估模板维度
-                dimension = {
-                    'name': standard['name'],
-                    'reference_standard': standard['definition'] or '',
-                    'scoring_principle': self._format_scoring_principle(
-                        standard.get('evaluation_criteria', [])
-                    ),
-                    'max_score': max_score,
-                    'layer': standard.get('layer', ''),
-                    'examples': standard.get('examples', '')
-                }
-                
-                dimensions.append(dimension)
-                total_max_score += max_score
-            
-            template = {
-                'category': category,
-                'dimensions': dimensions,
-                'total_max_score': total_max_score,
-                'dimension_count': len(dimensions)
-            }
-            
             return {
                 'success': True,
                 'data': template
@@ -263,6 +290,36 @@ class DatabaseOperations:
                 'message': f'格式化失败: {str(e)}'
             }
     
+    @staticmethod
+    def format_evaluation_criteria(template_data):
+        """将评估模板格式化为评估标准文本，没有维度时返回None"""
+        criteria_parts = []
+        for dimension in template_data.get('dimensions', []):
+            dim_name = dimension.get('name')
+            reference_standard = dimension.get('reference_standard')
+            scoring_principle = dimension.get('scoring_principle')
+            max_score = dimension.get('max_score', 2)
+            
+            criteria_parts.append(f"{dim_name}（最高{max_score}分）：\n定义：{reference_standard}\n评分原则：{scoring_principle}")
+        
+        return "\n\n".join(criteria_parts) if criteria_parts else None
+    
+    def get_evaluation_criteria_text(self, category):
+        """
+        获取分类的评估标准文本（基于评估模板构建并缓存）
+        
+        Args:
+            category (str): 二级分类名称
+        
+        Returns:
+            str: 评估标准文本，未配置时返回None
+        """
+        def build():
+            template = self._get_evaluation_template_cached(category)
+            return self.format_evaluation_criteria(template) if template else None
+        
+        return self.template_cache.get_or_build(('criteria', category), build)
+    
     def _format_scoring_principle(self, evaluation_criteria):
         """
         格式化评测标准为打分原则
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+HTTP连接池工具
+为LLM调用等外部HTTP请求提供共享的、线程安全的长连接会话，
+避免每次请求都重新建立TCP/TLS连接
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.logger import get_logger
+
+
+class HTTPSessionPool:
+    """共享HTTP会话池（按host复用keep-alive连接）"""
+
+    # 不同任务类型的默认读超时（秒），可通过环境变量 LLM_TIMEOUT_<TASK_TYPE> 覆盖
+    DEFAULT_TASK_TIMEOUTS = {
+        'classification': None,  # None 表示使用 LLM_TIMEOUT
+        'evaluation': None,
+        'summary': 300,          # AI总结使用r1模型，耗时较长
+        'assistant': 180,        # AI助手接口
+        'default': None
+    }
+
+    def __init__(self, pool_connections=None, pool_maxsize=None):
+        self.logger = get_logger(__name__)
+
+        # 连接池配置
+        self.pool_connections = int(pool_connections or os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+        self.pool_maxsize = int(pool_maxsize or os.getenv('HTTP_POOL_MAXSIZE', '20'))
+        self.pool_block = os.getenv('HTTP_POOL_BLOCK', 'false').lower() == 'true'
+        self.connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+        # 按host单独配置连接池大小，格式: "host1:32,host2:8"
+        self.host_pool_sizes = self._parse_host_pool_sizes(os.getenv('HTTP_POOL_HOST_SIZES', ''))
+
+        # 按任务类型的读超时
+        default_timeout = int(os.getenv('LLM_TIMEOUT', '300'))
+        self.task_timeouts = {}
+        for task_type, timeout in self.DEFAULT_TASK_TIMEOUTS.items():
+            env_value = os.getenv(f'LLM_TIMEOUT_{task_type.upper()}')
+            if env_value:
+                self.task_timeouts[task_type] = float(env_value)
+            else:
+                self.task_timeouts[task_type] = timeout or default_timeout
+
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._session.headers.update({'Connection': 'keep-alive'})
+        self._mounted_hosts = {}
+        self._stats = {}
+
+    def _parse_host_pool_sizes(self, raw_value):
+        """解析按host配置的连接池大小"""
+        sizes = {}
+        for item in raw_value.split(','):
+            item = item.strip()
+            if not item or ':' not in item:
+                continue
+            host, size = item.rsplit(':', 1)
+            try:
+                sizes[host.strip()] = int(size)
+            except ValueError:
+                self.logger.warning(f"无效的连接池大小配置: {item}")
+        return sizes
+
+    def _ensure_adapter(self, url):
+        """为目标host挂载独立的连接池适配器"""
+        parts = urlsplit(url)
+        prefix = f"{parts.scheme}://{parts.netloc}"
+
+        if prefix in self._mounted_hosts:
+            return prefix
+
+        with self._lock:
+            if prefix not in self._mounted_hosts:
+                maxsize = self.host_pool_sizes.get(parts.hostname, self.pool_maxsize)
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=maxsize,
+                    pool_block=self.pool_block,
+                    max_retries=0
+                )
+                self._session.mount(prefix, adapter)
+                self._mounted_hosts[prefix] = adapter
+                self._stats[prefix] = {'requests': 0, 'errors': 0, 'total_time_seconds': 0.0}
+                self.logger.info(f"HTTP连接池已挂载: {prefix}, 连接池大小: {maxsize}")
+
+        return prefix
+
+    def get_timeout(self, task_type='default'):
+        """获取任务类型对应的读超时（秒）"""
+        return self.task_timeouts.get(task_type, self.task_timeouts['default'])
+
+    def request(self, method, url, task_type='default', timeout=None, **kwargs):
+        """
+        通过共享会话发送HTTP请求
+
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            task_type: 任务类型，用于选择超时时间
+            timeout: 显式指定的读超时（可选，优先于任务类型超时）
+            **kwargs: 透传给 requests 的其他参数
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        prefix = self._ensure_adapter(url)
+        read_timeout = timeout if timeout is not None else self.get_timeout(task_type)
+
+        start_time = time.time()
+        try:
+            return self._session.request(
+                method,
+                url,
+                timeout=(self.connect_timeout, read_timeout),
+                **kwargs
+            )
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._stats[prefix]['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats[prefix]['requests'] += 1
+                self._stats[prefix]['total_time_seconds'] += time.time() - start_time
+
+    def post(self, url, task_type='default', timeout=None, **kwargs):
+        """发送POST请求"""
+        return self.request('POST', url, task_type=task_type, timeout=timeout, **kwargs)
+
+    def get_stats(self):
+        """
+        获取连接复用统计
+
+        Returns:
+            dict: 每个host的请求数、新建连接数、复用次数等指标
+        """
+        hosts = {}
+        with self._lock:
+            for prefix, adapter in self._mounted_hosts.items():
+                stats = dict(self._stats[prefix])
+                connections_created = 0
+                pool_requests = 0
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    connections_created += getattr(pool, 'num_connections', 0)
+                    pool_requests += getattr(pool, 'num_requests', 0)
+
+                stats['connections_created'] = connections_created
+                stats['connections_reused'] = max(pool_requests - connections_created, 0)
+                stats['reuse_rate'] = round(stats['connections_reused'] / pool_requests, 4) if pool_requests else 0.0
+                stats['avg_time_seconds'] = round(stats['total_time_seconds'] / stats['requests'], 3) if stats['requests'] else 0.0
+                stats['total_time_seconds'] = round(stats['total_time_seconds'], 3)
+                stats['pool_maxsize'] = adapter._pool_maxsize
+                hosts[prefix] = stats
+
+        return {
+            'hosts': hosts,
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'connect_timeout': self.connect_timeout,
+            'task_timeouts': dict(self.task_timeouts)
+        }
+
+    def close(self):
+        """关闭所有连接"""
+        with self._lock:
+            self._session.close()
+            self._mounted_hosts.clear()
+
+
+# 创建全局实例，供所有LLM客户端共享
+http_session_pool = HTTPSessionPool()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+LLM响应缓存工具
+以 (模型, 温度, 完整prompt) 的哈希作为内容寻址的key，将LLM响应持久化在独立的SQLite文件中；
+相同prompt的低温度重复评估直接返回缓存结果，不再调用LLM
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from utils.logger import get_logger
+
+
+class LLMResponseCache:
+    """基于SQLite的LLM响应缓存（TTL过期 + 按条数上限的LRU淘汰）"""
+
+    def __init__(self, db_path=None):
+        self.logger = get_logger(__name__)
+
+        default_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'llm_cache.db')
+        self.db_path = db_path or os.getenv('LLM_CACHE_DB_PATH', default_path)
+        self.enabled = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl_seconds = int(os.getenv('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+        self.max_entries = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+        # 只缓存低温度（近似确定性）的调用，高温度采样每次结果本就不同
+        self.max_temperature = float(os.getenv('LLM_CACHE_MAX_TEMPERATURE', '0.3'))
+
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'writes': 0, 'evictions': 0, 'bypassed': 0, 'errors': 0}
+
+    # ==================== 连接管理 ====================
+
+    def _get_connection(self):
+        """获取当前线程的数据库连接（首次使用时建表）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS llm_response_cache (
+                            cache_key TEXT PRIMARY KEY,
+                            model TEXT NOT NULL,
+                            temperature REAL,
+                            response TEXT NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_accessed_at REAL NOT NULL,
+                            hit_count INTEGER DEFAULT 0
+                        )
+                    ''')
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_response_cache(last_accessed_at)')
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def _update_stats(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+
+    # ==================== 缓存接口 ====================
+
+    @staticmethod
+    def make_key(model, temperature, prompt):
+        """根据模型、温度和完整prompt计算缓存key"""
+        raw = f"{model}\x00{float(temperature):.4f}\x00{prompt}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def is_cacheable(self, temperature):
+        """判断该温度下的调用是否可以缓存"""
+        return self.enabled and temperature is not None and float(temperature) <= self.max_temperature
+
+    def get(self, model, temperature, prompt):
+        """
+        查询缓存
+
+        Returns:
+            str: 缓存的LLM响应，未命中或已过期时返回None
+        """
+        if not self.is_cacheable(temperature):
+            return None
+
+        cache_key = self.make_key(model, temperature, prompt)
+        now = time.time()
+        try:
+            conn = self._get_connection()
+            row = conn.execute(
+                'SELECT response, created_at FROM llm_response_cache WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+
+            if row is None:
+                self._update_stats(misses=1)
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                conn.execute('DELETE FROM llm_response_cache WHERE cache_key = ?', (cache_key,))
+                conn.commit()
+                self._update_stats(misses=1, expired=1)
+                return None
+
+            conn.execute(
+                'UPDATE llm_response_cache SET last_accessed_at = ?, hit_count = hit_count + 1 WHERE cache_key = ?',
+                (now, cache_key)
+            )
+            conn.commit()
+            self._update_stats(hits=1)
+            return response
+
+        except sqlite3.Error as e:
+            self.logger.warning(f"读取LLM响应缓存失败: {str(e)}")
+            self._update_stats(errors=1)
+            return None
+
+    def set(self, model, temperature, prompt, response):
+        """写入缓存，超过条数上限时按最近访问时间淘汰"""
+        if not self.is_cacheable(temperature) or not response:
+            return
+
+        cache_key = self.make_key(model, temperature, prompt)
+        now = time.time()
+        try:
+            conn = self._get_connection()
+            conn.execute(
+                '''INSERT OR REPLACE INTO llm_response_cache
+                   (cache_key, model, temperature, response, created_at, last_accessed_at, hit_count)
+                   VALUES (?, ?, ?, ?, ?, ?, 0)''',
+                (cache_key, model, float(temperature), response, now, now)
+            )
+
+            count = conn.execute('SELECT COUNT(*) FROM llm_response_cache').fetchone()[0]
+            evicted = 0
+            if count > self.max_entries:
+                evicted = conn.execute(
+                    '''DELETE FROM llm_response_cache WHERE cache_key IN (
+                           SELECT cache_key FROM llm_response_cache ORDER BY last_accessed_at ASC LIMIT ?
+                       )''',
+                    (count - self.max_entries,)
+                ).rowcount
+            conn.commit()
+            self._update_stats(writes=1, evictions=evicted)
+
+        except sqlite3.Error as e:
+            self.logger.warning(f"写入LLM响应缓存失败: {str(e)}")
+            self._update_stats(errors=1)
+
+    def record_bypass(self):
+        """记录一次按请求跳过缓存的调用"""
+        self._update_stats(bypassed=1)
+
+    def clear(self):
+        """清空缓存"""
+        try:
+            conn = self._get_connection()
+            deleted = conn.execute('DELETE FROM llm_response_cache').rowcount
+            conn.commit()
+            self.logger.info(f"已清空LLM响应缓存，共 {deleted} 条")
+            return deleted
+        except sqlite3.Error as e:
+            self.logger.error(f"清空LLM响应缓存失败: {str(e)}")
+            return 0
+
+    def get_stats(self):
+        """获取缓存命中统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        stats['ttl_seconds'] = self.ttl_seconds
+        stats['max_entries'] = self.max_entries
+        stats['max_temperature'] = self.max_temperature
+        try:
+            stats['entries'] = self._get_connection().execute('SELECT COUNT(*) FROM llm_response_cache').fetchone()[0]
+        except sqlite3.Error:
+            stats['entries'] = None
+        return stats
+
+
+# 创建全局实例
+llm_response_cache = LLMResponseCache()
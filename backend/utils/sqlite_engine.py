@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+SQLite连接参数配置
+每个环境在 config 中声明一组PRAGMA（WAL日志、同步级别、mmap、页缓存、忙等待时间等），
+通过连接事件在SQLAlchemy引擎和共享连接池打开的每个新连接上执行；
+WAL模式下写事务提交期间读请求不再被阻塞
+"""
+
+import os
+import re
+
+from sqlalchemy import event
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_PRAGMA_NAME_PATTERN = re.compile(r'^\w+$')
+_PRAGMA_VALUE_PATTERN = re.compile(r'^[\w.\-]+$')
+
+
+def parse_pragmas(raw_value):
+    """
+    解析PRAGMA配置字符串
+
+    Args:
+        raw_value: 格式 "journal_mode=WAL;synchronous=NORMAL;cache_size=-20000"
+    """
+    pragmas = {}
+    for item in (raw_value or '').split(';'):
+        if '=' in item:
+            key, value = item.split('=', 1)
+            if key.strip():
+                pragmas[key.strip().lower()] = value.strip()
+    return pragmas
+
+
+def resolve_pragmas(profile=None):
+    """
+    获取最终生效的PRAGMA：环境配置中的 SQLITE_PRAGMAS，再以环境变量 SQLITE_PRAGMAS 覆盖
+
+    Args:
+        profile: PRAGMA字典，不指定时使用 config.SQLITE_PRAGMAS
+    """
+    if profile is None:
+        from config import config
+        profile = getattr(config, 'SQLITE_PRAGMAS', {})
+
+    pragmas = {}
+    for key, value in dict(profile, **parse_pragmas(os.getenv('SQLITE_PRAGMAS', ''))).items():
+        value = str(value)
+        if _PRAGMA_NAME_PATTERN.match(key) and _PRAGMA_VALUE_PATTERN.match(value):
+            pragmas[key.lower()] = value
+        else:
+            logger.warning(f"忽略无效的PRAGMA配置: {key}={value}")
+    return pragmas
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """在一个DBAPI连接上执行PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for key, value in pragmas.items():
+            cursor.execute(f'PRAGMA {key}={value}')
+    finally:
+        cursor.close()
+
+
+def configure_sqlite_engine(engine, pragmas=None):
+    """
+    为SQLAlchemy引擎注册连接事件，每个新连接执行PRAGMA（非SQLite引擎不处理）
+
+    Args:
+        engine: SQLAlchemy引擎
+        pragmas: PRAGMA字典，不指定时使用 resolve_pragmas() 的结果
+
+    Returns:
+        dict: 生效的PRAGMA
+    """
+    if engine.dialect.name != 'sqlite':
+        return {}
+
+    pragmas = resolve_pragmas() if pragmas is None else dict(pragmas)
+
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    event.listen(engine, 'connect', on_connect)
+    # 注册前已打开的连接没有执行过PRAGMA，丢弃后按需重新打开
+    engine.dispose()
+    logger.info(f"SQLite引擎连接参数: {pragmas}")
+    return pragmas
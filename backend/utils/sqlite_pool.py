@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+SQLite连接池工具
+为所有直接执行SQL的代码（db_ops、导入导出脚本等）提供共享的长连接：
+数据库路径与Flask-SQLAlchemy一致（取自 config.SQLALCHEMY_DATABASE_URI），
+连接在使用期间归当前线程独占，用完放回空闲池复用，避免每次调用都重新打开文件；
+连接保留各自的语句缓存，相同SQL无需重复编译
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from utils.logger import get_logger
+from utils.sqlite_engine import resolve_pragmas, apply_pragmas
+
+
+def resolve_database_path(database_uri=None):
+    """
+    将SQLAlchemy的sqlite URI解析为数据库文件路径
+
+    Args:
+        database_uri: 数据库URI，不指定时使用 config.SQLALCHEMY_DATABASE_URI
+    """
+    if database_uri is None:
+        from config import config
+        database_uri = config.SQLALCHEMY_DATABASE_URI
+
+    if not database_uri.startswith('sqlite:///'):
+        raise ValueError(f"不支持的数据库URI: {database_uri}")
+
+    path = database_uri[len('sqlite:///'):].split('?', 1)[0]
+    if not path or path == ':memory:':
+        return ':memory:'
+    if not os.path.isabs(path):
+        # 与config中的约定一致，相对路径以backend目录为基准
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(base_dir, path)
+    return path
+
+
+class SQLitePool:
+    """线程独占、用完归还的SQLite连接池"""
+
+    def __init__(self, db_path=None, pool_size=None, pragmas=None):
+        self.logger = get_logger(__name__)
+        self._db_path = db_path or os.getenv('SQLITE_DB_PATH') or None
+        # 空闲连接上限，超出的连接归还时直接关闭
+        self.pool_size = int(pool_size or os.getenv('SQLITE_POOL_SIZE', '8'))
+        # 每个连接缓存的已编译语句数量
+        self.statement_cache_size = int(os.getenv('SQLITE_STATEMENT_CACHE_SIZE', '256'))
+        # 每个新连接执行的PRAGMA：与SQLAlchemy引擎使用同一环境配置（config.SQLITE_PRAGMAS），首次使用时解析
+        self._extra_pragmas = dict(pragmas or {})
+        self._pragmas = None
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._idle = []
+        self._pid = os.getpid()
+        self._stats = {'connections_opened': 0, 'connections_closed': 0, 'checkouts': 0, 'reused': 0, 'errors': 0}
+
+    @property
+    def pragmas(self):
+        """每个新连接执行的PRAGMA"""
+        if self._pragmas is None:
+            pragmas = resolve_pragmas()
+            pragmas.update(self._extra_pragmas)
+            self._pragmas = pragmas
+        return self._pragmas
+
+    @property
+    def db_path(self):
+        """数据库文件路径（首次使用时从配置解析）"""
+        if self._db_path is None:
+            self._db_path = resolve_database_path()
+        return self._db_path
+
+    # ==================== 连接管理 ====================
+
+    def _open_connection(self):
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        apply_pragmas(conn, self.pragmas)
+
+        with self._lock:
+            self._stats['connections_opened'] += 1
+        self.logger.debug(f"打开SQLite连接: {self.db_path}")
+        return conn
+
+    def acquire(self):
+        """取出一个连接（调用方用完后必须调用 release 归还）"""
+        with self._lock:
+            # fork出的子进程不能复用父进程的连接
+            if self._pid != os.getpid():
+                self._idle = []
+                self._pid = os.getpid()
+            self._stats['checkouts'] += 1
+            if self._idle:
+                self._stats['reused'] += 1
+                return self._idle.pop()
+        return self._open_connection()
+
+    def release(self, conn):
+        """归还连接（未提交的事务会被回滚，避免下一个使用者继承）"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+            self._stats['connections_closed'] += 1
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """
+        获取连接（同一线程内嵌套使用时返回同一个连接）
+
+        Usage:
+            with sqlite_pool.connection() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        broken = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            broken = True
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            if broken:
+                with self._lock:
+                    self._stats['errors'] += 1
+                    self._stats['connections_closed'] += 1
+                conn.close()
+            else:
+                self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """获取连接并在退出时提交事务（发生异常时回滚）"""
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def execute(self, sql, params=()):
+        """执行只读查询并返回全部结果行"""
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._stats['connections_closed'] += len(idle)
+        for conn in idle:
+            conn.close()
+
+    def get_stats(self):
+        """获取连接池统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        stats['db_path'] = self._db_path
+        stats['pool_size'] = self.pool_size
+        stats['statement_cache_size'] = self.statement_cache_size
+        stats['pragmas'] = dict(self.pragmas)
+        stats['reuse_rate'] = round(stats['reused'] / stats['checkouts'], 4) if stats['checkouts'] else 0.0
+        return stats
+
+
+# 创建全局实例
+sqlite_pool = SQLitePool()
@@ -201,10 +201,20 @@ const BadcaseManagement = () => {
     fetchBadcaseRecords(1, pagination.pageSize);
   }, [filters, fetchBadcaseRecords, pagination.pageSize]);
 
-  // 查看详情
-  const handleViewDetail = (record) => {
+  // 查看详情（列表只返回精简字段，完整记录通过详情接口获取）
+  const handleViewDetail = async (record) => {
     setSelectedRecord(record);
     setDetailModalVisible(true);
+
+    try {
+      const response = await api.get(`/evaluation-history/${record.id}`);
+      if (response.data.success) {
+        setSelectedRecord(response.data.data);
+      }
+    } catch (error) {
+      console.error('获取Badcase详情失败:', error);
+      message.error('获取Badcase详情失败');
+    }
   };
 
   // 获取分数颜色
@@ -611,7 +611,9 @@ ${dimensionRequirements}
         question_time: values.questionTime ? values.questionTime.format('YYYY-MM-DD HH:mm:ss') : dayjs().format('YYYY-MM-DD HH:mm:ss'),
         evaluation_criteria: values.evaluationCriteria,  // evaluationCriteria -> evaluation_criteria
         scoring_prompt: dynamicScoringPrompt,  // 使用动态生成的scoring_prompt
-        uploaded_images: uploadedImages  // 添加图片历史记录
+        uploaded_images: uploadedImages,  // 添加图片历史记录
+        category: classification?.level2,  // 已知分类时后端无需等待分类结果即可查询评估标准
+        defer_history_save: false  // 人工评估需要立即拿到history_id
       };
       
       console.log('表单验证通过，提交评估:', formattedValues);
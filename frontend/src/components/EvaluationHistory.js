@@ -180,12 +180,22 @@ const EvaluationHistory = () => {
     }
   };
 
-  // 查看详情
-  const handleViewDetail = (record) => {
+  // 查看详情（列表只返回精简字段，完整记录通过详情接口获取）
+  const handleViewDetail = async (record) => {
     setSelectedRecord(record);
     setDetailModalVisible(true);
     setIsEditing(false);
     setEditData(null);
+
+    try {
+      const response = await api.get(`/evaluation-history/${record.id}`);
+      if (response.data.success) {
+        setSelectedRecord(response.data.data);
+      }
+    } catch (error) {
+      console.error('获取评估详情失败:', error);
+      message.error('获取评估详情失败');
+    }
   };
 
   // 开始编辑